@@ -24,6 +24,8 @@ const RichTextEditor = ({ value, onChange, placeholder }) => {
 
 const JobPostForm = () => {
   const navigate = useNavigate();
+  // Idempotency-Key of the last job post submission, and the body it was sent with
+  const submission = useRef(null);
 
   // Form state
   const [formData, setFormData] = useState({
@@ -223,6 +225,25 @@ const JobPostForm = () => {
     return Object.keys(newErrors).length === 0;
   };
 
+  // Poll the payment status endpoint until the checkout URL is available
+  const waitForCheckoutUrl = async (jobId, attempts = 30, interval = 1000) => {
+    for (let i = 0; i < attempts; i++) {
+      const { data } = await axios.get(
+        `${API_URL}jobposts/${jobId}/payment-status/`
+      );
+      if (data.init_status === "ready" && data.checkout_url) {
+        return data.checkout_url;
+      }
+      if (data.init_status === "failed") {
+        // The draft is dead; resubmitting must create a new one
+        submission.current = null;
+        throw new Error(data.error || "Payment initialization failed");
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+    throw new Error("Payment is taking longer than expected");
+  };
+
   // Handle form submission
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -281,20 +302,31 @@ const JobPostForm = () => {
       };
       console.log(jobPostData)
 
-      // The job post creation will redirect to payment page
+      // The job is saved as a draft and payment is initialized in the
+      // background. Retrying the same submission (after a network error or
+      // a timeout) reuses its key so the server never creates a second
+      // draft; an edited form is a new submission with a new key.
+      const body = JSON.stringify(jobPostData);
+      if (!submission.current || submission.current.body !== body) {
+        submission.current = { key: crypto.randomUUID(), body };
+      }
       const response = await axios.post(
         `${API_URL}jobposts/`,
-        jobPostData
+        jobPostData,
+        { headers: { "Idempotency-Key": submission.current.key } }
       );
 
-      // If we get here, it means the redirect didn't happen automatically
-      // We can manually redirect to the payment URL if it's in the response
-      if (response.data && response.data.checkout_url) {
-        window.location.href = response.data.checkout_url;
-      }
+      // Poll until the checkout URL is ready, then redirect to payment page
+      const checkoutUrl = await waitForCheckoutUrl(response.data.job_id);
+      window.location.href = checkoutUrl;
     } catch (error) {
       console.error("Error submitting form:", error);
 
+      // A rejected request is stored under its key; the next attempt needs a fresh one
+      if (error.response && error.response.status < 500) {
+        submission.current = null;
+      }
+
       // Handle validation errors from the server
       if (error.response && error.response.data) {
         setErrors({ ...errors, ...error.response.data });
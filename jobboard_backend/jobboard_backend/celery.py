@@ -14,9 +14,44 @@ app.autodiscover_tasks()
 
 # periodic task schedule using Celery Beat
 app.conf.beat_schedule = {
-    "send-job-alerts-every-24-hours": {
+    "send-due-job-alerts": {
         "task": "realtimejobs.tasks.send_periodic_job_alerts",
-        "schedule": crontab( minute="*"),  # Runs daily at 8 AM
+        # Once per scheduling slot (realtimejobs.scheduling.SLOT_MINUTES);
+        # each run only sends the digests due in that slot
+        "schedule": crontab(minute="*/15"),
+    },
+    "dispatch-email-outbox": {
+        "task": "realtimejobs.tasks.dispatch_email_outbox",
+        # Safety net; queued emails normally trigger a dispatch on commit
+        "schedule": crontab(minute="*"),
+    },
+    "reconcile-pending-payments": {
+        "task": "realtimejobs.tasks.reconcile_pending_payments",
+        # Catches payments whose callback and webhook never arrived
+        "schedule": crontab(minute="*/10"),
+    },
+    "compute-trending-jobs": {
+        "task": "realtimejobs.tasks.compute_trending_jobs",
+        "schedule": crontab(minute="*/15"),
+    },
+    "rebuild-similar-jobs": {
+        "task": "realtimejobs.tasks.refresh_similar_jobs",
+        # Full rebuild; publish/close events refresh incrementally in between
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "rebuild-static-feeds": {
+        "task": "realtimejobs.tasks.update_static_feeds",
+        # Full rebuild; publish/close events update the affected files in between
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "expire-old-jobs": {
+        "task": "realtimejobs.tasks.expire_old_jobs",
+        "schedule": crontab(minute=5),
+    },
+    "archive-closed-jobs": {
+        "task": "realtimejobs.tasks.archive_closed_jobs",
+        # Bounded batches per run, so a backlog drains over a few hours
+        "schedule": crontab(minute=35),
     },
 }
 
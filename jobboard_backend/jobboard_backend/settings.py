@@ -13,6 +13,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 
 load_dotenv()
@@ -61,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'realtimejobs.middleware.IdempotencyMiddleware',
 ]
 
 ROOT_URLCONF = 'jobboard_backend.urls'
@@ -101,6 +103,10 @@ DATABASES = {
     }
 }
 
+# Store UUID keys as binary(16) instead of char(32) on MySQL (see
+# realtimejobs.fields). Turn on only after `manage.py convert_uuid_columns`.
+BINARY_UUID_STORAGE = os.getenv('BINARY_UUID_STORAGE', 'False') == 'True'
+
 CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_ALL_ORIGINS = False
@@ -109,6 +115,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Allow your frontend origin
 ]
 
+# Retry-safe POSTs (see realtimejobs.middleware.IdempotencyMiddleware)
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
 CSRF_TRUSTED_ORIGINS = ["http://localhost:5173"]
 
 SWAGGER_SETTINGS = {
@@ -127,6 +136,17 @@ SWAGGER_SETTINGS = {
 CELERY_BROKER_URL = "redis://localhost:6379"
 CELERY_RESULT_BACKEND = "redis://localhost:6379"
 
+# Shared cache (used for metrics and cached lookups across web and Celery workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+# How long responses to POSTs carrying an Idempotency-Key are replayable
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+
 
 # chapa API secret key and Publick key
 CHAPA_SECRET_KEY = os.getenv('CHAPA_SECRET_KEY')
@@ -134,6 +154,33 @@ CHAPA_PUBLIC_KEY = os.getenv('CHAPA_PUBLIC_KEY')
 
 CHAPA_CALLBACK_URL = 'http://127.0.0.1:8000/verify_payment/'
 
+# Chapa gateway client (point CHAPA_BASE_URL at `manage.py chapa_standin` locally)
+CHAPA_BASE_URL = os.getenv('CHAPA_BASE_URL', 'https://api.chapa.co/v1')
+CHAPA_CONNECT_TIMEOUT = 3.05  # seconds
+CHAPA_READ_TIMEOUT = 10  # seconds
+CHAPA_MAX_RETRIES = 2
+
+# Secret configured on the Chapa dashboard for signing webhook events
+CHAPA_WEBHOOK_SECRET = os.getenv('CHAPA_WEBHOOK_SECRET')
+
+# Pending payments older than this are verified by the reconciliation task,
+# and declined once they are older than the expiry without being paid
+PAYMENT_RECONCILE_AFTER = timedelta(minutes=15)
+PAYMENT_PENDING_EXPIRY = timedelta(days=1)
+
+# Published jobs are closed this many days after going live, and closed
+# jobs move to the archive tables this many days after closing
+JOB_EXPIRY_DAYS = int(os.getenv('JOB_EXPIRY_DAYS', 60))
+JOB_ARCHIVE_AFTER_DAYS = int(os.getenv('JOB_ARCHIVE_AFTER_DAYS', 90))
+
+# Public site URL used in sitemaps and feeds. /sitemap.xml, /sitemaps/ and
+# /feeds/ are served by this backend and must be routed to it on that host.
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:5173')
+
+# Where the precomputed sitemaps and RSS/Atom feeds are written
+FEEDS_ROOT = os.getenv('FEEDS_ROOT', str(BASE_DIR / 'feeds'))
+FEEDS_CACHE_MAX_AGE = 60 * 15  # seconds
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,237 @@
+"""
+Reverse (percolator-style) matching of published jobs against job alerts.
+
+Instead of scanning every alert when a job goes live, each active alert is
+expanded into ``JobAlertIndex`` rows keyed by category, job type and
+location. A published job is then matched with a single indexed lookup.
+"""
+import functools
+import itertools
+import operator
+from collections import defaultdict, namedtuple
+
+from django.core.cache import cache  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import Q  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs import metrics
+from realtimejobs.models import JobAlert, JobAlertIndex, JobPost
+
+# Cache of the facet index over all published jobs; the version key is bumped
+# whenever the set of published jobs may have changed.
+PUBLISHED_INDEX_CACHE_KEY = "alerts:published-facet-index"
+PUBLISHED_INDEX_VERSION_KEY = "alerts:published-facet-index:version"
+PUBLISHED_INDEX_TIMEOUT = 60 * 60
+
+# The facets of a job the index needs, without loading whole rows
+JobFacets = namedtuple('JobFacets', ['id', 'category_id', 'job_type_id', 'location', 'is_worldwide'])
+
+# Per-process copy of the cached index: (version, FacetIndex)
+_published_index = (None, None)
+
+
+def normalize_location(location):
+    """Trim and case-fold a location so 'Berlin ' and 'berlin' share a key."""
+    if not location:
+        return None
+    return location.strip().casefold() or None
+
+
+def index_alert(alert):
+    """Rebuild the reverse index entries of a single job alert."""
+    with transaction.atomic():
+        JobAlertIndex.objects.filter(alert=alert).delete()
+        if not alert.is_active:
+            return
+
+        # An empty filter list means "any", stored as NULL
+        category_ids = list(alert.categories.values_list('id', flat=True)) or [None]
+        job_type_ids = list(alert.job_types.values_list('id', flat=True)) or [None]
+        location = normalize_location(alert.location)
+
+        JobAlertIndex.objects.bulk_create([
+            JobAlertIndex(
+                alert=alert,
+                frequency=alert.frequency,
+                category_id=category_id,
+                job_type_id=job_type_id,
+                location=location,
+            )
+            for category_id, job_type_id in itertools.product(category_ids, job_type_ids)
+        ])
+
+
+def match_alert_ids(job, frequency=None):
+    """Return the ids of active alerts whose filters accept ``job``."""
+    return match_alerts([job], frequency)[job.id]
+
+
+def match_alerts(jobs, frequency=None):
+    """
+    Match many jobs at once: one index lookup covering all their categories,
+    job types and locations, then matched in memory.
+
+    :return: {job id: set of alert ids}
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+
+    entries = JobAlertIndex.objects.filter(
+        Q(category_id__in={job.category_id for job in jobs}) | Q(category__isnull=True),
+        Q(job_type_id__in={job.job_type_id for job in jobs}) | Q(job_type__isnull=True),
+    )
+    # Worldwide jobs satisfy every location preference
+    if not any(job.is_worldwide for job in jobs):
+        entries = entries.filter(
+            Q(location__in={normalize_location(job.location) for job in jobs} - {None})
+            | Q(location__isnull=True))
+    if frequency:
+        entries = entries.filter(frequency=frequency)
+
+    # (category, job type) -> location -> alert ids; None keys mean "any"
+    index = defaultdict(lambda: defaultdict(set))
+    for alert_id, category_id, job_type_id, location in entries.values_list(
+            'alert_id', 'category_id', 'job_type_id', 'location'):
+        index[category_id, job_type_id][location].add(alert_id)
+
+    matches = {}
+    for job in jobs:
+        location = normalize_location(job.location)
+        alert_ids = set()
+        for key in itertools.product((job.category_id, None), (job.job_type_id, None)):
+            by_location = index.get(key, {})
+            if job.is_worldwide:
+                alert_ids.update(*by_location.values())
+            else:
+                alert_ids |= by_location.get(None, set())
+                if location is not None:
+                    alert_ids |= by_location.get(location, set())
+        matches[job.id] = alert_ids
+    return matches
+
+
+class FacetIndex:
+    """
+    Forward index over a list of jobs, used to match alerts in bulk.
+
+    Each facet value maps to an integer bitmap whose bit ``n`` is set when
+    ``jobs[n]`` carries that value, so matching an alert is a handful of
+    bitwise operations instead of a pass over every job.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.all = (1 << len(self.jobs)) - 1
+        self.by_category = defaultdict(int)
+        self.by_job_type = defaultdict(int)
+        self.by_location = defaultdict(int)
+        self.worldwide = 0
+
+        for position, job in enumerate(self.jobs):
+            bit = 1 << position
+            self.by_category[job.category_id] |= bit
+            self.by_job_type[job.job_type_id] |= bit
+            self.by_location[normalize_location(job.location)] |= bit
+            if job.is_worldwide:
+                self.worldwide |= bit
+
+    @staticmethod
+    def _union(bitmaps, keys):
+        return functools.reduce(operator.or_, (bitmaps.get(key, 0) for key in keys), 0)
+
+    def match(self, category_ids=(), job_type_ids=(), location=None):
+        """Return the bitmap of jobs accepted by the given alert filters."""
+        bits = self.all
+        if category_ids:
+            bits &= self._union(self.by_category, category_ids)
+        if job_type_ids:
+            bits &= self._union(self.by_job_type, job_type_ids)
+        if normalize_location(location):
+            bits &= self.by_location.get(normalize_location(location), 0) | self.worldwide
+        return bits
+
+    def match_alert(self, alert):
+        """Return the bitmap of jobs accepted by a (prefetched) JobAlert."""
+        return self.match(
+            [category.id for category in alert.categories.all()],
+            [job_type.id for job_type in alert.job_types.all()],
+            alert.location,
+        )
+
+    def iter_jobs(self, bits, limit=None):
+        """Yield the jobs of a bitmap in index order, up to ``limit``."""
+        taken = 0
+        while bits and (limit is None or taken < limit):
+            lowest = bits & -bits
+            yield self.jobs[lowest.bit_length() - 1]
+            bits ^= lowest
+            taken += 1
+
+
+def published_facet_index():
+    """
+    Return the FacetIndex over all published jobs, newest first.
+
+    The index is built once, shared through the cache and memoized per
+    process until its version changes, so matching a saved search against
+    the live job board costs a few bitwise operations.
+    """
+    global _published_index
+
+    version = published_version()
+    local_version, index = _published_index
+    if index is not None and local_version == version:
+        return index
+
+    cached = cache.get(PUBLISHED_INDEX_CACHE_KEY)
+    if cached is not None and cached[0] == version:
+        index = cached[1]
+    else:
+        rows = JobPost.objects.filter(status='published').order_by(
+            '-published_at', '-created_at').values_list(*JobFacets._fields)
+        index = FacetIndex(JobFacets(*row) for row in rows)
+        cache.set(PUBLISHED_INDEX_CACHE_KEY, (version, index), PUBLISHED_INDEX_TIMEOUT)
+
+    _published_index = (version, index)
+    return index
+
+
+def published_version():
+    """Version of the set of published jobs; bumped on every job change."""
+    version = cache.get(PUBLISHED_INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(PUBLISHED_INDEX_VERSION_KEY, 1, timeout=None)
+        version = cache.get(PUBLISHED_INDEX_VERSION_KEY)
+    return version
+
+
+def invalidate_published_facet_index():
+    """Mark the cached facet index stale after job posts change."""
+    try:
+        cache.incr(PUBLISHED_INDEX_VERSION_KEY)
+    except ValueError:
+        cache.add(PUBLISHED_INDEX_VERSION_KEY, 1, timeout=None)
+
+
+def enqueue_instant_alerts(jobs):
+    """Match freshly published jobs and enqueue notifications for instant alerts."""
+    jobs = list(jobs)
+    matches = match_alerts(jobs, frequency=JobAlert.FREQUENCY_INSTANT)
+    for job in jobs:
+        alert_ids = matches[job.id]
+        metrics.incr("alerts.instant_matches", len(alert_ids))
+        if alert_ids:
+            # Only enqueue once the publish is committed, so the worker sees it
+            transaction.on_commit(functools.partial(_enqueue, job, alert_ids))
+
+
+def _enqueue(job, alert_ids):
+    from realtimejobs.tasks import send_instant_job_alerts
+
+    send_instant_job_alerts.delay(str(job.id), [str(alert_id) for alert_id in alert_ids])
+
+    if job.published_at:
+        latency = (timezone.now() - job.published_at).total_seconds()
+        metrics.observe("alerts.publish_to_enqueue_seconds", latency)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class RealtimejobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'realtimejobs'
+
+    def ready(self):
+        # Connect signal receivers (alert index maintenance, publish hooks)
+        from realtimejobs import signals  # noqa: F401
+        # Connect the Celery task instrumentation hooks
+        from realtimejobs import metrics  # noqa: F401
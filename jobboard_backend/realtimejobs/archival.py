@@ -0,0 +1,113 @@
+"""
+Expiry and archival of old job posts.
+
+Published jobs are closed ``JOB_EXPIRY_DAYS`` after going live, and closed
+jobs are moved into ``ArchivedJobPost`` / ``ArchivedJobInteraction``
+``JOB_ARCHIVE_AFTER_DAYS`` after closing, so the hot tables (and their
+indexes) only hold recent history. Both run in bounded batches, each batch
+in its own short transaction.
+"""
+from datetime import timedelta
+
+from django.conf import settings  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import Q  # type: ignore
+from django.forms.models import model_to_dict  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs.models import (ArchivedJobInteraction, ArchivedJobPost, Company, JobImpression, JobInteraction,
+                                 JobListing, JobPost, Payment, SimilarJob, TrendingJob)
+from realtimejobs.signals import jobs_closed
+
+
+def expire_jobs(batch_size=1000, max_batches=50, now=None):
+    """
+    Close published jobs older than JOB_EXPIRY_DAYS, one chunked UPDATE per batch.
+
+    :return: Number of jobs closed.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.JOB_EXPIRY_DAYS)
+    closed = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            # Jobs published without a published_at (legacy, seeded) age from created_at
+            ids = list(JobPost.objects.filter(status='published').filter(
+                Q(published_at__lt=cutoff) | Q(published_at=None, created_at__lt=cutoff),
+            ).order_by('published_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            JobPost.objects.filter(id__in=ids, status='published').update(status='closed', updated_at=now)
+            jobs_closed.send(sender=JobPost, jobs=list(JobPost.objects.filter(id__in=ids)))
+        closed += len(ids)
+    return closed
+
+
+def _delete(queryset):
+    # Bypasses the deletion collector: the rows are archived, not gone, so the
+    # per-row post_delete handlers (counters, preference profiles) must not run
+    return queryset._raw_delete(queryset.db)
+
+
+def _archive_batch(jobs, now):
+    ids = [job.id for job in jobs]
+    company_names = dict(Company.objects.filter(id__in={job.company_id for job in jobs}).values_list('id', 'name'))
+    tag_ids = {}
+    for job_id, tag_id in JobPost.tags.through.objects.filter(jobpost_id__in=ids).values_list(
+            'jobpost_id', 'tag_id'):
+        tag_ids.setdefault(job_id, []).append(tag_id)
+    payments = {}
+    for payment in Payment.objects.filter(job_post_id__in=ids).values(
+            'job_post_id', 'amount', 'currency', 'email', 'tx_ref', 'payment_status', 'timestamp'):
+        job_id = payment.pop('job_post_id')
+        payments.setdefault(job_id, []).append(payment)
+
+    ArchivedJobPost.objects.bulk_create([
+        ArchivedJobPost(
+            id=job.id, title=job.title, slug=job.slug, job_url_hash=job.job_url_hash,
+            company_name=company_names[job.company_id], created_at=job.created_at, published_at=job.published_at,
+            closed_at=job.updated_at, archived_at=now,
+            data=dict(model_to_dict(job, exclude=['tags']), created_at=job.created_at,
+                      tag_ids=tag_ids.get(job.id, []), payments=payments.get(job.id, [])),
+        ) for job in jobs
+    ], ignore_conflicts=True)
+
+    interactions = JobInteraction.objects.filter(job_id__in=ids)
+    ArchivedJobInteraction.objects.bulk_create([
+        ArchivedJobInteraction(id=interaction_id, user_id=user_id, job_id=job_id, status=status,
+                               timestamp=timestamp)
+        for interaction_id, user_id, job_id, status, timestamp in interactions.values_list(
+            'id', 'user_id', 'job_id', 'status', 'timestamp')
+    ], batch_size=1000, ignore_conflicts=True)
+
+    # Children first, so the job rows have nothing left pointing at them
+    _delete(interactions)
+    _delete(JobImpression.objects.filter(job_id__in=ids))
+    _delete(TrendingJob.objects.filter(job_id__in=ids))
+    _delete(JobListing.objects.filter(job_id__in=ids))
+    _delete(SimilarJob.objects.filter(job_id__in=ids))
+    _delete(SimilarJob.objects.filter(similar_id__in=ids))
+    _delete(Payment.objects.filter(job_post_id__in=ids))
+    _delete(JobPost.tags.through.objects.filter(jobpost_id__in=ids))
+    _delete(JobPost.objects.filter(id__in=ids))
+
+
+def archive_jobs(batch_size=500, max_batches=20, now=None):
+    """
+    Move jobs closed more than JOB_ARCHIVE_AFTER_DAYS ago, with their
+    interactions, into the archive tables.
+
+    :return: Number of jobs archived.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.JOB_ARCHIVE_AFTER_DAYS)
+    archived = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            jobs = list(JobPost.objects.select_for_update().filter(
+                status='closed', updated_at__lt=cutoff).order_by('updated_at')[:batch_size])
+            if not jobs:
+                break
+            _archive_batch(jobs, now)
+        archived += len(jobs)
+    return archived
@@ -0,0 +1,56 @@
+"""
+Canonical job URLs for duplicate detection.
+
+Two job URLs are the same posting when they differ only in things that do
+not change the page: scheme, host case, ``www.``, default ports, trailing
+slashes, fragments, tracking parameters or query parameter order.
+``job_url_hash`` is the fixed-width key stored in ``JobPost.job_url_hash``.
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only identify the referrer or campaign
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'yclid',
+    'ref', 'ref_src', 'referrer', 'source', 'src', 'trk', 'trackingid',
+})
+TRACKING_PREFIXES = ('utm_', '_hs', 'hsa_')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+_SLASHES = re.compile(r'/{2,}')
+
+
+def _clean_path(path):
+    # Decode then re-encode so %7E and ~ (and the like) compare equal
+    path = quote(unquote(path), safe="/:@!$&'()*+,;=-._~")
+    path = _SLASHES.sub('/', path)
+    return path.rstrip('/') or '/'
+
+
+def canonicalize_job_url(url):
+    """Return the canonical form of a job URL."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    # http and https serve the same posting
+    return urlunsplit(('https' if scheme in DEFAULT_PORTS else scheme, host,
+                       _clean_path(parts.path), urlencode(query), ''))
+
+
+def job_url_hash(url):
+    """SHA-256 hex digest of the canonical URL (64 characters)."""
+    return hashlib.sha256(canonicalize_job_url(url).encode('utf-8')).hexdigest()
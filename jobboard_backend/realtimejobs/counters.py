@@ -0,0 +1,190 @@
+"""
+Buffered increments for denormalized per-job counters.
+
+Hot paths (save/apply clicks) only add to an in-process buffer. The buffer
+is flushed with one batched UPDATE per flush when it holds enough keys or
+when its oldest entry is older than the flush interval (checked by a timer,
+so a lone delta does not wait for the next increment), and once more at
+process exit. A crash can lose at most one interval of increments;
+``manage.py recount_job_counters`` recomputes the columns exactly.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.db import connections, transaction  # type: ignore
+from django.db.models import Case, F, IntegerField, Q, Value, When  # type: ignore
+
+from realtimejobs import listings, metrics
+from realtimejobs.models import JobPost
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying with the same data: the database was unreachable or
+# the connection broke. Matched by name to cover both Django's wrappers and
+# the raw pymysql exceptions.
+TRANSIENT_ERRORS = {'OperationalError', 'InterfaceError'}
+
+
+def is_transient(exc):
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+class AggregationBuffer:
+    """
+    Thread-safe in-process buffer of per-key counter deltas.
+
+    :param flush: Callable receiving {key: Counter(field -> delta)}.
+    :param flush_size: Flush once this many distinct keys are buffered.
+    :param flush_interval: Flush once the oldest buffered delta is this old (seconds).
+    :param max_keys: Hard bound on buffered keys; further new keys are
+        dropped (and counted) until the next successful flush.
+
+    A flush that fails on a transient error keeps all its deltas for the next
+    flush. Any other failure means some key cannot be written (e.g. its row
+    is gone): the keys are then flushed one by one, and those that still
+    fail are discarded (and counted) so they cannot block the others.
+    """
+
+    def __init__(self, name, flush, flush_size=200, flush_interval=10.0, max_keys=10000):
+        self.name = name
+        self._flush = flush
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self._pending = defaultdict(Counter)
+        self._first_at = None
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, key, field, delta=1):
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_keys:
+                metrics.incr(f"{self.name}.dropped")
+                return
+            self._pending[key][field] += delta
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+                self._schedule()
+            due = (len(self._pending) >= self.flush_size
+                   or time.monotonic() - self._first_at >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write out everything buffered so far; returns the number of keys flushed."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._first_at = None
+        pending = {key: deltas for key, deltas in pending.items() if any(deltas.values())}
+        if not pending:
+            return 0
+
+        try:
+            self._flush(pending)
+        except Exception as exc:
+            if is_transient(exc) or len(pending) == 1:
+                return self._failed(pending, exc)
+            logger.warning("Flushing %s failed (%s); flushing %d keys one by one", self.name, exc, len(pending))
+            return self._flush_each(pending)
+
+        metrics.incr(f"{self.name}.flushed_keys", len(pending))
+        return len(pending)
+
+    def _flush_each(self, pending):
+        flushed = 0
+        for key, deltas in pending.items():
+            try:
+                self._flush({key: deltas})
+            except Exception as exc:
+                self._failed({key: deltas}, exc)
+            else:
+                flushed += 1
+        metrics.incr(f"{self.name}.flushed_keys", flushed)
+        return flushed
+
+    def _failed(self, pending, exc):
+        """Keep the deltas after a transient error, else discard them."""
+        if not is_transient(exc):
+            logger.error("Discarding %d %s keys that cannot be flushed: %s", len(pending), self.name, exc)
+            metrics.incr(f"{self.name}.discarded", len(pending))
+            return 0
+
+        logger.exception("Flushing %s failed; keeping %d keys", self.name, len(pending), exc_info=exc)
+        with self._lock:
+            for key, deltas in pending.items():
+                self._pending[key].update(deltas)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+                self._schedule()
+        return 0
+
+    def _schedule(self):
+        # Called with the lock held, when the buffer goes from empty to pending
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_due)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_due(self):
+        with self._lock:
+            self._timer = None
+            first_at = self._first_at
+            if first_at is not None and time.monotonic() - first_at < self.flush_interval:
+                # Flushed and refilled since the timer started
+                self._schedule()
+                return
+        if first_at is not None:
+            try:
+                self.flush()
+            finally:
+                # The timer thread's database connections die with it
+                connections.close_all()
+
+
+# **************** JOB INTERACTION COUNTERS ************************
+
+# Interaction status -> JobPost counter column
+COUNTER_FIELDS = {
+    'saved': 'saves_count',
+    'applied': 'applications_count',
+}
+
+
+def _flush_job_counters(pending):
+    """
+    Apply all buffered deltas in a single UPDATE ... CASE statement, and copy
+    the results onto the jobs' listing rows in the same transaction.
+    """
+    updates = {}
+    for field in COUNTER_FIELDS.values():
+        whens = []
+        for job_id, deltas in pending.items():
+            delta = deltas[field]
+            if delta > 0:
+                whens.append(When(id=job_id, then=F(field) + Value(delta)))
+            elif delta < 0:
+                # Clamped at 0 before subtracting: a decrement may reach a row whose
+                # count is already stale, and MySQL rejects a negative UNSIGNED value
+                # outright, so GREATEST(col - n, 0) would fail rather than clamp
+                whens.append(When(Q(id=job_id) & Q(**{f"{field}__lt": -delta}), then=Value(0)))
+                whens.append(When(id=job_id, then=F(field) - Value(-delta)))
+        if whens:
+            updates[field] = Case(*whens, default=F(field), output_field=IntegerField())
+    with transaction.atomic():
+        JobPost.objects.filter(id__in=list(pending)).update(**updates)
+        listings.copy_counters(pending)
+
+
+job_counters = AggregationBuffer('counters.jobs', _flush_job_counters)
+
+
+def record_interaction(job_id, status, delta=1):
+    """Buffer a change of a job's saved/applied count."""
+    field = COUNTER_FIELDS.get(status)
+    if field:
+        job_counters.add(uuid.UUID(str(job_id)), field, delta)
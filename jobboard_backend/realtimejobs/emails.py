@@ -0,0 +1,95 @@
+"""
+Transactional email outbox.
+
+Emails are never sent from request handlers. Instead they are written to
+the ``EmailOutbox`` table inside the caller's database transaction, and the
+``dispatch_email_outbox`` task delivers them in batches once that
+transaction commits. Every email carries a dedup key, so queuing the same
+notification twice is a no-op.
+"""
+from django.conf import settings  # type: ignore
+from django.db import transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs import metrics
+from realtimejobs.models import EmailOutbox
+
+
+def queue_emails(emails):
+    """
+    Add emails to the outbox and schedule a dispatch after commit.
+
+    :param emails: Iterable of (dedup_key, subject, body, from_email, recipient).
+    :return: Number of emails submitted (duplicates are silently skipped).
+    """
+    rows = [
+        EmailOutbox(dedup_key=dedup_key, subject=subject[:255], body=body,
+                    from_email=from_email or settings.EMAIL_HOST_USER, recipient=recipient)
+        for dedup_key, subject, body, from_email, recipient in emails
+    ]
+    if not rows:
+        return 0
+
+    EmailOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+    transaction.on_commit(_schedule_dispatch)
+    metrics.incr("emails.queued", len(rows))
+    return len(rows)
+
+
+def _schedule_dispatch():
+    from realtimejobs.tasks import dispatch_email_outbox
+
+    dispatch_email_outbox.delay()
+
+
+# **************** EMAIL TEMPLATES ************************
+
+def subscription_email(job_alert):
+    """Confirmation email sent when a user subscribes to job alerts."""
+    subject = "You're Subscribed to RealtimeJobs Alerts!"
+    message = f"""
+    Hi {job_alert.user.full_name},
+
+    You have successfully subscribed to RealtimeJob job alerts. We will send you job updates based on your preferences.
+
+    If you ever want to unsubscribe, click the link below:
+    https://yourwebsite.com/unsubscribe/{job_alert.id}
+
+    Best,
+    Realtimejobs Board Team
+    """
+    return (f"subscription:{job_alert.id}", subject, message,
+            settings.EMAIL_HOST_USER, job_alert.email)
+
+
+def payment_success_email(payment, job_title):
+    """Email sent once a job post payment is verified and the job is live."""
+    subject = "Payment Successful -Your Job Post has been Published"
+    message = f"Dear User,\n\nYour payment has been successfully processed, and your job post '{job_title}' is now live on RealtimeJobs.\n\nThank you for using our platform.\n\nBest regards,\nRealtimeJobs Team"
+    return (f"payment-success:{payment.tx_ref}", subject, message,
+            settings.DEFAULT_FROM_EMAIL, payment.email)
+
+
+def job_alert_email(alert, jobs, dedup_key):
+    """Email listing up to five jobs matching a job alert."""
+    subject = f"🔥 RealtimeJobs New Job Alert - {timezone.now().strftime('%b %d, %Y')}"
+
+    job_list_text = "\n\n".join(
+        f"{job.title}\n{job.short_description}\nLocation: {job.location}\nLink: https://yourwebsite.com/jobs/{job.slug}"
+        for job in jobs[:5]  # Limit to 5 per user
+    )
+
+    message = f"""Hello {alert.user.full_name},
+
+Here are the latest job postings for you:
+{job_list_text}
+
+View more jobs here: https://yourwebsite.com/jobs
+
+To unsubscribe, click here: https://yourwebsite.com/unsubscribe/{alert.id}
+
+Best,
+RealtimeJobs Team
+            """
+
+    return (dedup_key, subject, message, settings.EMAIL_HOST_USER, alert.email)
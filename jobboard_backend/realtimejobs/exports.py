@@ -0,0 +1,147 @@
+"""
+Streaming export of job posts for partner feeds.
+
+Jobs are read in keyset batches ordered by (updated_at, id), so every
+batch is one indexed range query and memory stays constant no matter how
+many jobs are exported. Rows are encoded as NDJSON or CSV and, when
+requested, gzipped on the fly with the compressor flushed after each batch.
+"""
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+
+from django.db.models import Q  # type: ignore
+
+from realtimejobs.models import JobPost
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+BATCH_SIZE = 1000
+
+COLUMNS = [
+    'id', 'slug', 'title', 'status', 'company', 'category', 'job_type', 'location',
+    'is_worldwide', 'salary', 'short_description', 'description', 'job_url', 'tags',
+    'published_at', 'updated_at',
+]
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an Accept-Encoding header allows gzip: listed (or covered by
+    ``*``) with a non-zero q-value. An explicit ``gzip`` entry wins over ``*``.
+    """
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+
+def iter_jobs(updated_since=None, batch_size=BATCH_SIZE):
+    """
+    Yield export rows (dicts) ordered by (updated_at, id).
+
+    Without ``updated_since`` only published jobs are exported. With it, jobs
+    that stopped being published since then are included too (with their
+    status) so that a delta consumer can remove them.
+    """
+    jobs = JobPost.objects.order_by('updated_at', 'id').values(
+        'id', 'slug', 'title', 'status', 'company__name', 'category__name', 'job_type__name',
+        'location', 'is_worldwide', 'salary', 'short_description', 'description', 'job_url',
+        'published_at', 'updated_at')
+    if updated_since is None:
+        jobs = jobs.filter(status='published')
+    else:
+        jobs = jobs.filter(updated_at__gte=updated_since).exclude(status='draft')
+
+    last = None
+    while True:
+        batch = jobs
+        if last is not None:
+            batch = batch.filter(Q(updated_at__gt=last[0]) | Q(updated_at=last[0], id__gt=last[1]))
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+
+        tags = defaultdict(list)
+        for job_id, name in JobPost.tags.through.objects.filter(
+                jobpost_id__in=[job['id'] for job in batch]).values_list('jobpost_id', 'tag__name'):
+            tags[job_id].append(name)
+
+        for job in batch:
+            yield {
+                'id': str(job['id']),
+                'slug': job['slug'],
+                'title': job['title'],
+                'status': job['status'],
+                'company': job['company__name'],
+                'category': job['category__name'],
+                'job_type': job['job_type__name'],
+                'location': job['location'],
+                'is_worldwide': job['is_worldwide'],
+                'salary': job['salary'],
+                'short_description': job['short_description'],
+                'description': job['description'],
+                'job_url': job['job_url'],
+                'tags': sorted(tags[job['id']]),
+                'published_at': job['published_at'].isoformat() if job['published_at'] else None,
+                'updated_at': job['updated_at'].isoformat(),
+            }
+        last = (batch[-1]['updated_at'], batch[-1]['id'])
+
+
+def _encode_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(dict(row, tags=','.join(row['tags'])))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _batched(lines, batch_size=BATCH_SIZE):
+    """Join encoded rows into one bytes chunk per batch."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= batch_size:
+            yield ''.join(chunk).encode('utf-8')
+            chunk = []
+    if chunk:
+        yield ''.join(chunk).encode('utf-8')
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        # Sync flush so the partner can decode each batch as it arrives
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_stream(fmt, updated_since=None, gzip=False):
+    """Return an iterator of bytes chunks with the export in the given format."""
+    encode = _encode_csv if fmt == 'csv' else _encode_ndjson
+    chunks = _batched(encode(iter_jobs(updated_since)))
+    return _gzipped(chunks) if gzip else chunks
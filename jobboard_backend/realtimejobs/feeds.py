@@ -0,0 +1,249 @@
+"""
+Precomputed RSS/Atom feeds and XML sitemaps.
+
+Everything is written as static files under ``settings.FEEDS_ROOT``:
+
+    sitemap.xml                  sitemap index
+    sitemaps/jobs-<n>.xml        published jobs, at most SHARD_SIZE URLs each
+    feeds/category/<slug>.rss    newest jobs per category (also .atom)
+    feeds/tag/<slug>.rss         newest jobs per tag (also .atom)
+    manifest.json                sitemap shard boundaries
+
+Shards hold consecutive ranges of published jobs ordered by
+(published_at, id), where jobs without a published_at fall back to their
+created_at; ``manifest.json`` records the first key of each shard.
+Publishing or closing jobs rewrites only the shards whose range contains
+them (normally just the last one) and the feeds of their categories and
+tags. ``build_all`` regenerates everything from scratch.
+"""
+import bisect
+import json
+import os
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings  # type: ignore
+from django.db.models import Q  # type: ignore
+from django.db.models.functions import Coalesce  # type: ignore
+from django.utils import timezone  # type: ignore
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed  # type: ignore
+
+from realtimejobs.models import Category, JobPost, Tag
+
+SHARD_SIZE = 50000
+FEED_SIZE = 50  # newest jobs per category/tag feed
+FEED_FORMATS = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# The first shard starts below every job, so no job falls before shard 0
+MIN_KEY = [datetime.min.replace(tzinfo=dt_timezone.utc).isoformat(), uuid.UUID(int=0).hex]
+
+
+def job_url(slug):
+    return f"{settings.SITE_URL.rstrip('/')}/jobs/{slug}"
+
+
+def _path(*parts):
+    return os.path.join(settings.FEEDS_ROOT, *parts)
+
+
+def _write(relative_path, content):
+    """Write a file atomically so the serving view never sees a partial one."""
+    path = _path(relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        if isinstance(content, str):
+            f.write(content)
+        else:
+            for part in content:
+                f.write(part)
+    os.replace(tmp, path)
+
+
+# **************** SITEMAPS ************************
+
+def _key(feed_at, job_id):
+    return [feed_at.isoformat(), job_id.hex]
+
+
+def _parse_key(key):
+    return datetime.fromisoformat(key[0]), uuid.UUID(key[1])
+
+
+def _with_feed_at(jobs):
+    # Legacy and seeded jobs may have been published without a published_at
+    return jobs.annotate(feed_at=Coalesce('published_at', 'created_at'))
+
+
+def _published():
+    return _with_feed_at(JobPost.objects.filter(status='published')).order_by('feed_at', 'id')
+
+
+def _after(jobs, key, inclusive=True):
+    feed_at, job_id = _parse_key(key)
+    same = Q(feed_at=feed_at, id__gte=job_id) if inclusive else Q(feed_at=feed_at, id__gt=job_id)
+    return jobs.filter(Q(feed_at__gt=feed_at) | same)
+
+
+def _shard_rows(manifest, number):
+    """(feed_at, id, slug, updated_at) of every job in the shard's range."""
+    shards = manifest['shards']
+    jobs = _after(_published(), shards[number]['start'])
+    if number + 1 < len(shards):
+        feed_at, job_id = _parse_key(shards[number + 1]['start'])
+        jobs = jobs.filter(Q(feed_at__lt=feed_at) | Q(feed_at=feed_at, id__lt=job_id))
+    return list(jobs.values_list('feed_at', 'id', 'slug', 'updated_at'))
+
+
+def _write_shard(number, rows):
+    def lines():
+        yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        for _, _, slug, updated_at in rows:
+            yield (f"<url><loc>{escape(job_url(slug))}</loc>"
+                   f"<lastmod>{updated_at.date().isoformat()}</lastmod></url>\n")
+        yield "</urlset>\n"
+
+    _write(os.path.join('sitemaps', f'jobs-{number}.xml'), lines())
+
+
+def _write_index(manifest):
+    base = settings.SITE_URL.rstrip('/')
+    entries = ''.join(
+        f"<sitemap><loc>{escape(base)}/sitemaps/jobs-{number}.xml</loc>"
+        f"<lastmod>{shard['lastmod']}</lastmod></sitemap>\n"
+        for number, shard in enumerate(manifest['shards'])
+    )
+    _write('sitemap.xml', f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                          f'<sitemapindex xmlns="{SITEMAP_NS}">\n{entries}</sitemapindex>\n')
+    _write('manifest.json', json.dumps(manifest))
+
+
+def _load_manifest():
+    try:
+        with open(_path('manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def build_sitemaps():
+    """Rebuild every sitemap shard; returns the number of shards."""
+    now = timezone.now().isoformat()
+    manifest = {'shards': []}
+    jobs = _published().values_list('feed_at', 'id', 'slug', 'updated_at')
+    last = None
+    while True:
+        rows = list((jobs if last is None else _after(jobs, last, inclusive=False))[:SHARD_SIZE])
+        if rows or last is None:
+            number = len(manifest['shards'])
+            start = MIN_KEY if last is None else _key(*rows[0][:2])
+            manifest['shards'].append({'start': start, 'count': len(rows), 'lastmod': now})
+            _write_shard(number, rows)
+        if len(rows) < SHARD_SIZE:
+            break
+        last = _key(*rows[-1][:2])
+
+    # Shards left over from a bigger previous build
+    number = len(manifest['shards'])
+    while os.path.exists(_path('sitemaps', f'jobs-{number}.xml')):
+        os.remove(_path('sitemaps', f'jobs-{number}.xml'))
+        number += 1
+
+    _write_index(manifest)
+    return len(manifest['shards'])
+
+
+def update_sitemaps(jobs):
+    """
+    Rewrite the shards containing the given (feed_at, id) keys.
+
+    Growth past SHARD_SIZE in the last shard spills into new shards; if an
+    earlier shard overflows (a job republished with an old published_at) the
+    sitemaps are rebuilt instead.
+    """
+    manifest = _load_manifest()
+    if manifest is None:
+        return build_sitemaps()
+
+    starts = [_parse_key(shard['start']) for shard in manifest['shards']]
+    affected = {bisect.bisect_right(starts, key) - 1 for key in jobs}
+    now = timezone.now().isoformat()
+    last = len(manifest['shards']) - 1
+
+    for number in sorted(affected):
+        rows = _shard_rows(manifest, number)
+        if len(rows) > SHARD_SIZE and number != last:
+            return build_sitemaps()
+        pieces = [rows[i:i + SHARD_SIZE] for i in range(0, len(rows), SHARD_SIZE)] or [[]]
+        for offset, piece in enumerate(pieces):
+            if offset:
+                manifest['shards'].append({'start': _key(*piece[0][:2])})
+            manifest['shards'][number + offset].update(count=len(piece), lastmod=now)
+            _write_shard(number + offset, piece)
+
+    _write_index(manifest)
+    return len(affected)
+
+
+# **************** FEEDS ************************
+
+def _write_feed(kind, obj, jobs):
+    title = f"{obj.name} jobs"
+    link = settings.SITE_URL
+    for fmt, feed_class in FEED_FORMATS.items():
+        feed = feed_class(
+            title=title, link=link, description=f"Newest {obj.name} job posts.",
+            feed_url=f"{settings.SITE_URL.rstrip('/')}/feeds/{kind}/{obj.slug}.{fmt}", language='en',
+        )
+        for job in jobs:
+            feed.add_item(
+                title=f"{job.title} at {job.company.name}",
+                link=job_url(job.slug),
+                description=job.short_description,
+                unique_id=job_url(job.slug),
+                pubdate=job.feed_at,
+                updateddate=job.updated_at,
+                author_name=job.company.name,
+                categories=[tag.name for tag in job.tags.all()],
+            )
+        _write(os.path.join('feeds', kind, f"{obj.slug}.{fmt}"), feed.writeString('utf-8'))
+
+
+def _newest(jobs):
+    return list(_with_feed_at(jobs.filter(status='published')).select_related('company').prefetch_related(
+        'tags').order_by('-feed_at', '-id')[:FEED_SIZE])
+
+
+def update_feeds(category_ids=(), tag_ids=()):
+    """Regenerate the RSS and Atom feeds of the given categories and tags."""
+    for category in Category.objects.filter(id__in=category_ids):
+        _write_feed('category', category, _newest(category.job_posts))
+    for tag in Tag.objects.filter(id__in=tag_ids):
+        _write_feed('tag', tag, _newest(tag.job_posts))
+
+
+# **************** ENTRY POINTS ************************
+
+def build_all():
+    """Regenerate all sitemaps and feeds; returns (shards, feeds)."""
+    shards = build_sitemaps()
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    update_feeds(category_ids, tag_ids)
+    return shards, len(category_ids) + len(tag_ids)
+
+
+def update_for_jobs(job_ids):
+    """Apply publish/close changes of the given jobs to the static files."""
+    jobs = list(_with_feed_at(JobPost.objects.filter(id__in=job_ids)).values_list(
+        'feed_at', 'id', 'category_id'))
+    if not jobs:
+        return
+    update_sitemaps([(feed_at, job_id) for feed_at, job_id, _ in jobs])
+    update_feeds(
+        {category_id for _, _, category_id in jobs},
+        set(JobPost.tags.through.objects.filter(jobpost_id__in=job_ids).values_list('tag_id', flat=True)),
+    )
@@ -0,0 +1,331 @@
+"""
+Streaming bulk import of job posts from partner feeds (CSV or JSONL).
+
+Rows are parsed one at a time and inserted in chunks with ``bulk_create``;
+company, category, job type and tag names are resolved through in-memory
+maps loaded once per import, and slugs are allocated against an in-memory
+set of the slugs already taken. Rows whose canonical job URL is already
+known (in the database or earlier in the feed) are skipped as duplicates.
+A bad row is reported with its line number and skipped; it never aborts
+the import.
+
+Columns / keys (names are matched case-insensitively):
+
+    title, job_url, category, job_type, company, description   required
+    short_description, location, is_worldwide, salary, tags    optional
+    company_email, company_contact                              create missing companies
+
+``tags`` is a list in JSONL and a comma separated string in CSV.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError  # type: ignore
+from django.core.validators import URLValidator, validate_email  # type: ignore
+from django.db import IntegrityError, transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+from django.utils.html import strip_tags  # type: ignore
+from django.utils.text import slugify  # type: ignore
+
+from realtimejobs import listings
+from realtimejobs.canonical import job_url_hash
+from realtimejobs.models import Category, Company, JobPost, JobType, Tag
+from realtimejobs.signals import jobs_published
+
+FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('title', 'job_url', 'category', 'job_type', 'company', 'description')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+MAX_REPORTED_ERRORS = 1000
+
+_validate_url = URLValidator(schemes=['http', 'https'])
+
+
+class ImportFormatError(ValueError):
+    """Raised when the feed format is unknown."""
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (line number, dict or parse error message) from a binary or text stream.
+    """
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, f"Invalid JSON: {exc}"
+            continue
+        yield line_num, row if isinstance(row, dict) else "Each line must be a JSON object"
+
+
+class JobImporter:
+    """
+    Imports job posts in chunks.
+
+    :param publish: Import as published (the default) or as drafts.
+    :param notify: Send ``jobs_published`` for each imported chunk, which
+        matches instant alerts and refreshes recommendations.
+    """
+
+    def __init__(self, publish=True, notify=True, chunk_size=2000):
+        self.publish = publish
+        self.notify = notify
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+
+        self.categories = {name.casefold(): pk for pk, name in Category.objects.values_list('id', 'name')}
+        self.job_types = {name.casefold(): pk for pk, name in JobType.objects.values_list('id', 'name')}
+        self._load_names()
+        self.slugs = set(JobPost.objects.values_list('slug', flat=True))
+        self.url_hashes = set(JobPost.objects.exclude(job_url_hash=None).values_list('job_url_hash', flat=True))
+        self._next_suffix = {}
+
+    def _load_names(self):
+        self.companies = {name.casefold(): pk for pk, name in Company.objects.values_list('id', 'name')}
+        self.company_emails = set(Company.objects.values_list('contact_email', flat=True))
+        self.tags = {name.casefold(): pk for pk, name in Tag.objects.values_list('id', 'name')}
+        self.tag_slugs = set(Tag.objects.values_list('slug', flat=True))
+
+    def run(self, rows):
+        """Import (line number, row) pairs; returns a summary dict."""
+        chunk = []
+        for line_num, row in rows:
+            if isinstance(row, str):
+                self._error(line_num, {"row": row})
+                continue
+            prepared = self._prepare(line_num, {str(k).strip().lower(): v for k, v in row.items()})
+            if prepared is not None:
+                chunk.append(prepared)
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+    def _error(self, line_num, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_num, "errors": errors})
+
+    def _text(self, row, field):
+        value = row.get(field)
+        return '' if value is None else str(value).strip()
+
+    def _prepare(self, line_num, row):
+        """Validate one row; returns (JobPost, tag names, new company) or None."""
+        errors = {}
+        for field in REQUIRED_FIELDS:
+            if not self._text(row, field):
+                errors[field] = "This field is required."
+        if errors:
+            self._error(line_num, errors)
+            return None
+
+        title = self._text(row, 'title')
+        job_url = self._text(row, 'job_url')
+        location = self._text(row, 'location') or None
+        salary = self._text(row, 'salary') or None
+        description = self._text(row, 'description')
+        short_description = self._text(row, 'short_description') or strip_tags(description)[:200].strip()
+
+        if len(title) > 255:
+            errors['title'] = "Ensure this field has no more than 255 characters."
+        if len(short_description) > 200:
+            errors['short_description'] = "Ensure this field has no more than 200 characters."
+        if location and len(location) > 255:
+            errors['location'] = "Ensure this field has no more than 255 characters."
+        if salary and len(salary) > 100:
+            errors['salary'] = "Ensure this field has no more than 100 characters."
+        try:
+            _validate_url(job_url)
+        except ValidationError:
+            errors['job_url'] = "Enter a valid URL."
+
+        category_id = self.categories.get(self._text(row, 'category').casefold())
+        if category_id is None:
+            errors['category'] = f"Unknown category '{self._text(row, 'category')}'."
+        job_type_id = self.job_types.get(self._text(row, 'job_type').casefold())
+        if job_type_id is None:
+            errors['job_type'] = f"Unknown job type '{self._text(row, 'job_type')}'."
+
+        company_name = self._text(row, 'company')
+        company_id = self.companies.get(company_name.casefold())
+        new_company = None
+        if company_id is None:
+            new_company = self._new_company(row, company_name, errors)
+            company_id = new_company.id if new_company else None
+
+        tags = row.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        tags = [str(tag).strip() for tag in tags if str(tag).strip()]
+        if any(len(tag) > 100 for tag in tags):
+            errors['tags'] = "Tag names can have at most 100 characters."
+
+        if errors:
+            self._error(line_num, errors)
+            return None
+
+        url_hash = job_url_hash(job_url)
+        if url_hash in self.url_hashes:
+            self.duplicates += 1
+            return None
+        self.url_hashes.add(url_hash)
+
+        if new_company:
+            # Later rows of this import reuse the company
+            self.companies[company_name.casefold()] = new_company.id
+            self.company_emails.add(new_company.contact_email)
+
+        is_worldwide = row.get('is_worldwide')
+        if not isinstance(is_worldwide, bool):
+            is_worldwide = str(is_worldwide or '').strip().lower() in TRUE_VALUES
+
+        job = JobPost(
+            job_url=job_url, job_url_hash=url_hash, title=title, slug=self._allocate_slug(title),
+            location=location, is_worldwide=is_worldwide, category_id=category_id,
+            job_type_id=job_type_id, salary=salary, description=description,
+            short_description=short_description, company_id=company_id,
+            status='published' if self.publish else 'draft',
+        )
+        return line_num, job, tags, new_company
+
+    def _new_company(self, row, name, errors):
+        email = self._text(row, 'company_email')
+        if not email:
+            errors['company'] = f"Unknown company '{name}' (add company_email to create it)."
+            return None
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors['company_email'] = "Enter a valid email address."
+            return None
+        if email in self.company_emails:
+            errors['company_email'] = "Another company already uses this email."
+            return None
+        if len(name) > 255:
+            errors['company'] = "Ensure this field has no more than 255 characters."
+            return None
+        return Company(name=name, description='', contact_email=email,
+                       contact_name=self._text(row, 'company_contact') or name)
+
+    def _allocate_slug(self, title):
+        """Unique slug from the title: base, base-2, base-3, ... (never hits the DB)."""
+        base = slugify(title)[:240] or 'job'
+        slug = base
+        suffix = self._next_suffix.get(base, 2)
+        while slug in self.slugs:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        self._next_suffix[base] = suffix
+        self.slugs.add(slug)
+        return slug
+
+    def _create_missing_tags(self, names):
+        """Create the tags not seen before in one bulk insert."""
+        missing = {}
+        for name in names:
+            key = name.casefold()
+            if key not in self.tags and key not in missing:
+                slug = base = slugify(name)[:40] or 'tag'
+                suffix = 2
+                while slug in self.tag_slugs:
+                    slug = f"{base}-{suffix}"
+                    suffix += 1
+                self.tag_slugs.add(slug)
+                missing[key] = Tag(name=name, slug=slug)
+        if missing:
+            Tag.objects.bulk_create(missing.values())
+            self.tags.update({key: tag.id for key, tag in missing.items()})
+
+    def _flush(self, chunk):
+        now = timezone.now()
+        if self.publish:
+            for _, job, _, _ in chunk:
+                job.published_at = now
+        # Rows skipped on a retry may carry a company later rows refer to
+        companies = [company for _, _, _, company in chunk if company]
+        tags, tag_slugs = dict(self.tags), set(self.tag_slugs)
+        try:
+            self._insert(chunk, companies)
+            return
+        except IntegrityError:
+            # Another import or a user posted one of these URLs (or took one
+            # of these slugs) since the import started
+            self.tags, self.tag_slugs = tags, tag_slugs
+        try:
+            self._insert(self._recheck(chunk), companies)
+        except IntegrityError:
+            # Something else was taken concurrently (a company email, a tag):
+            # give up on this chunk only, and forget the names it would have created
+            self._load_names()
+            for line_num, job, _, _ in chunk:
+                self.url_hashes.discard(job.job_url_hash)
+                self._error(line_num, {"row": "Conflicts with a job, company or tag created during the import."})
+
+    def _recheck(self, chunk):
+        """Drop the rows whose URL is now in the database and re-slug the ones whose slug is taken."""
+        jobs = [job for _, job, _, _ in chunk]
+        taken_hashes = set(JobPost.objects.filter(
+            job_url_hash__in=[job.job_url_hash for job in jobs]).values_list('job_url_hash', flat=True))
+        taken_slugs = set(JobPost.objects.filter(
+            slug__in=[job.slug for job in jobs]).values_list('slug', flat=True))
+        self.slugs.update(taken_slugs)
+
+        kept = []
+        for line_num, job, names, company in chunk:
+            if job.job_url_hash in taken_hashes:
+                self.duplicates += 1
+                continue
+            if job.slug in taken_slugs:
+                job.slug = self._allocate_slug(job.title)
+            kept.append((line_num, job, names, company))
+        return kept
+
+    def _insert(self, chunk, companies):
+        jobs = [job for _, job, _, _ in chunk]
+        through = JobPost.tags.through
+        with transaction.atomic():
+            if companies:
+                Company.objects.bulk_create(companies)
+            self._create_missing_tags([name for _, _, names, _ in chunk for name in names])
+            JobPost.objects.bulk_create(jobs, batch_size=500)
+            through.objects.bulk_create([
+                through(jobpost_id=job.id, tag_id=tag_id)
+                for _, job, names, _ in chunk
+                for tag_id in {self.tags[name.casefold()] for name in names}
+            ], batch_size=1000)
+
+            if self.publish and self.notify:
+                jobs_published.send(sender=JobPost, jobs=jobs)
+            elif self.publish:
+                # No receivers run, but the jobs still need their listing rows
+                listings.sync_jobs([job.id for job in jobs])
+
+        self.created += len(jobs)
@@ -0,0 +1,45 @@
+"""
+Job view/impression tracking.
+
+Views are counted in a per-process AggregationBuffer keyed by (job, hour)
+and flushed in bulk upserts to the ``JobImpression`` rollup table, so a
+busy listing costs a few dict increments per request rather than a write
+per job. The buffer is bounded; views arriving while it is full are
+dropped and counted in the ``impressions.dropped`` metric.
+"""
+import uuid
+
+from django.utils import timezone  # type: ignore
+
+from realtimejobs.counters import AggregationBuffer
+from realtimejobs.queries.impression_queries import ImpressionQueries
+
+
+def _hour_bucket():
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+def _flush_impressions(pending):
+    rows = [
+        # MySQL DATETIME columns hold naive UTC under USE_TZ
+        (ImpressionQueries.uuid_param(job_id), bucket.replace(tzinfo=None),
+         deltas['detail_views'], deltas['list_views'])
+        for (job_id, bucket), deltas in pending.items()
+    ]
+    ImpressionQueries().bulk_add_impressions(rows)
+
+
+impression_buffer = AggregationBuffer(
+    'impressions', _flush_impressions, flush_size=1000, flush_interval=30.0, max_keys=50000)
+
+
+def record_detail_view(job_id):
+    """Count one view of a job's detail page."""
+    impression_buffer.add((uuid.UUID(str(job_id)), _hour_bucket()), 'detail_views')
+
+
+def record_list_impressions(job_ids):
+    """Count one listing impression for each of the given jobs."""
+    bucket = _hour_bucket()
+    for job_id in job_ids:
+        impression_buffer.add((uuid.UUID(str(job_id)), bucket), 'list_views')
@@ -0,0 +1,73 @@
+"""
+Per-user job interaction flags ("saved" / "applied") for listing badges.
+
+Flags are cached per (user, job) under a per-user version number. Any
+change to a user's interactions bumps the version, which orphans all of
+that user's cached entries at once; they simply expire. A lookup fetches
+the cached entries for a page of jobs with one ``get_many`` and resolves
+the misses with a single query on the (user, job, status) unique index.
+"""
+from django.core.cache import cache  # type: ignore
+
+from realtimejobs import metrics
+from realtimejobs.models import JobInteraction
+
+INTERACTION_CACHE_TTL = 60 * 60  # seconds
+
+STATUSES = [status for status, _ in JobInteraction.STATUS_CHOICES]
+
+
+def _version_key(user_id):
+    return f"interactions:{user_id}:version"
+
+
+def _user_version(user_id):
+    return cache.get_or_set(_version_key(user_id), 1, timeout=None)
+
+
+def invalidate_user_interactions(user_id):
+    """Drop every cached interaction flag of a user."""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        pass  # Nothing cached for this user yet
+
+
+def interaction_flags(user_id, job_ids):
+    """
+    Return the user's interaction flags for the given jobs.
+
+    :param job_ids: Iterable of job UUIDs.
+    :return: Dict of job id (str) to {"saved": bool, "applied": bool}.
+    """
+    job_ids = list(dict.fromkeys(str(job_id) for job_id in job_ids))
+    if not job_ids:
+        return {}
+
+    version = _user_version(user_id)
+    keys = {job_id: f"interactions:{user_id}:{version}:{job_id}" for job_id in job_ids}
+    cached = cache.get_many(keys.values())
+
+    flags = {}
+    misses = []
+    for job_id, key in keys.items():
+        if key in cached:
+            flags[job_id] = cached[key]
+        else:
+            misses.append(job_id)
+
+    if misses:
+        loaded = {job_id: dict.fromkeys(STATUSES, False) for job_id in misses}
+        rows = JobInteraction.objects.filter(
+            user_id=user_id, job_id__in=misses).values_list('job_id', 'status')
+        for job_id, status in rows:
+            loaded[str(job_id)][status] = True
+
+        # Negative results are cached too: most jobs on a page have no interaction
+        cache.set_many({keys[job_id]: value for job_id, value in loaded.items()},
+                       timeout=INTERACTION_CACHE_TTL)
+        flags.update(loaded)
+
+    metrics.incr("interactions.flags.cache_hits", len(job_ids) - len(misses))
+    metrics.incr("interactions.flags.cache_misses", len(misses))
+    return flags
@@ -0,0 +1,139 @@
+"""
+Denormalized job listing rows.
+
+``JobListing`` holds one row per published job with everything a listing
+page shows, so ``/joblists/`` reads a single table instead of joining
+categories, job types and companies on every request. The rows are
+written in the same transaction as the change they reflect:
+
+* job saves, tag changes, publishing and closing re-sync the affected jobs;
+* renaming a category, job type or company rewrites its name column;
+* counter flushes and trending recomputations copy their new values over.
+
+``manage.py rebuild_job_listings`` rebuilds the table from scratch.
+"""
+from django.db import connection  # type: ignore
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Value, When  # type: ignore
+from django.utils.html import strip_tags  # type: ignore
+from django.utils.text import Truncator  # type: ignore
+
+from realtimejobs.models import Category, Company, JobListing, JobPost, JobType, TrendingJob
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 200
+
+# Copied from JobPost as-is
+JOB_FIELDS = ('title', 'slug', 'location', 'is_worldwide', 'category_id', 'job_type_id', 'company_id',
+              'salary', 'saves_count', 'applications_count', 'created_at')
+
+# Model whose name is denormalized -> (JobListing foreign key, name column)
+NAME_COLUMNS = {
+    Category: ('category', 'category_name'),
+    JobType: ('job_type', 'job_type_name'),
+    Company: ('company', 'company_name'),
+}
+
+UPDATE_FIELDS = [field.name for field in JobListing._meta.concrete_fields if not field.primary_key]
+
+
+def make_excerpt(text):
+    """Plain-text, whitespace-collapsed summary of at most EXCERPT_LENGTH characters."""
+    return Truncator(" ".join(strip_tags(text or "").split())).chars(EXCERPT_LENGTH)
+
+
+def _sync_batch(job_ids):
+    rows = list(JobPost.objects.filter(id__in=job_ids, status='published').values(
+        'id', 'short_description', 'category__name', 'job_type__name', 'company__name', *JOB_FIELDS))
+    published = [row['id'] for row in rows]
+
+    tags = {}
+    for job_id, name in JobPost.tags.through.objects.filter(jobpost_id__in=published).order_by(
+            'tag__name').values_list('jobpost_id', 'tag__name'):
+        tags.setdefault(job_id, []).append(name)
+    ranks = dict(TrendingJob.objects.filter(job_id__in=published).values_list('job_id', 'rank'))
+
+    JobListing.objects.filter(job_id__in=job_ids).exclude(job_id__in=published).delete()
+    if not rows:
+        return 0
+
+    # MySQL upserts on any unique key and takes no conflict target
+    target = {'unique_fields': ['job']} if connection.features.supports_update_conflicts_with_target else {}
+    JobListing.objects.bulk_create([
+        JobListing(
+            job_id=row['id'],
+            category_name=row['category__name'],
+            job_type_name=row['job_type__name'],
+            company_name=row['company__name'],
+            excerpt=make_excerpt(row['short_description']),
+            tags=tags.get(row['id'], []),
+            trending_rank=ranks.get(row['id']),
+            **{field: row[field] for field in JOB_FIELDS},
+        ) for row in rows
+    ], update_conflicts=True, update_fields=UPDATE_FIELDS, **target)
+    return len(rows)
+
+
+def sync_jobs(job_ids):
+    """
+    Bring the listing rows of the given jobs up to date: published jobs are
+    (re)written, any other job loses its row.
+
+    :return: Number of listing rows written.
+    """
+    job_ids = list(dict.fromkeys(job_ids))
+    return sum(_sync_batch(job_ids[start:start + BATCH_SIZE]) for start in range(0, len(job_ids), BATCH_SIZE))
+
+
+def copy_counters(job_ids):
+    """Copy saves_count/applications_count of the given jobs onto their listing rows."""
+    def counter(field):
+        return Subquery(JobPost.objects.filter(id=OuterRef('job_id')).values(field)[:1])
+
+    job_ids = list(job_ids)
+    for start in range(0, len(job_ids), BATCH_SIZE):
+        JobListing.objects.filter(job_id__in=job_ids[start:start + BATCH_SIZE]).update(
+            saves_count=counter('saves_count'), applications_count=counter('applications_count'))
+
+
+def rename(instance):
+    """Rewrite the denormalized name of a category, job type or company."""
+    field, column = NAME_COLUMNS[type(instance)]
+    return JobListing.objects.filter(**{field: instance.pk}).exclude(
+        **{column: instance.name}).update(**{column: instance.name})
+
+
+def set_trending_ranks(ranks):
+    """
+    Replace the trending ranks of all listings.
+
+    :param ranks: {job id: rank} of the new trending list.
+    """
+    JobListing.objects.exclude(trending_rank=None).update(trending_rank=None)
+    items = list(ranks.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        JobListing.objects.filter(job_id__in=[job_id for job_id, _ in batch]).update(trending_rank=Case(
+            *[When(job_id=job_id, then=Value(rank)) for job_id, rank in batch], output_field=IntegerField()))
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """
+    Rewrite the listing row of every published job and drop the rows of
+    jobs that are no longer published.
+
+    :return: (rows written, stale rows removed)
+    """
+    written = 0
+    last_id = None
+    while True:
+        jobs = JobPost.objects.filter(status='published').order_by('id')
+        if last_id is not None:
+            jobs = jobs.filter(id__gt=last_id)
+        job_ids = list(jobs.values_list('id', flat=True)[:batch_size])
+        if not job_ids:
+            break
+        last_id = job_ids[-1]
+        written += _sync_batch(job_ids)
+
+    removed, _ = JobListing.objects.exclude(job__status='published').delete()
+    return written, removed
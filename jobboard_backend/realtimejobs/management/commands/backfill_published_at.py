@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F  # type: ignore
+
+from realtimejobs.models import JobPost
+
+
+class Command(BaseCommand):
+    help = (
+        "Set JobPost.published_at to created_at for published jobs that have none "
+        "(jobs published before the column existed, or written outside the ORM). "
+        "Run build_feeds afterwards so the sitemaps pick them up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Report the jobs without updating them.")
+
+    def handle(self, *args, **options):
+        missing = JobPost.objects.filter(status='published', published_at=None)
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Would backfill {missing.count()} jobs."))
+            return
+
+        backfilled = 0
+        while True:
+            job_ids = list(missing.order_by('id').values_list('id', flat=True)[:options["batch_size"]])
+            if not job_ids:
+                break
+            backfilled += JobPost.objects.filter(id__in=job_ids).update(published_at=F('created_at'))
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled published_at of {backfilled} jobs."))
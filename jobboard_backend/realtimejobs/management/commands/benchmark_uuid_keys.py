@@ -0,0 +1,80 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction  # type: ignore
+
+from realtimejobs.fields import uuid7
+
+# name -> (column type, key generator)
+VARIANTS = {
+    'char32_uuid4': ('char(32)', lambda: uuid.uuid4().hex),
+    'char32_uuid7': ('char(32)', lambda: uuid7().hex),
+    'binary16_uuid4': ('binary(16)', lambda: uuid.uuid4().bytes),
+    'binary16_uuid7': ('binary(16)', lambda: uuid7().bytes),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare insert throughput and table/index size of char(32) vs binary(16) "
+        "UUID keys, random (v4) vs time-ordered (v7), on scratch tables shaped like "
+        "a job table (UUID primary key plus an indexed UUID foreign key)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--keep", action="store_true", help="Keep the scratch tables.")
+
+    def handle(self, *args, **options):
+        rows, batch_size = options["rows"], options["batch_size"]
+        results = []
+        for name, (column_type, new_key) in VARIANTS.items():
+            table = f"bench_uuid_{name}"
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(f"""
+                    CREATE TABLE {table} (
+                        id {column_type} NOT NULL PRIMARY KEY,
+                        company_id {column_type} NOT NULL,
+                        title varchar(255) NOT NULL,
+                        created_at datetime NOT NULL
+                    )
+                """)
+                cursor.execute(f"CREATE INDEX {table}_company ON {table} (company_id)")
+
+            companies = [new_key() for _ in range(1000)]
+            insert = f"INSERT INTO {table} (id, company_id, title, created_at) VALUES (%s, %s, %s, %s)"
+            started = time.monotonic()
+            for start in range(0, rows, batch_size):
+                batch = [(new_key(), companies[i % len(companies)], f"Job {i}", "2025-01-01 00:00:00")
+                         for i in range(start, min(start + batch_size, rows))]
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(insert, batch)
+            elapsed = time.monotonic() - started
+
+            results.append((name, rows / elapsed, *self._size(table)))
+            if not options["keep"]:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE {table}")
+
+        self.stdout.write(f"{'variant':<16} {'rows/s':>10} {'data MB':>9} {'index MB':>9}")
+        for name, rate, data, index in results:
+            self.stdout.write(f"{name:<16} {rate:>10.0f} {self._mb(data):>9} {self._mb(index):>9}")
+
+    def _size(self, table):
+        """(data bytes, secondary index bytes), or (None, None) outside MySQL."""
+        if connection.vendor != 'mysql':
+            return None, None
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+            cursor.execute(
+                "SELECT DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", [table])
+            return cursor.fetchone()
+
+    @staticmethod
+    def _mb(size):
+        return "n/a" if size is None else f"{size / 2 ** 20:.1f}"
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from realtimejobs import feeds
+
+
+class Command(BaseCommand):
+    help = "Regenerate all static sitemaps and RSS/Atom feeds under FEEDS_ROOT."
+
+    def handle(self, *args, **options):
+        shards, feed_count = feeds.build_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {shards} sitemap shards and {feed_count} feeds (RSS and Atom each)."))
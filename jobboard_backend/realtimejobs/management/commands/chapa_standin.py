@@ -0,0 +1,78 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Chapa API. Point CHAPA_BASE_URL at "
+        "http://<host>:<port>/v1 to use it. Transactions whose tx_ref starts "
+        "with 'fail' are reported as failed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds to wait before answering each request.")
+        parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="Fraction of requests answered with HTTP 503.")
+
+    def handle(self, *args, **options):
+        latency, error_rate = options["latency"], options["error_rate"]
+
+        class ChapaHandler(BaseHTTPRequestHandler):
+            def _reply(self, code, body):
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _simulate(self):
+                time.sleep(latency)
+                if random.random() < error_rate:
+                    self._reply(503, {"status": "failed", "message": "Service unavailable"})
+                    return False
+                return True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self._simulate():
+                    return
+                if self.path.rstrip("/") != "/v1/transaction/initialize":
+                    return self._reply(404, {"status": "failed", "message": "Not found"})
+                tx_ref = body.get("tx_ref", "")
+                self._reply(200, {
+                    "status": "success",
+                    "message": "Hosted Link",
+                    "data": {"checkout_url": f"http://{self.headers.get('Host')}/checkout/{tx_ref}"},
+                })
+
+            def do_GET(self):
+                if not self._simulate():
+                    return
+                prefix = "/v1/transaction/verify/"
+                if not self.path.startswith(prefix):
+                    return self._reply(404, {"status": "failed", "message": "Not found"})
+                tx_ref = self.path[len(prefix):].strip("/")
+                succeeded = not tx_ref.startswith("fail")
+                self._reply(200 if succeeded else 400, {
+                    "status": "success" if succeeded else "failed",
+                    "message": "Payment details",
+                    "data": {"tx_ref": tx_ref, "status": "success" if succeeded else "failed"},
+                })
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), ChapaHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Chapa stand-in listening on http://{options['host']}:{options['port']}/v1"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,78 @@
+from django.apps import apps  # type: ignore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection  # type: ignore
+
+from realtimejobs.fields import BinaryUUIDField
+
+
+def uuid_columns():
+    """(table, column, nullable) of every BinaryUUIDField and foreign key to one."""
+    columns = []
+    for model in apps.get_app_config('realtimejobs').get_models(include_auto_created=True):
+        for field in model._meta.local_fields:
+            target = field.target_field if field.is_relation else field
+            if isinstance(target, BinaryUUIDField):
+                columns.append((model._meta.db_table, field.column, field.null))
+    return columns
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the char(32) UUID columns (BinaryUUIDField keys and the foreign keys "
+        "to them) to binary(16) on MySQL. Run in a maintenance window, then set "
+        "BINARY_UUID_STORAGE=True. Already converted columns are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Print the SQL without running it.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError("Binary UUID storage only applies to MySQL.")
+
+        wanted = {(table, column): nullable for table, column, nullable in uuid_columns()}
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+            """)
+            pending = [key for table, column, data_type in cursor.fetchall()
+                       if (key := (table, column)) in wanted and data_type.lower() != 'binary']
+            cursor.execute("""
+                SELECT CONSTRAINT_NAME, TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+            """)
+            # MySQL refuses to change the type of a column in a foreign key, so
+            # every constraint touching a pending column is dropped and re-added
+            foreign_keys = [row for row in cursor.fetchall()
+                            if (row[1], row[2]) in pending or (row[3], row[4]) in pending]
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("All UUID columns are already binary(16)."))
+            return
+
+        plan = [f"ALTER TABLE `{table}` DROP FOREIGN KEY `{name}`;" for name, table, _, _, _ in foreign_keys]
+        for table, column in pending:
+            null = "NULL" if wanted[(table, column)] else "NOT NULL"
+            plan += [
+                f"ALTER TABLE `{table}` MODIFY `{column}` varbinary(32) {null};",
+                f"UPDATE `{table}` SET `{column}` = UNHEX(`{column}`) WHERE LENGTH(`{column}`) = 32;",
+                f"ALTER TABLE `{table}` MODIFY `{column}` binary(16) {null};",
+            ]
+        plan += [
+            f"ALTER TABLE `{table}` ADD CONSTRAINT `{name}` FOREIGN KEY (`{column}`) "
+            f"REFERENCES `{ref_table}` (`{ref_column}`);"
+            for name, table, column, ref_table, ref_column in foreign_keys
+        ]
+
+        if options["dry_run"]:
+            self.stdout.write("\n".join(plan))
+            return
+
+        with connection.cursor() as cursor:
+            for statement in plan:
+                self.stdout.write(statement)
+                cursor.execute(statement)
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted {len(pending)} columns. Set BINARY_UUID_STORAGE=True and restart."))
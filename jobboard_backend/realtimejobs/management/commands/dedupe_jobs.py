@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction  # type: ignore
+from django.db.models import Case, Count, IntegerField, Q, Value, When  # type: ignore
+
+from realtimejobs import listings
+from realtimejobs.canonical import job_url_hash
+from realtimejobs.fields import BinaryUUIDField
+from realtimejobs.models import JobInteraction, JobPost, Payment
+from realtimejobs.signals import jobs_closed
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill JobPost.job_url_hash and merge job posts that share a canonical "
+        "job URL into one: the published (else the oldest) post is kept, and the "
+        "duplicates' interactions, payments and tags are moved onto it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Report duplicates without merging.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # Pass 1: canonical hash of every job, grouped
+        groups = defaultdict(list)
+        stale = {}
+        last_id = None
+        while True:
+            jobs = JobPost.objects.order_by('id')
+            if last_id is not None:
+                jobs = jobs.filter(id__gt=last_id)
+            batch = list(jobs.values_list('id', 'job_url', 'job_url_hash', 'status', 'created_at')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            for job_id, url, stored_hash, job_status, created_at in batch:
+                url_hash = job_url_hash(url)
+                groups[url_hash].append((job_status != 'published', created_at, job_id))
+                if stored_hash != url_hash:
+                    stale[job_id] = url_hash
+
+        merges = {}  # duplicate id -> kept id
+        for members in groups.values():
+            if len(members) > 1:
+                keeper, *duplicates = sorted(members)
+                merges.update((job_id, keeper[2]) for _, _, job_id in duplicates)
+
+        kept = len(set(merges.values()))
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Would merge {len(merges)} duplicates into {kept} jobs and backfill "
+                f"{len(set(stale) - set(merges))} hashes."))
+            return
+
+        # Pass 2: merge duplicates batch by batch
+        duplicate_ids = list(merges)
+        for start in range(0, len(duplicate_ids), batch_size):
+            self._merge({job_id: merges[job_id] for job_id in duplicate_ids[start:start + batch_size]})
+
+        # Pass 3: store the hashes of the remaining jobs
+        backfill = [JobPost(id=job_id, job_url_hash=url_hash)
+                    for job_id, url_hash in stale.items() if job_id not in merges]
+        JobPost.objects.bulk_update(backfill, ['job_url_hash'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {len(merges)} duplicates into {kept} jobs, backfilled {len(backfill)} hashes."))
+
+    def _merge(self, merges):
+        """Fold each duplicate (key) into its kept job (value), then delete the duplicates."""
+        def keeper_of(field):
+            # Value() alone binds the UUID as hex, not as the binary column value
+            return Case(*[When(**{field: dup}, then=Value(keeper, output_field=BinaryUUIDField()))
+                          for dup, keeper in merges.items()], output_field=BinaryUUIDField())
+
+        keepers = set(merges.values())
+        with transaction.atomic():
+            # Interactions: move those the kept job doesn't already have for that user
+            taken = set(JobInteraction.objects.filter(job_id__in=keepers).values_list(
+                'job_id', 'user_id', 'status'))
+            moved = []
+            for interaction_id, job_id, user_id, interaction_status in JobInteraction.objects.filter(
+                    job_id__in=list(merges)).values_list('id', 'job_id', 'user_id', 'status'):
+                key = (merges[job_id], user_id, interaction_status)
+                if key not in taken:
+                    taken.add(key)
+                    moved.append(interaction_id)
+            if moved:
+                JobInteraction.objects.filter(id__in=moved).update(job_id=keeper_of('job_id'))
+
+            Payment.objects.filter(job_post_id__in=list(merges)).update(job_post_id=keeper_of('job_post_id'))
+
+            through = JobPost.tags.through
+            has_tag = set(through.objects.filter(jobpost_id__in=keepers).values_list('jobpost_id', 'tag_id'))
+            new_tags = {(merges[job_id], tag_id) for job_id, tag_id in through.objects.filter(
+                jobpost_id__in=list(merges)).values_list('jobpost_id', 'tag_id')} - has_tag
+            through.objects.bulk_create([through(jobpost_id=job_id, tag_id=tag_id) for job_id, tag_id in new_tags])
+
+            # Exact counters for the kept jobs, now that interactions moved
+            counts = {job_id: (0, 0) for job_id in keepers}
+            for row in JobInteraction.objects.filter(job_id__in=keepers).values('job_id').annotate(
+                    saves=Count('id', filter=Q(status='saved')),
+                    applications=Count('id', filter=Q(status='applied'))):
+                counts[row['job_id']] = (row['saves'], row['applications'])
+            JobPost.objects.filter(id__in=keepers).update(
+                saves_count=Case(*[When(id=job_id, then=Value(saves)) for job_id, (saves, _) in counts.items()],
+                                 output_field=IntegerField()),
+                applications_count=Case(*[When(id=job_id, then=Value(applications))
+                                          for job_id, (_, applications) in counts.items()],
+                                        output_field=IntegerField()),
+            )
+            listings.sync_jobs(keepers)
+
+            published = list(JobPost.objects.filter(id__in=list(merges), status='published'))
+            JobPost.objects.filter(id__in=list(merges)).delete()
+            if published:
+                jobs_closed.send(sender=JobPost, jobs=published)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from realtimejobs.importers import FORMATS, ImportFormatError, JobImporter, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import published job posts from a CSV or JSONL partner feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Feed file to import.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--draft", action="store_true", help="Import as drafts instead of published.")
+        parser.add_argument("--no-notify", action="store_true",
+                            help="Skip instant alerts and recommendation refreshes for the imported jobs.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or path.rsplit(".", 1)[-1].lower()
+        importer = JobImporter(publish=not options["draft"], notify=not options["no_notify"],
+                               chunk_size=options["chunk_size"])
+
+        started = time.monotonic()
+        try:
+            with open(path, "rb") as feed:
+                summary = importer.run(iter_rows(feed, fmt))
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        for error in summary["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if summary["errors_truncated"]:
+            self.stderr.write(f"... {summary['failed'] - len(summary['errors'])} more errors not shown")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} jobs in {elapsed:.1f}s, skipped {summary['duplicates']} duplicates, "
+            f"{summary['failed']} rows failed."))
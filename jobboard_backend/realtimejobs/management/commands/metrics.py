@@ -0,0 +1,27 @@
+import json
+from django.core.management.base import BaseCommand
+from realtimejobs import metrics
+
+
+class Command(BaseCommand):
+    help = "Show the collected task and application metrics."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="", help="Only show metrics whose name starts with this prefix.")
+        parser.add_argument("--prometheus", action="store_true", help="Print the Prometheus text format instead of JSON.")
+        parser.add_argument("--reset", action="store_true", help="Clear all metrics after printing them.")
+
+    def handle(self, *args, **options):
+        data = {
+            name: metric for name, metric in metrics.snapshot().items()
+            if name.startswith(options["prefix"])
+        }
+
+        if options["prometheus"]:
+            self.stdout.write(metrics.render_prometheus(data))
+        else:
+            self.stdout.write(json.dumps(data, indent=2, default=str))
+
+        if options["reset"]:
+            metrics.reset()
+            self.stdout.write(self.style.SUCCESS("Metrics reset."))
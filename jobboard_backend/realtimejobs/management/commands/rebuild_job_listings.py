@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from realtimejobs import listings
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the denormalized JobListing table from the published job posts. "
+        "Run once after deploying it, and whenever rows were written outside the ORM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=listings.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        written, removed = listings.rebuild(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} listings, removed {removed} stale ones."))
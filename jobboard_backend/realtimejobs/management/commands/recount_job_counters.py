@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction  # type: ignore
+from django.db.models import Case, Count, IntegerField, Q, Value, When  # type: ignore
+from realtimejobs import listings
+from realtimejobs.models import JobInteraction, JobPost
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute JobPost.saves_count and applications_count exactly from "
+        "JobInteraction, fixing any drift left by the buffered increments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing it.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = None
+        checked = fixed = 0
+
+        while True:
+            jobs = JobPost.objects.order_by('id')
+            if last_id is not None:
+                jobs = jobs.filter(id__gt=last_id)
+            current = {
+                job_id: (saves, applications)
+                for job_id, saves, applications in jobs.values_list(
+                    'id', 'saves_count', 'applications_count')[:batch_size]
+            }
+            if not current:
+                break
+            last_id = max(current)
+
+            exact = dict.fromkeys(current, (0, 0))
+            counts = JobInteraction.objects.filter(job_id__in=list(current)).values('job_id').annotate(
+                saves=Count('id', filter=Q(status='saved')),
+                applications=Count('id', filter=Q(status='applied')),
+            )
+            for row in counts:
+                exact[row['job_id']] = (row['saves'], row['applications'])
+
+            drifted = {job_id: value for job_id, value in exact.items() if current[job_id] != value}
+            checked += len(current)
+            fixed += len(drifted)
+            if drifted and not options["dry_run"]:
+                with transaction.atomic():
+                    JobPost.objects.filter(id__in=list(drifted)).update(
+                        saves_count=Case(
+                            *[When(id=job_id, then=Value(saves)) for job_id, (saves, _) in drifted.items()],
+                            output_field=IntegerField()),
+                        applications_count=Case(
+                            *[When(id=job_id, then=Value(applications))
+                              for job_id, (_, applications) in drifted.items()],
+                            output_field=IntegerField()),
+                    )
+                    listings.copy_counters(drifted)
+
+        verb = "would fix" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} jobs, {verb} {fixed}."))
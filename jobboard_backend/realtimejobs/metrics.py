@@ -0,0 +1,256 @@
+"""
+Lightweight metrics registry backed by the shared Django cache.
+
+Counters and timing histograms are stored in the cache so that web
+processes and Celery workers all report into the same place.
+
+Celery tasks are instrumented through the Celery signals below: every task
+reports its queue wait, run duration and outcome without any code in the
+task itself. Tasks add their own counters and per-stage timings with
+``incr`` and ``stage``.
+"""
+import contextlib
+import time
+
+from celery.signals import (  # type: ignore
+    before_task_publish, task_failure, task_postrun, task_prerun, task_retry)
+from django.core.cache import cache  # type: ignore
+
+METRICS_PREFIX = "metrics"
+# Number of index slots in use; slot N holds the name of the Nth registered metric
+METRICS_INDEX_KEY = f"{METRICS_PREFIX}:index"
+
+# Bumped by reset(); processes re-register their names when it changes
+METRICS_GENERATION_KEY = f"{METRICS_PREFIX}:generation"
+GENERATION_CHECK_INTERVAL = 5.0  # seconds between generation checks per process
+
+# Upper bounds (in seconds) of the timing histogram buckets
+TIMING_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Metric names this process has already added to the shared index
+_registered = set()
+_generation = None
+_generation_checked_at = 0.0
+
+
+def _key(name, suffix):
+    return f"{METRICS_PREFIX}:{name}:{suffix}"
+
+
+def _incr(key, delta=1):
+    """Atomically increment a cache key, creating it when missing."""
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout=None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def _slot_key(number):
+    return f"{METRICS_INDEX_KEY}:{number}"
+
+
+def _kind_key(name):
+    return f"{METRICS_PREFIX}:kind:{name}"
+
+
+def _register(name, kind):
+    """
+    Record a metric name in the shared index so snapshots can find it.
+
+    The name is claimed with an atomic ``cache.add`` and written to its own
+    slot, so processes registering different names at once never overwrite
+    each other's entries.
+    """
+    _check_generation()
+    if name in _registered:
+        return
+    if cache.add(_kind_key(name), kind, timeout=None):
+        cache.set(_slot_key(_incr(METRICS_INDEX_KEY)), name, timeout=None)
+    _registered.add(name)
+
+
+def _check_generation():
+    """Forget this process's registrations once another process ran reset()."""
+    global _generation, _generation_checked_at
+    now = time.monotonic()
+    if now - _generation_checked_at < GENERATION_CHECK_INTERVAL:
+        return
+    _generation_checked_at = now
+    generation = cache.get(METRICS_GENERATION_KEY, 0)
+    if generation != _generation:
+        _generation = generation
+        _registered.clear()
+
+
+def _index():
+    """{name: kind} of every registered metric."""
+    count = cache.get(METRICS_INDEX_KEY) or 0
+    names = cache.get_many([_slot_key(number) for number in range(1, count + 1)]).values()
+    kinds = cache.get_many([_kind_key(name) for name in names])
+    return {name: kinds[_kind_key(name)] for name in names if _kind_key(name) in kinds}
+
+
+def incr(name, value=1):
+    """Increment the counter ``name`` by ``value``."""
+    _register(name, "counter")
+    _incr(_key(name, "total"), value)
+
+
+def gauge(name, value):
+    """Set the gauge ``name`` to ``value``."""
+    _register(name, "gauge")
+    cache.set(_key(name, "value"), value, timeout=None)
+
+
+def observe(name, seconds):
+    """Record one timing observation (in seconds) for the histogram ``name``."""
+    _register(name, "timing")
+    _incr(_key(name, "count"))
+    _incr(_key(name, "sum_us"), int(seconds * 1_000_000))
+    bucket = next((str(b) for b in TIMING_BUCKETS if seconds <= b), "inf")
+    _incr(_key(name, f"bucket:{bucket}"))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the enclosed block and record it as the histogram ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def snapshot():
+    """Return the current value of every known metric as a dictionary."""
+    index = _index()
+    keys = []
+    for name, kind in index.items():
+        if kind == "counter":
+            keys.append(_key(name, "total"))
+        elif kind == "gauge":
+            keys.append(_key(name, "value"))
+        else:
+            keys += [_key(name, "count"), _key(name, "sum_us")]
+            keys += [_key(name, f"bucket:{b}") for b in TIMING_BUCKETS + ("inf",)]
+    values = cache.get_many(keys)
+
+    result = {}
+    for name, kind in sorted(index.items()):
+        if kind == "counter":
+            result[name] = {"type": kind, "total": values.get(_key(name, "total"), 0)}
+            continue
+        if kind == "gauge":
+            result[name] = {"type": kind, "value": values.get(_key(name, "value"))}
+            continue
+
+        count = values.get(_key(name, "count"), 0)
+        total = values.get(_key(name, "sum_us"), 0) / 1_000_000
+        buckets, running = {}, 0
+        for bound in TIMING_BUCKETS + ("inf",):
+            running += values.get(_key(name, f"bucket:{bound}"), 0)
+            buckets[str(bound)] = running  # cumulative, Prometheus style
+        result[name] = {
+            "type": kind,
+            "count": count,
+            "sum": total,
+            "avg": total / count if count else 0.0,
+            "buckets": buckets,
+        }
+    return result
+
+
+def render_prometheus(data=None):
+    """Render a snapshot in the Prometheus text exposition format."""
+    data = snapshot() if data is None else data
+    lines = []
+    for name, metric in data.items():
+        prom_name = name.replace(".", "_").replace("-", "_")
+        if metric["type"] == "counter":
+            lines.append(f"# TYPE {prom_name}_total counter")
+            lines.append(f"{prom_name}_total {metric['total']}")
+            continue
+        if metric["type"] == "gauge":
+            lines.append(f"# TYPE {prom_name} gauge")
+            lines.append(f"{prom_name} {metric['value'] or 0}")
+            continue
+        lines.append(f"# TYPE {prom_name} histogram")
+        for bound, value in metric["buckets"].items():
+            le = "+Inf" if bound == "inf" else bound
+            lines.append(f'{prom_name}_bucket{{le="{le}"}} {value}')
+        lines.append(f"{prom_name}_sum {metric['sum']}")
+        lines.append(f"{prom_name}_count {metric['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """
+    Drop every recorded metric. Other processes notice the new generation
+    within GENERATION_CHECK_INTERVAL and register their metrics again.
+    """
+    count = cache.get(METRICS_INDEX_KEY) or 0
+    keys = [METRICS_INDEX_KEY] + [_slot_key(number) for number in range(1, count + 1)]
+    for name in _index():
+        keys.append(_kind_key(name))
+        keys += [_key(name, suffix) for suffix in ("total", "value", "count", "sum_us")]
+        keys += [_key(name, f"bucket:{b}") for b in TIMING_BUCKETS + ("inf",)]
+    cache.delete_many(keys)
+    _incr(METRICS_GENERATION_KEY)
+    _registered.clear()
+
+
+# **************** CELERY INSTRUMENTATION ************************
+
+# Header stamped on every task message when it is published
+PUBLISHED_AT_HEADER = "published_at"
+
+# Start times of the tasks running in this worker process, by task id
+_task_started = {}
+
+
+def _task_metric(task_name, suffix):
+    return f"celery.{task_name.rsplit('.', 1)[-1]}.{suffix}"
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Record the publish time so the worker can measure queue wait."""
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    """Record the queue wait of a task that is about to run."""
+    _task_started[task_id] = time.perf_counter()
+
+    request = task.request
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        published_at = (getattr(request, "headers", None) or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        observe(_task_metric(task.name, "queue_wait_seconds"), max(0.0, time.time() - published_at))
+    incr(_task_metric(task.name, "started"))
+
+
+@task_postrun.connect
+def record_task_finish(task_id=None, task=None, state=None, **kwargs):
+    """Record the run duration and final state of a finished task."""
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        observe(_task_metric(task.name, "duration_seconds"), time.perf_counter() - started)
+    incr(_task_metric(task.name, (state or "unknown").lower()))
+
+
+@task_failure.connect
+def record_task_failure(sender=None, **kwargs):
+    """Count task failures across all tasks, next to the per-task state counter."""
+    incr("celery.failures")
+
+
+@task_retry.connect
+def record_task_retry(**kwargs):
+    """Count task retries."""
+    incr("celery.retries")
@@ -0,0 +1,124 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets
+the stored response of the first attempt instead of running the handler
+again. Responses are kept in the shared cache for IDEMPOTENCY_KEY_TTL,
+together with a fingerprint of the request body: reusing a key for a
+different body is rejected with 422. A short cache lock serializes
+concurrent duplicates; a duplicate that arrives while the first request is
+still running waits briefly for its result and otherwise gets 409.
+
+Keys are scoped to the authenticated user (resolved with the API's own
+authentication classes) and the request path, so two users cannot collide
+on the same key while a client that refreshes its token between retries
+still hits its first attempt. Anonymous callers share one scope per path. Multipart uploads are not
+covered, since fingerprinting them would mean buffering the whole upload.
+"""
+import hashlib
+import time
+
+from django.conf import settings  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.http import HttpResponse, JsonResponse  # type: ignore
+from rest_framework.exceptions import AuthenticationFailed  # type: ignore
+from rest_framework.request import Request  # type: ignore
+from rest_framework.settings import api_settings  # type: ignore
+
+from realtimejobs import metrics
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Responses that depend on timing rather than the request, never replayed
+UNSTORED_STATUS_CODES = {409, 429}
+
+
+class IdempotencyMiddleware:
+    """Replays stored responses for retried POST requests."""
+
+    lock_timeout = 30  # seconds; bounds how long a crashed request holds the key
+    wait_timeout = 5  # seconds a concurrent duplicate waits for the result
+    poll_interval = 0.1
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if (request.method != 'POST' or not key
+                or request.content_type == 'multipart/form-data'):
+            return self.get_response(request)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({"error": "Idempotency-Key is too long"}, status=400)
+
+        try:
+            caller = self._caller(request)
+        except AuthenticationFailed:
+            # The view rejects the request anyway; nothing to deduplicate
+            return self.get_response(request)
+
+        scope = hashlib.sha256("\n".join([caller, request.path, key]).encode()).hexdigest()
+        cache_key = f"idempotency:{scope}"
+        lock_key = f"idempotency-lock:{scope}"
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return self._replay(stored, fingerprint)
+
+        if not cache.add(lock_key, 1, timeout=self.lock_timeout):
+            # Another request with this key is in flight; wait for its result
+            deadline = time.monotonic() + self.wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                stored = cache.get(cache_key)
+                if stored is not None:
+                    return self._replay(stored, fingerprint)
+            metrics.incr("idempotency.conflicts")
+            return JsonResponse(
+                {"error": "A request with this Idempotency-Key is still being processed"},
+                status=409)
+
+        try:
+            response = self.get_response(request)
+            if (not response.streaming and response.status_code < 500
+                    and response.status_code not in UNSTORED_STATUS_CODES):
+                cache.set(cache_key, {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "content": response.content,
+                    "content_type": response.get('Content-Type'),
+                    "location": response.get('Location'),
+                }, timeout=settings.IDEMPOTENCY_KEY_TTL)
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    def _caller(request):
+        """Id of the authenticated user, or '' for anonymous requests."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return str(user.pk)
+        drf_request = Request(request)
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            result = authentication_class().authenticate(drf_request)
+            if result is not None:
+                return str(result[0].pk)
+        return ''
+
+    def _replay(self, stored, fingerprint):
+        if stored["fingerprint"] != fingerprint:
+            return JsonResponse(
+                {"error": "Idempotency-Key was already used with a different request body"},
+                status=422)
+
+        metrics.incr("idempotency.replayed")
+        response = HttpResponse(stored["content"], status=stored["status"],
+                                content_type=stored["content_type"])
+        if stored["location"]:
+            response['Location'] = stored["location"]
+        response['Idempotent-Replayed'] = 'true'
+        return response
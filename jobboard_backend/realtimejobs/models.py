@@ -1,10 +1,13 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin  # type: ignore
+from django.core.serializers.json import DjangoJSONEncoder  # type: ignore
 from django.db import models  # type: ignore
 from django.utils.text import slugify  # type: ignore
-from django.core.validators import MaxLengthValidator  # type: ignore
+from django.utils import timezone  # type: ignore
+from django.core.validators import MaxLengthValidator, MaxValueValidator  # type: ignore
 from django_ckeditor_5.fields import CKEditor5Field  # type: ignore
+from realtimejobs.canonical import job_url_hash
+from realtimejobs.fields import BinaryUUIDField, uuid7
 
-import uuid
 
 # =============================================================================
 # Custom User Manager
@@ -123,7 +126,7 @@ class Company(models.Model):
     """
     Stores company details for job postings.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+    id = BinaryUUIDField(primary_key=True, default=uuid7,
                           editable=False)  # Unique identifier for merging databases
     name = models.CharField(
         max_length=255,
@@ -168,9 +171,9 @@ class Tag(models.Model):
     """
     Tags to categorize job posts (e.g., Python, Remote, Entry-level).
     """
-    id = models.UUIDField(
+    id = BinaryUUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False  # Unique identifier for scalability
     )
     name = models.CharField(
@@ -207,7 +210,7 @@ class Category(models.Model):
     """
     Stores job categories.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, unique=True, db_index=True)
     slug = models.SlugField(unique=True, db_index=True)
 
@@ -233,7 +236,7 @@ class JobType(models.Model):
     """
     Represents a type of job (e.g., Full-time, Part-time, Contract).
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BinaryUUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, unique=True, db_index=True)
 
     def __str__(self):
@@ -256,18 +259,25 @@ class JobPost(models.Model):
         ('closed', 'Closed'),
     ]
 
-    id = models.UUIDField(
+    id = BinaryUUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False  # Unique & secure identifier for the job post
     )
     job_url = models.CharField(
         max_length=2083,
         null=False,
         blank=False,
-        db_index=True,
         help_text="Direct URL to the job post."
     )
+    job_url_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        editable=False,
+        help_text="SHA-256 of the canonical job URL; one job post per posting "
+                  "(see realtimejobs.canonical)."
+    )
     title = models.CharField(
         max_length=255,
         null=False,
@@ -350,13 +360,44 @@ class JobPost(models.Model):
         default='draft',
         help_text="Current status of the job post."
     )
+    published_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Timestamp when the job post went live."
+    )
+    saves_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of users who saved this job (buffered, see realtimejobs.counters)."
+    )
+    applications_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of users who applied to this job (buffered, see realtimejobs.counters)."
+    )
+
+    class Meta:
+        indexes = [
+            # Expiry scans published jobs by age, archival scans closed ones
+            models.Index(fields=['status', 'published_at'], name='jobpost_status_published'),
+            models.Index(fields=['status', 'updated_at'], name='jobpost_status_updated'),
+        ]
 
     def save(self, *args, **kwargs):
         """
-        Auto-generate slug from title if not provided.
+        Auto-generate slug from title if not provided, keep the canonical
+        job URL hash in sync with job_url, and stamp published_at the first
+        time the job is saved as published.
         """
         if not self.slug:
             self.slug = slugify(self.title)
+        self.job_url_hash = job_url_hash(self.job_url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'job_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'job_url_hash'}
+        if self.status == 'published' and self.published_at is None:
+            self.published_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'published_at'}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -378,9 +419,9 @@ class JobInteraction(models.Model):
         ('applied', 'Applied')
     ]
 
-    id = models.UUIDField(
+    id = BinaryUUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
         db_column="id"
     )  # Unique identifier for each interaction
@@ -419,6 +460,9 @@ class JobInteraction(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['user', 'job']),
             models.Index(fields=['job', 'status']),
+            # Serves the newest-first saved/applied lists page by page
+            models.Index(fields=['user', 'status', 'timestamp'],
+                         name='interaction_user_status_ts'),
         ]
 
     def __str__(self):
@@ -435,9 +479,18 @@ class JobAlert(models.Model):
     """
     Stores job alerts set by users for specific categories and job types.
     """
-    id = models.UUIDField(
+    FREQUENCY_INSTANT = 'instant'
+    FREQUENCY_DAILY = 'daily'
+    FREQUENCY_WEEKLY = 'weekly'
+    FREQUENCY_CHOICES = [
+        (FREQUENCY_INSTANT, 'Instant'),
+        (FREQUENCY_DAILY, 'Daily'),
+        (FREQUENCY_WEEKLY, 'Weekly'),
+    ]
+
+    id = BinaryUUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False
     )  # Unique identifier for the alert
 
@@ -473,6 +526,34 @@ class JobAlert(models.Model):
         db_index=True,
         help_text="Preferred job location for the alert."
     )
+    frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCY_CHOICES,
+        default=FREQUENCY_DAILY,
+        db_index=True,
+        help_text="How often matching jobs are emailed to the user."
+    )
+    send_hour = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MaxValueValidator(23)],
+        help_text="Preferred local hour (0-23) for digests (NULL lets the scheduler pick)."
+    )
+    timezone = models.CharField(
+        max_length=64,
+        default='UTC',
+        help_text="IANA time zone used to interpret the preferred send hour."
+    )
+    next_send_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the next digest is due (NULL for instant alerts)."
+    )
+    last_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the last digest was sent."
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         db_index=True,
@@ -487,8 +568,21 @@ class JobAlert(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['location']),
+            models.Index(fields=['is_active', 'next_send_at']),  # Due-alert scans
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Schedule the next digest slot if it is not set yet.
+        """
+        from realtimejobs.scheduling import compute_next_send_at
+
+        if self.frequency == self.FREQUENCY_INSTANT:
+            self.next_send_at = None
+        elif self.next_send_at is None:
+            self.next_send_at = compute_next_send_at(self)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         """
         Returns a string representation of the job alert.
@@ -497,6 +591,62 @@ class JobAlert(models.Model):
         return f"Job Alert for {self.user.email} ({status})"
 
 
+# =============================================================================
+# JobAlertIndex Model
+# =============================================================================
+class JobAlertIndex(models.Model):
+    """
+    Reverse index of active job alerts keyed by category, job type and location.
+
+    Every alert is expanded into one row per (category, job type) pair, so a
+    newly published job can be matched against all alerts with one indexed
+    lookup. NULL in a key column means the alert accepts any value.
+    """
+    alert = models.ForeignKey(
+        JobAlert,
+        on_delete=models.CASCADE,
+        related_name="index_entries",
+        help_text="The job alert this index entry belongs to."
+    )
+    frequency = models.CharField(
+        max_length=10,
+        choices=JobAlert.FREQUENCY_CHOICES,
+        help_text="Copy of the alert frequency, so matching needs no join."
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Category accepted by the alert (NULL for any)."
+    )
+    job_type = models.ForeignKey(
+        JobType,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Job type accepted by the alert (NULL for any)."
+    )
+    location = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Normalized location accepted by the alert (NULL for any)."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['frequency', 'category', 'job_type']),
+            models.Index(fields=['location']),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the index entry.
+        """
+        return f"{self.alert_id} ({self.category_id}, {self.job_type_id}, {self.location})"
+
+
 # =============================================================================
 # Payment Model
 # =============================================================================
@@ -509,6 +659,11 @@ class Payment(models.Model):
         ('success', 'Success'),
         ('declined', 'Declined'),
     ]
+    INIT_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
 
     job_post = models.ForeignKey(
         JobPost,
@@ -541,6 +696,31 @@ class Payment(models.Model):
         default='pending',
         help_text="Current status of the payment."
     )
+    idempotency_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Client supplied key that makes job post submission retry-safe."
+    )
+    init_status = models.CharField(
+        max_length=10,
+        choices=INIT_STATUS_CHOICES,
+        default='queued',
+        help_text="Progress of the background payment initialization."
+    )
+    checkout_url = models.CharField(
+        max_length=2083,
+        null=True,
+        blank=True,
+        help_text="Gateway checkout page, available once initialization succeeds."
+    )
+    init_error = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text="Reason the payment initialization failed, if it did."
+    )
     timestamp = models.DateTimeField(
         auto_now_add=True,
         db_index=True,
@@ -552,3 +732,457 @@ class Payment(models.Model):
         Returns a string representation of the payment.
         """
         return f"Payment for {self.job_post.title} - {self.payment_status}"
+
+
+# =============================================================================
+# EmailOutbox Model
+# =============================================================================
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox of emails waiting to be delivered.
+
+    Rows are written in the same transaction as the change that triggers
+    the email and delivered later by the dispatch_email_outbox task.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    dedup_key = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="Identifies the notification, so it is only ever queued once."
+    )
+    subject = models.CharField(
+        max_length=255,
+        help_text="Email subject line."
+    )
+    body = models.TextField(
+        help_text="Plain text email body."
+    )
+    from_email = models.CharField(
+        max_length=255,
+        help_text="Sender address."
+    )
+    recipient = models.EmailField(
+        help_text="Recipient address."
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text="Delivery status of the email."
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of failed delivery attempts."
+    )
+    last_error = models.TextField(
+        blank=True,
+        default='',
+        help_text="Error raised by the last failed delivery attempt."
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the next delivery attempt may happen."
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Timestamp when the email was queued."
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Timestamp when the email was delivered."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at']),  # Dispatcher scans
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the outbox email.
+        """
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+# =============================================================================
+# JobImpression Model
+# =============================================================================
+class JobImpression(models.Model):
+    """
+    Hourly rollup of how often a job post was seen.
+
+    Rows are written in bulk upserts from the in-process impression buffer
+    (see realtimejobs.impressions), never once per view.
+    """
+    job = models.ForeignKey(
+        JobPost,
+        on_delete=models.CASCADE,
+        related_name="impressions",
+        help_text="The job post that was seen."
+    )
+    bucket = models.DateTimeField(
+        db_index=True,
+        help_text="Start of the hour (UTC) these counts cover."
+    )
+    detail_views = models.PositiveIntegerField(
+        default=0,
+        help_text="Times the job's detail page was opened."
+    )
+    list_views = models.PositiveIntegerField(
+        default=0,
+        help_text="Times the job appeared in a listing."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job', 'bucket'], name='unique_job_impression_bucket'
+            )
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the impression rollup.
+        """
+        return f"{self.job_id} @ {self.bucket:%Y-%m-%d %H:00}: {self.detail_views}/{self.list_views}"
+
+
+# =============================================================================
+# TrendingJob Model
+# =============================================================================
+class TrendingJob(models.Model):
+    """
+    Precomputed trending ranking of published jobs.
+
+    Rebuilt periodically by the ``compute_trending_jobs`` task from
+    time-decayed interactions and impressions (see realtimejobs.trending).
+    """
+    job = models.OneToOneField(
+        JobPost,
+        on_delete=models.CASCADE,
+        related_name="trending",
+        help_text="The trending job post."
+    )
+    score = models.FloatField(
+        help_text="Time-decayed popularity score."
+    )
+    rank = models.PositiveIntegerField(
+        db_index=True,
+        help_text="Position in the trending list, starting at 1."
+    )
+    computed_at = models.DateTimeField(
+        help_text="When the ranking this row belongs to was computed."
+    )
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        """
+        Returns a string representation of the trending entry.
+        """
+        return f"#{self.rank} {self.job_id} ({self.score:.2f})"
+
+
+# =============================================================================
+# SimilarJob Model
+# =============================================================================
+class SimilarJob(models.Model):
+    """
+    Precomputed nearest neighbours of a published job post.
+
+    Maintained by realtimejobs.recommendations; serving the "similar jobs"
+    of a job is a single lookup on (job, rank).
+    """
+    job = models.ForeignKey(
+        JobPost,
+        on_delete=models.CASCADE,
+        related_name="similar_entries",
+        help_text="The job the recommendation is shown on."
+    )
+    similar = models.ForeignKey(
+        JobPost,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="The recommended job."
+    )
+    score = models.FloatField(
+        help_text="Cosine similarity between the two jobs' feature vectors."
+    )
+    rank = models.PositiveSmallIntegerField(
+        help_text="Position among the job's neighbours, starting at 1."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job', 'rank'], name='unique_similar_job_rank'
+            )
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the recommendation.
+        """
+        return f"{self.job_id} -> {self.similar_id} ({self.score:.2f})"
+
+
+# =============================================================================
+# JobListing Model
+# =============================================================================
+class JobListing(models.Model):
+    """
+    Denormalized read model of a published job post, one row per job.
+
+    Holds everything a job listing shows (category, job type and company
+    names, tag names, counters, excerpt, trending rank) so listing pages
+    read a single table. Kept in sync on every write to the job and the
+    rows it names (see realtimejobs.listings).
+    """
+    job = models.OneToOneField(
+        JobPost,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="listing",
+        help_text="The published job post."
+    )
+    title = models.CharField(
+        max_length=255,
+        help_text="Job title."
+    )
+    slug = models.SlugField(
+        max_length=255,
+        help_text="SEO-friendly identifier for the job."
+    )
+    location = models.CharField(
+        max_length=255,
+        null=True,
+        help_text="Job location (or NULL if worldwide)."
+    )
+    is_worldwide = models.BooleanField(
+        default=False,
+        help_text="True if the job is remote."
+    )
+    category = models.ForeignKey(
+        'Category',
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="Category of the job post (filtering only, never joined)."
+    )
+    category_name = models.CharField(
+        max_length=100,
+        help_text="Name of the category."
+    )
+    job_type = models.ForeignKey(
+        'JobType',
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="Type of job (filtering only, never joined)."
+    )
+    job_type_name = models.CharField(
+        max_length=100,
+        help_text="Name of the job type."
+    )
+    company = models.ForeignKey(
+        'Company',
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="Company offering the job (filtering only, never joined)."
+    )
+    company_name = models.CharField(
+        max_length=255,
+        help_text="Name of the company."
+    )
+    salary = models.CharField(
+        max_length=100,
+        null=True,
+        help_text="Salary range."
+    )
+    excerpt = models.CharField(
+        max_length=200,
+        help_text="Plain-text summary shown in listings."
+    )
+    tags = models.JSONField(
+        default=list,
+        help_text="Names of the job's tags, sorted."
+    )
+    saves_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Copy of JobPost.saves_count."
+    )
+    applications_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Copy of JobPost.applications_count."
+    )
+    trending_rank = models.PositiveIntegerField(
+        null=True,
+        help_text="Position in the trending list, or NULL if not trending."
+    )
+    created_at = models.DateTimeField(
+        help_text="Job post creation date."
+    )
+
+    class Meta:
+        indexes = [
+            # Newest-first listing, alone and under each filter
+            models.Index(fields=['-created_at'], name='listing_created'),
+            models.Index(fields=['category', '-created_at'], name='listing_category_created'),
+            models.Index(fields=['job_type', '-created_at'], name='listing_jobtype_created'),
+            models.Index(fields=['location', '-created_at'], name='listing_location_created'),
+            models.Index(fields=['trending_rank'], name='listing_trending_rank'),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the listing.
+        """
+        return f"{self.title} ({self.company_name})"
+
+
+# =============================================================================
+# UserPreferenceProfile Model
+# =============================================================================
+class UserPreferenceProfile(models.Model):
+    """
+    Learned job preferences of a user, for the personalized feed.
+
+    ``weights`` maps job features (category, job type, tag, location, title
+    token) to an exponentially decayed score. It is updated incrementally
+    as the user saves and applies to jobs (see realtimejobs.personalization).
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="preference_profile",
+        help_text="The user this profile belongs to."
+    )
+    weights = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Feature -> preference weight, decayed as of updated_at."
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the weights were last decayed and updated."
+    )
+
+    def __str__(self):
+        """
+        Returns a string representation of the profile.
+        """
+        return f"Preferences of {self.user_id} ({len(self.weights)} features)"
+
+
+# =============================================================================
+# ArchivedJobPost Model
+# =============================================================================
+class ArchivedJobPost(models.Model):
+    """
+    A job post moved out of the hot ``JobPost`` table long after it closed
+    (see realtimejobs.archival).
+
+    The columns needed to look an archived job up are kept as fields; the
+    full original row, its tag ids and its payments are kept in ``data``.
+    """
+    id = BinaryUUIDField(
+        primary_key=True,
+        editable=False,
+        help_text="The original JobPost id."
+    )
+    title = models.CharField(
+        max_length=255,
+        help_text="Job title."
+    )
+    slug = models.SlugField(
+        max_length=255,
+        db_index=True,
+        help_text="The slug the job post had."
+    )
+    job_url_hash = models.CharField(
+        max_length=64,
+        null=True,
+        db_index=True,
+        help_text="Canonical job URL hash the job post had."
+    )
+    company_name = models.CharField(
+        max_length=255,
+        help_text="Name of the company at archival time."
+    )
+    created_at = models.DateTimeField(
+        help_text="When the job post was created."
+    )
+    published_at = models.DateTimeField(
+        null=True,
+        help_text="When the job post went live, if it did."
+    )
+    closed_at = models.DateTimeField(
+        help_text="Last update of the job post, i.e. when it was closed."
+    )
+    archived_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        help_text="When the job post was archived."
+    )
+    data = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        help_text="The original row plus 'tag_ids' and 'payments'."
+    )
+
+    def __str__(self):
+        """
+        Returns a string representation of the archived job post.
+        """
+        return f"{self.title} (archived)"
+
+
+# =============================================================================
+# ArchivedJobInteraction Model
+# =============================================================================
+class ArchivedJobInteraction(models.Model):
+    """
+    A saved/applied interaction with an archived job post.
+    """
+    id = BinaryUUIDField(
+        primary_key=True,
+        editable=False,
+        help_text="The original JobInteraction id."
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="User who interacted with the job."
+    )
+    job_id = BinaryUUIDField(
+        db_index=True,
+        help_text="Id of the ArchivedJobPost."
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=JobInteraction.STATUS_CHOICES,
+        help_text="Type of interaction (saved or applied)."
+    )
+    timestamp = models.DateTimeField(
+        help_text="Time when the interaction occurred."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status']),
+        ]
+
+    def __str__(self):
+        """
+        Returns a string representation of the archived interaction.
+        """
+        return f"{self.user_id} - {self.job_id} ({self.status}, archived)"
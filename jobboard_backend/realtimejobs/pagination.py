@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination  # type: ignore
+
+
+class InteractionCursorPagination(CursorPagination):
+    """
+    Newest-first cursor pagination for a user's saved/applied jobs.
+
+    Each page is a range read on the (user, status, timestamp) index, so
+    its cost does not grow with how deep the user pages.
+    """
+    ordering = '-timestamp'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,301 @@
+"""
+Client for the Chapa payment gateway.
+
+All gateway calls go through one pooled keep-alive ``requests.Session`` per
+process, with strict connect/read timeouts, retries with jittered
+exponential backoff and a circuit breaker, so a slow or failing gateway
+can never tie up a worker indefinitely. ``AsyncChapaClient`` exposes the
+same calls to asyncio code.
+
+Point ``CHAPA_BASE_URL`` at a local stand-in (``manage.py chapa_standin``)
+to exercise the client without the real gateway.
+
+Payments are confirmed by ``confirm_payments`` from three places: the
+browser callback, the signed webhook and the periodic reconciliation task.
+Confirmation is a conditional pending -> success update, so whichever path
+arrives first publishes the job and the others are no-ops.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import Value  # type: ignore
+from django.db.models.functions import Coalesce  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs import metrics
+from realtimejobs.emails import payment_success_email, queue_emails
+from realtimejobs.models import JobPost, Payment
+from realtimejobs.signals import jobs_published
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PaymentGatewayError(Exception):
+    """Raised when the payment gateway cannot be reached or misbehaves."""
+
+
+class CircuitOpenError(PaymentGatewayError):
+    """Raised without calling the gateway while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling the gateway after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast for ``reset_timeout`` seconds. Then a single probe call
+    is let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Payment gateway circuit is open")
+            self.probing = True  # Half-open: this caller is the probe
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.probing:
+                    logger.warning("Payment gateway circuit opened after %d failures", self.failures)
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class ChapaClient:
+    """Synchronous Chapa API client over a pooled keep-alive session."""
+
+    def __init__(self, base_url=None, secret_key=None, connect_timeout=None,
+                 read_timeout=None, max_retries=None, backoff=0.5, pool_size=20,
+                 breaker=None):
+        self.base_url = (base_url or settings.CHAPA_BASE_URL).rstrip('/')
+        self.timeout = (connect_timeout or settings.CHAPA_CONNECT_TIMEOUT,
+                        read_timeout or settings.CHAPA_READ_TIMEOUT)
+        self.max_retries = settings.CHAPA_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {secret_key or settings.CHAPA_SECRET_KEY}',
+        })
+
+    def initialize(self, payload):
+        """Start a transaction; returns the gateway's JSON response."""
+        # Not retried on read timeouts: the gateway may have acted already
+        return self._request('POST', '/transaction/initialize', idempotent=False, json=payload)
+
+    def verify(self, tx_ref):
+        """Look up the status of a transaction; returns the gateway's JSON response."""
+        return self._request('GET', f'/transaction/verify/{tx_ref}', idempotent=True)
+
+    def _request(self, method, path, idempotent, **kwargs):
+        self.breaker.before_call()
+        url = f"{self.base_url}{path}"
+        error = None
+
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.ConnectionError as exc:
+                # Covers connect timeouts: the request never reached the gateway
+                error = exc
+            except requests.Timeout as exc:
+                error = exc
+                if not idempotent:
+                    break
+            except requests.RequestException as exc:
+                # Anything else (broken chunked body, invalid URL...) is not worth
+                # retrying, but must still reach the breaker or a probe never ends
+                error = exc
+                break
+            else:
+                metrics.observe("payments.gateway_seconds", time.perf_counter() - started)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_success()
+                    try:
+                        return response.json()
+                    except ValueError as exc:
+                        raise PaymentGatewayError("Invalid response from payment gateway") from exc
+                error = PaymentGatewayError(f"Payment gateway returned {response.status_code}")
+
+            if attempt < self.max_retries:
+                # Full jitter keeps retrying workers from stampeding the gateway
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+        self.breaker.record_failure()
+        metrics.incr("payments.gateway_failures")
+        raise PaymentGatewayError(f"Payment gateway request failed: {error}") from error
+
+
+class AsyncChapaClient:
+    """
+    Asyncio facade over ``ChapaClient``.
+
+    Calls run in worker threads and share the synchronous client's
+    connection pool and circuit breaker.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_chapa_client()
+
+    async def initialize(self, payload):
+        return await asyncio.to_thread(self.client.initialize, payload)
+
+    async def verify(self, tx_ref):
+        return await asyncio.to_thread(self.client.verify, tx_ref)
+
+    async def verify_many(self, tx_refs, concurrency=8):
+        """
+        Verify several transactions with at most ``concurrency`` in flight.
+
+        Returns a dict of tx_ref to the JSON response, or to the raised
+        PaymentGatewayError for transactions that could not be verified.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def verify_one(tx_ref):
+            async with semaphore:
+                try:
+                    return tx_ref, await self.verify(tx_ref)
+                except PaymentGatewayError as exc:
+                    return tx_ref, exc
+
+        return dict(await asyncio.gather(*(verify_one(tx_ref) for tx_ref in tx_refs)))
+
+
+def build_initialize_payload(payment):
+    """Return the Chapa initialize payload for a Payment row."""
+    return {
+        "amount": str(payment.amount),
+        "currency": payment.currency,
+        "email": payment.email,
+        "tx_ref": payment.tx_ref,
+        "callback_url": settings.CHAPA_CALLBACK_URL,  # User is redirected after payment
+        "customization": {
+            "title": "Job Post Payment",
+            "description": "Get your job posted on RealtimeJobs"
+        }
+    }
+
+
+def is_payment_successful(verification_data):
+    """True if a verify response (or webhook payload) reports a completed payment."""
+    if verification_data.get('status') != 'success':
+        return False
+    # Verify responses nest the transaction status under "data"
+    return (verification_data.get('data') or {}).get('status', 'success') == 'success'
+
+
+def verify_webhook_signature(body, signature):
+    """
+    Check the HMAC-SHA256 signature Chapa sends with webhook events.
+
+    :param body: Raw request body (bytes).
+    :param signature: Hex digest from the ``x-chapa-signature`` header.
+    """
+    secret = settings.CHAPA_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def confirm_payments(tx_refs):
+    """
+    Mark pending payments as successful and publish their job posts.
+
+    Payments that are no longer pending are skipped, so calling this again
+    for the same transaction (webhook redelivery, callback after webhook,
+    reconciliation) changes nothing.
+
+    :return: The payments confirmed by this call.
+    """
+    if not tx_refs:
+        return []
+
+    with transaction.atomic():
+        payments = list(
+            Payment.objects.select_for_update().select_related('job_post')
+            .filter(tx_ref__in=tx_refs, payment_status='pending')
+        )
+        if not payments:
+            return []
+
+        Payment.objects.filter(id__in=[p.id for p in payments]).update(payment_status='success')
+
+        new_jobs = {p.job_post_id: p.job_post for p in payments if p.job_post.status != 'published'}
+        now = timezone.now()
+        JobPost.objects.filter(id__in=new_jobs).update(
+            status='published', published_at=Coalesce('published_at', Value(now)), updated_at=now)
+        for job in new_jobs.values():
+            job.status = 'published'
+            job.published_at = job.published_at or now
+
+        # Match the jobs against instant alerts right away
+        if new_jobs:
+            jobs_published.send(sender=JobPost, jobs=list(new_jobs.values()))
+
+        # Notification emails are queued in the outbox, not sent inline
+        queue_emails(payment_success_email(p, p.job_post.title) for p in payments)
+
+    metrics.incr("payments.confirmed", len(payments))
+    return payments
+
+
+def decline_payments(tx_refs):
+    """Mark pending payments as declined; returns the number of rows changed."""
+    if not tx_refs:
+        return 0
+    declined = Payment.objects.filter(
+        tx_ref__in=tx_refs, payment_status='pending').update(payment_status='declined')
+    metrics.incr("payments.declined", declined)
+    return declined
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_chapa_client():
+    """Return the process-wide ChapaClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ChapaClient()
+    return _client
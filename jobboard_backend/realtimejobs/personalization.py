@@ -0,0 +1,236 @@
+"""
+Personalized job feed.
+
+Each user has a ``UserPreferenceProfile``: job features weighted by how
+often, and how recently, the user saved or applied to jobs carrying them.
+Interactions update the profile incrementally (decay the old weights, add
+the new job's features), so it is never recomputed from scratch after the
+first bootstrap. Active job alerts add their filters at scoring time.
+
+Scoring multiplies a cached sparse encoding of the newest published jobs
+by the profile weights in one vectorized NumPy pass. The ranked top of the
+feed is cached per user for a short TTL.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache  # type: ignore
+from django.db import transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs import alerts
+from realtimejobs.models import JobAlert, JobInteraction, JobPost, UserPreferenceProfile
+from realtimejobs.recommendations import job_features
+
+HALF_LIFE_DAYS = 30
+BOOTSTRAP_DAYS = 90
+MAX_FEATURES = 300  # strongest features kept per profile
+MIN_WEIGHT = 0.05
+
+SIGNAL_WEIGHTS = {'applied': 3.0, 'saved': 1.0}
+TOKEN_WEIGHT = 0.5
+ALERT_WEIGHT = 2.0
+FRESHNESS_WEIGHT = 0.5  # tie-breaker towards newer jobs; halves every week
+
+POOL_SIZE = 2000  # newest published jobs considered
+FEED_SIZE = 100  # ranked jobs cached per user
+FEED_CACHE_TTL = 120  # seconds
+
+_pool = (None, None)  # Per-process copy of the cached candidate pool
+
+
+# **************** PROFILES ************************
+
+def _decay(weights, since, now):
+    factor = 0.5 ** ((now - since).total_seconds() / (HALF_LIFE_DAYS * 86400))
+    return {feature: weight * factor for feature, weight in weights.items()}
+
+
+def _add_job(weights, features, amount):
+    for feature, weight in features.items():
+        weights[feature] = weights.get(feature, 0.0) + amount * (TOKEN_WEIGHT if weight is None else weight)
+
+
+def _prune(weights):
+    strongest = sorted(weights.items(), key=lambda item: -abs(item[1]))[:MAX_FEATURES]
+    return {feature: round(weight, 4) for feature, weight in strongest if abs(weight) >= MIN_WEIGHT}
+
+
+def _features_of(job_ids):
+    """Feature dicts of the given jobs, keyed by job id."""
+    jobs = JobPost.objects.filter(id__in=job_ids).values(
+        'id', 'category_id', 'job_type_id', 'location', 'is_worldwide', 'title')
+    tags = defaultdict(list)
+    for job_id, tag_id in JobPost.tags.through.objects.filter(
+            jobpost_id__in=job_ids).values_list('jobpost_id', 'tag_id'):
+        tags[job_id].append(tag_id)
+    return {job['id']: job_features(job, tags[job['id']]) for job in jobs}
+
+
+def _bootstrap(user_id, now):
+    """Build a profile from the user's recent interaction history (first use only)."""
+    history = list(JobInteraction.objects.filter(
+        user_id=user_id, timestamp__gte=now - timedelta(days=BOOTSTRAP_DAYS)
+    ).values_list('job_id', 'status', 'timestamp'))
+    features = _features_of({job_id for job_id, _, _ in history})
+
+    weights = {}
+    for job_id, status, timestamp in history:
+        if job_id in features:
+            age = (now - timestamp).total_seconds() / (HALF_LIFE_DAYS * 86400)
+            _add_job(weights, features[job_id], SIGNAL_WEIGHTS[status] * 0.5 ** age)
+    return _prune(weights)
+
+
+def get_profile(user_id):
+    """
+    Return (profile, bootstrapped) for the user; a missing profile is
+    bootstrapped from their interaction history.
+    """
+    profile = UserPreferenceProfile.objects.filter(user_id=user_id).first()
+    if profile is not None:
+        return profile, False
+    now = timezone.now()
+    return UserPreferenceProfile.objects.get_or_create(
+        user_id=user_id, defaults={'weights': _bootstrap(user_id, now), 'updated_at': now})
+
+
+def apply_interaction(user_id, job_id, status, delta=1):
+    """
+    Fold one saved/applied change into the user's profile.
+
+    Old weights are decayed to now and the job's features added (or, for a
+    removed interaction, subtracted) with the signal's weight.
+    """
+    if status not in SIGNAL_WEIGHTS:
+        return
+    _, bootstrapped = get_profile(user_id)
+    if bootstrapped:
+        return  # The bootstrap read the history this change is already part of
+    features = _features_of([job_id]).get(job_id)
+    if features is None:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        profile = UserPreferenceProfile.objects.select_for_update().get(user_id=user_id)
+        weights = _decay(profile.weights, profile.updated_at, now)
+        _add_job(weights, features, SIGNAL_WEIGHTS[status] * delta)
+        profile.weights = _prune(weights)
+        profile.updated_at = now
+        profile.save(update_fields=['weights', 'updated_at'])
+
+
+def record_interaction(user_id, job_id, status, delta=1):
+    """Queue a profile update once the interaction is committed."""
+    from realtimejobs.tasks import update_preference_profile
+
+    transaction.on_commit(lambda: update_preference_profile.delay(
+        user_id, str(job_id), status, delta))
+
+
+def _alert_weights(user_id):
+    weights = {}
+    user_alerts = JobAlert.objects.filter(user_id=user_id, is_active=True).prefetch_related(
+        'categories', 'job_types')
+    for alert in user_alerts:
+        for category in alert.categories.all():
+            weights[f"category:{category.id}"] = weights.get(f"category:{category.id}", 0) + ALERT_WEIGHT
+        for job_type in alert.job_types.all():
+            weights[f"job_type:{job_type.id}"] = weights.get(f"job_type:{job_type.id}", 0) + ALERT_WEIGHT
+        if alert.location:
+            key = f"location:{alerts.normalize_location(alert.location)}"
+            weights[key] = weights.get(key, 0) + ALERT_WEIGHT
+    return weights
+
+
+# **************** SCORING ************************
+
+class CandidatePool:
+    """
+    Sparse encoding of the newest published jobs.
+
+    ``rows``/``columns`` hold one entry per (job, feature) pair, so scoring
+    against any weight vector over ``vocabulary`` is a single bincount.
+    """
+
+    def __init__(self, jobs, features):
+        self.job_ids = [job['id'] for job in jobs]
+        self.vocabulary = {}
+        rows, columns = [], []
+        for row, job in enumerate(jobs):
+            for feature in features[job['id']]:
+                rows.append(row)
+                columns.append(self.vocabulary.setdefault(feature, len(self.vocabulary)))
+        self.rows = np.array(rows, dtype=np.int64)
+        self.columns = np.array(columns, dtype=np.int64)
+
+        now = timezone.now()
+        ages = np.array([(now - (job['published_at'] or job['created_at'])).total_seconds() / 86400
+                         for job in jobs], dtype=np.float64)
+        self.freshness = FRESHNESS_WEIGHT * 0.5 ** (np.clip(ages, 0, None) / 7)
+
+    def score(self, weights):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for feature, weight in weights.items():
+            column = self.vocabulary.get(feature)
+            if column is not None:
+                vector[column] = weight
+        scores = np.bincount(self.rows, weights=vector[self.columns], minlength=len(self.job_ids))
+        return scores + self.freshness
+
+
+def candidate_pool():
+    """The candidate pool for the current set of published jobs (cached)."""
+    global _pool
+
+    version = alerts.published_version()
+    if _pool[0] == version:
+        return _pool[1]
+
+    cache_key = "personalization:pool"
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0] == version:
+        pool = cached[1]
+    else:
+        jobs = list(JobPost.objects.filter(status='published').order_by(
+            '-published_at', '-created_at').values(
+            'id', 'category_id', 'job_type_id', 'location', 'is_worldwide', 'title',
+            'published_at', 'created_at')[:POOL_SIZE])
+        tags = defaultdict(list)
+        for job_id, tag_id in JobPost.tags.through.objects.filter(
+                jobpost_id__in=[job['id'] for job in jobs]).values_list('jobpost_id', 'tag_id'):
+            tags[job_id].append(tag_id)
+        pool = CandidatePool(jobs, {job['id']: job_features(job, tags[job['id']]) for job in jobs})
+        cache.set(cache_key, (version, pool), 60 * 60)
+
+    _pool = (version, pool)
+    return pool
+
+
+def feed_job_ids(user_id):
+    """
+    The user's ranked feed (up to FEED_SIZE job ids), cached for FEED_CACHE_TTL.
+    Jobs the user already applied to are left out.
+    """
+    profile, _ = get_profile(user_id)
+    version = alerts.published_version()
+    cache_key = f"personalization:feed:{user_id}"
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0] == (version, profile.updated_at):
+        return cached[1]
+
+    weights = dict(profile.weights)
+    for feature, weight in _alert_weights(user_id).items():
+        weights[feature] = weights.get(feature, 0) + weight
+
+    pool = candidate_pool()
+    scores = pool.score(weights)
+    applied = set(JobInteraction.objects.filter(
+        user_id=user_id, status='applied', job_id__in=pool.job_ids).values_list('job_id', flat=True))
+    ranked = [pool.job_ids[row] for row in np.argsort(-scores, kind='stable')
+              if pool.job_ids[row] not in applied][:FEED_SIZE]
+
+    cache.set(cache_key, ((version, profile.updated_at), ranked), FEED_CACHE_TTL)
+    return ranked
@@ -4,13 +4,18 @@ import aiomysql #type: ignore
 import functools
 import hashlib
 import json
+import time
+import uuid
+from django.conf import settings  # type: ignore
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Global cache dictionary
+# Global cache dictionary: cache key -> (stored at, result)
 query_cache = {}
+QUERY_CACHE_TTL = 30  # seconds; bounds how stale listings (and their counters) get
+QUERY_CACHE_MAX_ENTRIES = 1000
 
 class DatabaseConnection:
     """Manages synchronous database connections using pymysql."""
@@ -67,59 +72,97 @@ class AsyncDatabaseConnection:
         return True
 
 def cache_query(func):
-    """Caches query results to reduce redundant database calls."""
+    """Caches query results for a short while to reduce redundant database calls."""
     
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        query = kwargs.get("query", "")
-        params = kwargs.get("params", ())
-        cache_key = hashlib.sha256((query + json.dumps(params, sort_keys=True)).encode()).hexdigest()
+        # Accept the query and params positionally too, or every call shares one key
+        query = kwargs.get("query", args[0] if args else "")
+        params = kwargs.get("params", args[1] if len(args) > 1 else ())
+        cache_key = hashlib.sha256(
+            (query + json.dumps(params, sort_keys=True, default=str)).encode()).hexdigest()
 
-        if cache_key in query_cache:
+        entry = query_cache.get(cache_key)
+        if entry and time.monotonic() - entry[0] < QUERY_CACHE_TTL:
             print(f"[CACHE] Hit for query: {query}")
-            return query_cache[cache_key]
+            return entry[1]
 
         result = func(*args, **kwargs)
-        query_cache[cache_key] = result
+        if len(query_cache) >= QUERY_CACHE_MAX_ENTRIES:
+            query_cache.clear()
+        query_cache[cache_key] = (time.monotonic(), result)
         print(f"[CACHE] Stored query: {query}")
         return result
     return wrapper
 
+def uuid_param(value):
+    """
+    A UUID as a query parameter for a UUID column: 16 bytes once
+    BINARY_UUID_STORAGE is on, else the char(32) hex Django stores.
+    Values that are not UUIDs are passed through (they match nothing).
+    """
+    try:
+        value = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except ValueError:
+        return value
+    return value.bytes if getattr(settings, 'BINARY_UUID_STORAGE', False) else value.hex
+
+
+def uuid_value(value):
+    """A UUID column value from a result row, as hex whatever the storage."""
+    if isinstance(value, (bytes, bytearray)) and len(value) == 16:
+        return bytes(value).hex()
+    return value
+
+
+def decode_row(row):
+    """Turn binary(16) UUID columns of a DictCursor row into hex, in place."""
+    if row:
+        for key, value in row.items():
+            if isinstance(value, (bytes, bytearray)) and len(value) == 16:
+                row[key] = bytes(value).hex()
+    return row
+
+
 class BaseQuery:
     """Base class for handling database queries with caching and async support."""
-    
+
+    uuid_param = staticmethod(uuid_param)
+    uuid_value = staticmethod(uuid_value)
+
     @staticmethod
     @cache_query
     def fetch_all(query, params=()):
         with DatabaseConnection() as cursor:
             cursor.execute(query, params)
-            return cursor.fetchall()
+            return [decode_row(row) for row in cursor.fetchall()]
 
     @staticmethod
     @cache_query
     def fetch_one(query, params=()):
         with DatabaseConnection() as cursor:
             cursor.execute(query, params)
-            return cursor.fetchone()
+            return decode_row(cursor.fetchone())
 
     @staticmethod
     def execute_query(query, params=()):
-        """Executes INSERT, UPDATE, DELETE queries."""
+        """Executes INSERT, UPDATE, DELETE queries and returns the affected row count."""
         with DatabaseConnection() as cursor:
-            cursor.execute(query, params)
+            rowcount = cursor.execute(query, params)
             cursor.connection.commit()
             print(f"[INFO] Executed: {query} with params: {params}")
+            return rowcount
 
     @staticmethod
     async def async_fetch_all(query, params=()):
         """Handles async fetch for SELECT queries."""
         async with AsyncDatabaseConnection() as cursor:
             await cursor.execute(query, params)
-            return await cursor.fetchall()
+            return [decode_row(row) for row in await cursor.fetchall()]
 
     @staticmethod
     async def async_fetch_one(query, params=()):
         """Handles async fetch for a single record."""
         async with AsyncDatabaseConnection() as cursor:
             await cursor.execute(query, params)
-            return await cursor.fetchone()
+            return decode_row(await cursor.fetchone())
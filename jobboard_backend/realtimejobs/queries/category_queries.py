@@ -17,7 +17,7 @@ class CategoryQueries(BaseQuery):
         """Find a category by its ID."""
         query = "SELECT id, name, slug FROM realtimejobs_category WHERE id = %s LIMIT 1;"
         print(f"[INFO] Searching for category with ID: {category_id}")
-        return self.fetch_one(query, (category_id,))
+        return self.fetch_one(query, (self.uuid_param(category_id),))
 
     def find_category_by_name(self, name):
         """Find a category by its name."""
@@ -49,7 +49,7 @@ class CategoryQueries(BaseQuery):
             update_fields.append("slug = %s")
             params.append(slug)
 
-        params.append(category_id)
+        params.append(self.uuid_param(category_id))
         query = f"UPDATE realtimejobs_category SET {', '.join(update_fields)} WHERE id = %s;"
         print(f"[INFO] Updating category ID: {category_id}")
         self.execute_query(query, tuple(params))
@@ -58,4 +58,4 @@ class CategoryQueries(BaseQuery):
         """Delete a category by ID."""
         query = "DELETE FROM realtimejobs_category WHERE id = %s;"
         print(f"[INFO] Deleting category with ID: {category_id}")
-        self.execute_query(query, (category_id,))
+        self.execute_query(query, (self.uuid_param(category_id),))
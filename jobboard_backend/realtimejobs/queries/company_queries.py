@@ -21,7 +21,7 @@ class CompanyQueries(BaseQuery):
             LIMIT 1;
         """
         print(f"[INFO] Searching for company with ID: {company_id}")
-        return self.fetch_one(query, (company_id,))
+        return self.fetch_one(query, (self.uuid_param(company_id),))
 
     def find_company_by_name(self, name):
         """Find a company by its name."""
@@ -78,7 +78,7 @@ class CompanyQueries(BaseQuery):
             update_fields.append("contact_email = %s")
             params.append(contact_email)
 
-        params.append(company_id)
+        params.append(self.uuid_param(company_id))
         query = f"""
             UPDATE realtimejobs_company
             SET {", ".join(update_fields)}
@@ -91,7 +91,7 @@ class CompanyQueries(BaseQuery):
         """Delete a company by ID."""
         query = "DELETE FROM realtimejobs_company WHERE id = %s;"
         print(f"[INFO] Deleting company with ID: {company_id}")
-        self.execute_query(query, (company_id,))
+        self.execute_query(query, (self.uuid_param(company_id),))
 
 if __name__ == "__main__":
     company_queries = CompanyQueries()
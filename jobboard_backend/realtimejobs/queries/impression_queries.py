@@ -0,0 +1,36 @@
+from realtimejobs.queries.base_query import BaseQuery
+
+
+class ImpressionQueries(BaseQuery):
+    """
+    Handles queries related to the realtimejobs_jobimpression table.
+    """
+
+    def bulk_add_impressions(self, rows, chunk_size=500):
+        """
+        Add view counts to the hourly rollup with multi-row upserts.
+
+        Rows are inserted through a join on realtimejobs_jobpost, so counts of
+        jobs deleted while their views were buffered are skipped instead of
+        failing the foreign key check for the whole chunk.
+
+        :param rows: List of (job_id, bucket, detail_views, list_views), job_id
+            already converted with ``uuid_param``;
+            ``bucket`` is a naive UTC datetime.
+        """
+        row_sql = "SELECT %s AS job_id, %s AS bucket, %s AS detail_delta, %s AS list_delta"
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            # A derived table rather than a bare UNION: MySQL only resolves
+            # ON DUPLICATE KEY UPDATE reliably against a single result set
+            query = f"""
+                INSERT INTO realtimejobs_jobimpression (job_id, bucket, detail_views, list_views)
+                SELECT jp.id, v.bucket, v.detail_delta, v.list_delta
+                FROM ({' UNION ALL '.join([row_sql] * len(chunk))}) AS v
+                JOIN realtimejobs_jobpost jp ON jp.id = v.job_id
+                ON DUPLICATE KEY UPDATE
+                    detail_views = realtimejobs_jobimpression.detail_views + VALUES(detail_views),
+                    list_views = realtimejobs_jobimpression.list_views + VALUES(list_views);
+            """
+            print(f"[INFO] Flushing {len(chunk)} impression rollups")
+            self.execute_query(query, [value for row in chunk for value in row])
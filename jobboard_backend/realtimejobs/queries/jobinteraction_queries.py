@@ -1,4 +1,5 @@
-from realtimejobs.queries.base_query import BaseQuery
+from realtimejobs.fields import uuid7
+from realtimejobs.queries.base_query import BaseQuery, DatabaseConnection
 import uuid
 
 
@@ -8,16 +9,72 @@ class JobInteractionQueries(BaseQuery):
     """
 
     def save_or_update_interaction(self, user_id, job_id, status):
-        """Save a new job interaction or update the timestamp if it exists."""
+        """
+        Save a job interaction in a single atomic statement.
+
+        Existing rows are left untouched (``id = id`` is a no-op update), so
+        MySQL reports 1 affected row for an insert and 0 for a duplicate.
+        Raises pymysql IntegrityError if the job does not exist.
+
+        :return: True if the interaction was created, False if it already existed.
+        """
         query = """
             INSERT INTO realtimejobs_jobinteraction (id, user_id, job_id, status, timestamp)
-            VALUES (%s, %s, %s, %s, NOW())
-            ON DUPLICATE KEY UPDATE timestamp = NOW();
+            VALUES (%s, %s, %s, %s, UTC_TIMESTAMP(6))
+            ON DUPLICATE KEY UPDATE id = id;
         """
-        interaction_id = str(uuid.uuid4())  # Generate a UUID
         print(
-            f"[INFO] Saving/updating interaction: User {user_id}, Job {job_id}, Status {status}")
-        self.execute_query(query, (interaction_id, user_id, job_id, status))
+            f"[INFO] Saving interaction: User {user_id}, Job {job_id}, Status {status}")
+        return self.execute_query(
+            query, (self.uuid_param(uuid7()), user_id, self.uuid_param(job_id), status)) == 1
+
+    def bulk_save_interactions(self, user_id, pairs):
+        """
+        Save many (job_id, status) interactions for one user.
+
+        Jobs are checked up front so one unknown id does not fail the whole
+        batch; the rest go in as a single multi-row upsert. Each row gets a
+        fresh id, so reading those ids back tells created rows from ones
+        that already existed. Everything runs on one connection.
+
+        :return: (created, existing, not_found), lists of (job_id, status)
+            with job ids as uuid.UUID.
+        """
+        pairs = list(dict.fromkeys((uuid.UUID(str(job_id)), status) for job_id, status in pairs))
+        if not pairs:
+            return [], [], []
+
+        job_ids = list({job_id for job_id, _ in pairs})
+        with DatabaseConnection() as cursor:
+            cursor.execute(
+                f"SELECT id FROM realtimejobs_jobpost WHERE id IN ({', '.join(['%s'] * len(job_ids))});",
+                [self.uuid_param(job_id) for job_id in job_ids])
+            found = {self.uuid_value(row['id']) for row in cursor.fetchall()}
+
+            not_found = [pair for pair in pairs if pair[0].hex not in found]
+            rows = {uuid7().hex: pair for pair in pairs if pair[0].hex in found}
+            created_ids = set()
+            if rows:
+                values = ', '.join(['(%s, %s, %s, %s, UTC_TIMESTAMP(6))'] * len(rows))
+                params = [value for interaction_id, (job_id, status) in rows.items()
+                          for value in (self.uuid_param(interaction_id), user_id,
+                                        self.uuid_param(job_id), status)]
+                cursor.execute(f"""
+                    INSERT INTO realtimejobs_jobinteraction (id, user_id, job_id, status, timestamp)
+                    VALUES {values}
+                    ON DUPLICATE KEY UPDATE id = id;
+                """, params)
+
+                cursor.execute(
+                    f"SELECT id FROM realtimejobs_jobinteraction WHERE id IN ({', '.join(['%s'] * len(rows))});",
+                    [self.uuid_param(interaction_id) for interaction_id in rows])
+                created_ids = {self.uuid_value(row['id']) for row in cursor.fetchall()}
+            cursor.connection.commit()
+
+        print(f"[INFO] Bulk saved {len(created_ids)} of {len(pairs)} interactions for user {user_id}")
+        created = [pair for interaction_id, pair in rows.items() if interaction_id in created_ids]
+        existing = [pair for interaction_id, pair in rows.items() if interaction_id not in created_ids]
+        return created, existing, not_found
 
     def fetch_user_jobs_by_status(self, user_id, status):
         """Fetch jobs a user has interacted with based on status (saved or applied)."""
@@ -39,7 +96,7 @@ class JobInteractionQueries(BaseQuery):
         """
         print(
             f"[INFO] Checking interaction for user {user_id} on job {job_id}")
-        return self.fetch_all(query, (user_id, job_id))
+        return self.fetch_all(query, (user_id, self.uuid_param(job_id)))
 
     def delete_interaction(self, user_id, job_id, status):
         """Delete a job interaction (remove saved or applied status)."""
@@ -49,13 +106,16 @@ class JobInteractionQueries(BaseQuery):
         """
         print(
             f"[INFO] Deleting interaction: User {user_id}, Job {job_id}, Status {status}")
-        self.execute_query(query, (user_id, job_id, status))
+        self.execute_query(query, (user_id, self.uuid_param(job_id), status))
 
     def count_applications_for_job(self, job_id):
-        """Count how many users have applied for a specific job."""
+        """
+        Count how many users have applied for a specific job.
+        Exact but slow; listings read JobPost.applications_count instead.
+        """
         query = """
             SELECT COUNT(*) FROM realtimejobs_jobinteraction
             WHERE job_id = %s AND status = 'applied';
         """
         print(f"[INFO] Counting applications for job ID: {job_id}")
-        return self.fetch_one(query, (job_id,))
+        return self.fetch_one(query, (self.uuid_param(job_id),))
@@ -1,47 +1,63 @@
+import json
+
 from realtimejobs.queries.base_query import BaseQuery
 
 
 class JobPostQueries(BaseQuery):
     """
-    Handles queries related to the realtimejobs_jobpost table.
+    Handles queries related to job posts, read from the realtimejobs_joblisting table.
     """
 
-    def fetch_filtered_jobs(self, categories=None, locations=None, job_types=None, page=1, page_size=15):
-        """Fetch job posts based on multiple filters with pagination."""
+    def fetch_filtered_jobs(self, categories=None, locations=None, job_types=None, page=1, page_size=15,
+                            sort=None):
+        """
+        Fetch published job posts based on multiple filters with pagination,
+        from the denormalized listing table (see realtimejobs.listings).
+        sort='trending' restricts to the precomputed trending list, in rank order.
+        """
         query = """
             SELECT 
-                jp.id, 
-                jp.title, 
-                jp.slug, 
-                jp.location, 
-                jp.is_worldwide, 
-                c.name AS category,  -- Fetch category name
-                jt.name AS job_type,  -- Fetch job type name
-                comp.name AS company_name,  -- Fetch company name
-                jp.salary, 
-                jp.short_description, 
-                jp.created_at
-            FROM realtimejobs_jobpost jp
-            LEFT JOIN realtimejobs_category c ON jp.category_id = c.id  -- Join categories table
-            LEFT JOIN realtimejobs_jobtype jt ON jp.job_type_id = jt.id  -- Join job types table
-            LEFT JOIN realtimejobs_company comp ON jp.company_id = comp.id  -- Join company table
-            WHERE jp.status = 'published'
+                jl.job_id AS id, 
+                jl.title, 
+                jl.slug, 
+                jl.location, 
+                jl.is_worldwide, 
+                jl.category_name AS category,
+                jl.job_type_name AS job_type,
+                jl.company_name,
+                jl.salary, 
+                jl.excerpt AS short_description, 
+                jl.tags,
+                jl.created_at,
+                jl.saves_count,
+                jl.applications_count
+            FROM realtimejobs_joblisting jl
         """
-        params = []
+        conditions, params = [], []
 
         if categories:
-            query += " AND jp.category_id IN %s"
-            params.append(tuple(categories))
+            conditions.append("jl.category_id IN %s")
+            params.append(tuple(self.uuid_param(category) for category in categories))
 
         if locations:
-            query += " AND jp.location IN %s"
+            conditions.append("jl.location IN %s")
             params.append(tuple(locations))
 
         if job_types:
-            query += " AND jp.job_type_id IN %s"
-            params.append(tuple(job_types))
-
-        query += " ORDER BY jp.created_at DESC LIMIT %s OFFSET %s;"
+            conditions.append("jl.job_type_id IN %s")
+            params.append(tuple(self.uuid_param(job_type) for job_type in job_types))
+
+        if sort == "trending":
+            conditions.append("jl.trending_rank IS NOT NULL")
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if sort == "trending":
+            query += " ORDER BY jl.trending_rank"
+        else:
+            query += " ORDER BY jl.created_at DESC"
+        query += " LIMIT %s OFFSET %s;"
         params.extend([page_size, (page - 1) * page_size])
 
-        return self.fetch_all(query, tuple(params))
+        # Fresh dicts: fetch_all may hand out its cached rows
+        return [dict(job, tags=json.loads(job["tags"])) for job in self.fetch_all(query, tuple(params))]
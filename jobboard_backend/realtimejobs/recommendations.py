@@ -0,0 +1,293 @@
+"""
+"Similar jobs" recommendations from precomputed nearest neighbours.
+
+Every published job is encoded as a sparse, L2-normalized feature vector
+over its category, job type, tags, location and title tokens (title tokens
+weighted by inverse document frequency). Top-k cosine neighbours are found
+by accumulating scores over the inverted lists of a job's features with
+NumPy, and stored in ``SimilarJob``.
+
+The vectors are kept in the cache as a ``FeatureIndex``. The nightly full
+rebuild re-derives the vocabulary and weights from all jobs. In between,
+publish/close events within ``REFRESH_DELAY`` are coalesced into one
+incremental refresh, which encodes only the jobs that changed (against
+the existing vocabulary; features it lacks wait for the next rebuild) and
+recomputes only the jobs whose stored neighbour lists they would enter or
+leave.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import Count, Min  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs.alerts import normalize_location
+from realtimejobs.models import JobPost, SimilarJob
+
+TOP_K = 10
+MAX_VOCABULARY = 4096  # most frequent features kept
+LOOKUP_BATCH_SIZE = 1000  # ids per IN (...) lookup
+
+# Cached FeatureIndex, and the time from which edited jobs are re-encoded
+INDEX_KEY = "recommendations:index"
+WATERMARK_KEY = "recommendations:refreshed-at"
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# Publish/close events within this many seconds share one refresh
+REFRESH_DELAY = 30
+REFRESH_SCHEDULED_KEY = "recommendations:refresh-scheduled"
+
+FEATURE_WEIGHTS = {
+    'category': 2.0,
+    'job_type': 1.0,
+    'tag': 1.0,
+    'location': 1.0,
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+STOPWORDS = frozenset({'and', 'the', 'for', 'with', 'of', 'in', 'to', 'a', 'an', 'at', 'remote'})
+
+
+def tokenize(title):
+    return {token for token in TOKEN_RE.findall(title.lower())
+            if len(token) > 1 and token not in STOPWORDS}
+
+
+def job_features(job, tag_ids):
+    """Return {feature: weight} for one job (title tokens weighted later)."""
+    features = {
+        f"category:{job['category_id']}": FEATURE_WEIGHTS['category'],
+        f"job_type:{job['job_type_id']}": FEATURE_WEIGHTS['job_type'],
+    }
+    for tag_id in tag_ids:
+        features[f"tag:{tag_id}"] = FEATURE_WEIGHTS['tag']
+    if job['is_worldwide']:
+        features["location:worldwide"] = FEATURE_WEIGHTS['location']
+    elif job['location']:
+        features[f"location:{normalize_location(job['location'])}"] = FEATURE_WEIGHTS['location']
+    for token in tokenize(job['title']):
+        features[f"token:{token}"] = None
+    return features
+
+
+def _load_jobs(**filters):
+    """Published jobs (matching ``filters``) with their tag ids, ordered by id."""
+    jobs = list(JobPost.objects.filter(status='published', **filters).order_by('id').values(
+        'id', 'category_id', 'job_type_id', 'location', 'is_worldwide', 'title'))
+    tags = defaultdict(list)
+    job_filter = {f"jobpost__{name}": value for name, value in filters.items()}
+    for job_id, tag_id in JobPost.tags.through.objects.filter(
+            jobpost__status='published', **job_filter).values_list('jobpost_id', 'tag_id'):
+        tags[job_id].append(tag_id)
+    return jobs, tags
+
+
+class FeatureIndex:
+    """
+    Sparse, unit-length feature vectors of the published jobs, in CSR form
+    (row ``i`` is ``job_ids[i]``), plus the vocabulary and title token
+    weights they were encoded with.
+
+    Scoring one job against all others walks the inverted lists of its
+    features only, so it costs the size of those lists rather than
+    jobs x vocabulary.
+    """
+
+    def __init__(self, vocabulary, token_weights):
+        self.vocabulary = vocabulary  # feature -> column
+        self.token_weights = token_weights  # title token feature -> IDF weight
+        self.job_ids = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self._postings = None
+
+    @classmethod
+    def build(cls):
+        """Encode all published jobs with a vocabulary derived from them."""
+        jobs, tags = _load_jobs()
+        encoded = [job_features(job, tags[job['id']]) for job in jobs]
+        frequency = Counter(feature for features in encoded for feature in features)
+        vocabulary = {feature: column for column, (feature, _) in
+                      enumerate(frequency.most_common(MAX_VOCABULARY))}
+        # Title tokens: rarer words say more
+        token_weights = {feature: math.log(1 + len(jobs) / frequency[feature])
+                         for feature in vocabulary if feature.startswith('token:')}
+        index = cls(vocabulary, token_weights)
+        index.replace((), [job['id'] for job in jobs], encoded)
+        return index
+
+    def __getstate__(self):
+        # The inverted lists are rebuilt on demand rather than cached
+        return {**self.__dict__, '_postings': None}
+
+    def encode(self, features):
+        """(columns, weights) of one job's features, unit length; unknown features are dropped."""
+        columns, weights = [], []
+        for feature, weight in features.items():
+            column = self.vocabulary.get(feature)
+            if column is not None:
+                columns.append(column)
+                weights.append(self.token_weights[feature] if weight is None else weight)
+        weights = np.asarray(weights, dtype=np.float32)
+        norm = np.linalg.norm(weights)
+        return np.asarray(columns, dtype=np.int32), weights / norm if norm else weights
+
+    def replace(self, removed_ids, job_ids, features):
+        """Drop the rows of ``removed_ids`` and (re-)encode ``job_ids`` with their ``features``."""
+        dropped = set(removed_ids) | set(job_ids)
+        keep = np.fromiter((job_id not in dropped for job_id in self.job_ids), dtype=bool,
+                           count=len(self.job_ids))
+        lengths = np.diff(self.indptr)
+        kept_values = np.repeat(keep, lengths)
+        encoded = [self.encode(weights) for weights in features]
+
+        self.indices = np.concatenate([self.indices[kept_values], *[columns for columns, _ in encoded]])
+        self.data = np.concatenate([self.data[kept_values], *[weights for _, weights in encoded]])
+        self.indptr = np.concatenate([[0], np.cumsum(np.concatenate([
+            lengths[keep], np.array([len(columns) for columns, _ in encoded], dtype=np.int64)]))])
+        self.job_ids = [job_id for job_id, kept in zip(self.job_ids, keep) if kept] + list(job_ids)
+        self._postings = None
+
+    def _inverted(self):
+        """(column pointers, rows, weights): the matrix in CSC form."""
+        if self._postings is None:
+            rows = np.repeat(np.arange(len(self.job_ids)), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind='stable')
+            pointers = np.searchsorted(self.indices[order], np.arange(len(self.vocabulary) + 1))
+            self._postings = (pointers, rows[order], self.data[order])
+        return self._postings
+
+    def scores(self, row):
+        """Cosine similarity of the job in ``row`` with every job."""
+        pointers, rows, weights = self._inverted()
+        scores = np.zeros(len(self.job_ids), dtype=np.float32)
+        start, end = self.indptr[row], self.indptr[row + 1]
+        for column, weight in zip(self.indices[start:end], self.data[start:end]):
+            first, last = pointers[column], pointers[column + 1]
+            scores[rows[first:last]] += weight * weights[first:last]  # a column lists each row once
+        return scores
+
+
+def load_index():
+    """The cached feature index, built from scratch if the cache lost it."""
+    index = cache.get(INDEX_KEY)
+    if index is None:
+        index = FeatureIndex.build()
+        cache.set(INDEX_KEY, index, timeout=None)
+    return index
+
+
+def top_neighbours(index, rows, k=TOP_K):
+    """
+    Yield (row, neighbour rows, scores) for the given rows, best first.
+    argpartition picks the k best per row without sorting the whole row.
+    """
+    k = min(k, len(index.job_ids) - 1)
+    if k <= 0:
+        return
+    for row in rows:
+        scores = index.scores(row)
+        scores[row] = -np.inf  # A job is not its own neighbour
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        best = best[scores[best] > 0]
+        yield row, best, scores[best]
+
+
+def _store(index, rows):
+    job_ids = index.job_ids
+    entries = [
+        SimilarJob(job_id=job_ids[row], similar_id=job_ids[neighbour], score=float(score), rank=rank)
+        for row, neighbours, scores in top_neighbours(index, rows)
+        for rank, (neighbour, score) in enumerate(zip(neighbours, scores), start=1)
+    ]
+    with transaction.atomic():
+        SimilarJob.objects.filter(job_id__in=[job_ids[row] for row in rows]).delete()
+        SimilarJob.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def rebuild_similar_jobs():
+    """Re-derive the index and the neighbours of every published job; returns the rows stored."""
+    index = FeatureIndex.build()
+    cache.set(INDEX_KEY, index, timeout=None)
+    cache.set(WATERMARK_KEY, timezone.now() - WATERMARK_OVERLAP, timeout=None)
+    with transaction.atomic():
+        SimilarJob.objects.exclude(job_id__in=index.job_ids).delete()
+        return _store(index, range(len(index.job_ids)))
+
+
+def refresh_similar_jobs(changed_ids=()):
+    """
+    Incrementally update recommendations after jobs were published, closed,
+    deleted or edited.
+
+    The index is brought in line with the published set: jobs that left it
+    are dropped, and jobs that joined it, ``changed_ids`` and jobs updated
+    since the last refresh are (re-)encoded. Recomputed rows: those jobs,
+    jobs that listed a job that is gone or (re-)encoded, and jobs for which
+    a (re-)encoded job scores above their current k-th neighbour.
+    """
+    started = timezone.now()
+    index = load_index()
+    published_ids = set(JobPost.objects.filter(status='published').values_list('id', flat=True))
+    indexed = set(index.job_ids)
+    gone = indexed - published_ids
+    changed = (published_ids - indexed) | (set(changed_ids) & published_ids)
+    since = cache.get(WATERMARK_KEY)
+    if since is not None:
+        changed.update(JobPost.objects.filter(status='published', updated_at__gte=since).values_list(
+            'id', flat=True))
+
+    jobs, tags = [], defaultdict(list)
+    changed = sorted(changed)
+    for start in range(0, len(changed), LOOKUP_BATCH_SIZE):
+        batch_jobs, batch_tags = _load_jobs(id__in=changed[start:start + LOOKUP_BATCH_SIZE])
+        jobs += batch_jobs
+        tags.update(batch_tags)
+    index.replace(gone, [job['id'] for job in jobs], [job_features(job, tags[job['id']]) for job in jobs])
+    cache.set(INDEX_KEY, index, timeout=None)
+    # Overlap: a job saved just before ``started`` may commit after the reads above
+    cache.set(WATERMARK_KEY, started - WATERMARK_OVERLAP, timeout=None)
+
+    position = {job_id: row for row, job_id in enumerate(index.job_ids)}
+    encoded = [position[job['id']] for job in jobs]
+    affected = set(encoded)
+    # Jobs listing a job that is gone or was re-encoded: its stored score may
+    # have dropped, which the threshold check below cannot see
+    listed = sorted(gone) + [job['id'] for job in jobs]
+    for start in range(0, len(listed), LOOKUP_BATCH_SIZE):
+        affected.update(position[job_id] for job_id in SimilarJob.objects.filter(
+            similar_id__in=listed[start:start + LOOKUP_BATCH_SIZE]).values_list('job_id', flat=True)
+            if job_id in position)
+    if gone:
+        SimilarJob.objects.filter(job_id__in=gone).delete()
+
+    if encoded:
+        # Best score any (re-)encoded job reaches with each job; only jobs it
+        # scores above zero can gain it as a neighbour
+        best = np.zeros(len(index.job_ids), dtype=np.float32)
+        for row in encoded:
+            np.maximum(best, index.scores(row), out=best)
+        candidates = [row for row in np.flatnonzero(best > 0).tolist() if row not in affected]
+
+        # Lowest stored score of each candidate; fewer than k neighbours take anything
+        thresholds = {}
+        candidate_ids = [index.job_ids[row] for row in candidates]
+        for start in range(0, len(candidate_ids), LOOKUP_BATCH_SIZE):
+            for entry in SimilarJob.objects.filter(
+                    job_id__in=candidate_ids[start:start + LOOKUP_BATCH_SIZE]).values('job_id').annotate(
+                    lowest=Min('score'), count=Count('id')):
+                if entry['count'] >= TOP_K:
+                    thresholds[entry['job_id']] = entry['lowest']
+        affected.update(row for row in candidates if best[row] > thresholds.get(index.job_ids[row], 0))
+
+    if not affected:
+        return 0
+    return _store(index, sorted(affected))
@@ -0,0 +1,72 @@
+"""
+Due-time scheduling of daily and weekly job alert digests.
+
+The day is split into fixed slots. Every alert is pinned to one slot,
+derived from its preferred local send hour and a hash of its id, so each
+beat tick only processes the alerts due in that slot and the load spreads
+evenly across the day.
+"""
+import uuid
+from datetime import timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.utils import timezone  # type: ignore
+
+# Length of a scheduling slot; the beat entry runs once per slot
+SLOT_MINUTES = 15
+SLOTS_PER_HOUR = 60 // SLOT_MINUTES
+SLOTS_PER_DAY = 24 * SLOTS_PER_HOUR
+
+# How far back the first digest of an alert looks for jobs
+FIRST_DIGEST_LOOKBACK = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(days=7),
+}
+
+
+def get_zone(name):
+    """Return the ZoneInfo for ``name``, falling back to UTC when unknown."""
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo('UTC')
+
+
+def slot_minute(alert):
+    """Minutes after local midnight at which the alert's digest is due."""
+    spread = uuid.UUID(str(alert.id)).int
+
+    if alert.send_hour is None:
+        # No preference: spread alerts over every slot of the day
+        return (spread % SLOTS_PER_DAY) * SLOT_MINUTES
+
+    # Keep the preferred hour, but spread alerts over the slots inside it
+    return alert.send_hour * 60 + (spread % SLOTS_PER_HOUR) * SLOT_MINUTES
+
+
+def compute_next_send_at(alert, after=None):
+    """
+    Return the first due time (in UTC) strictly after ``after``.
+
+    Instant alerts are never scheduled and return None.
+    """
+    if alert.frequency not in FIRST_DIGEST_LOOKBACK:
+        return None
+
+    local_now = (after or timezone.now()).astimezone(get_zone(alert.timezone))
+    minute = slot_minute(alert)
+    due = local_now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+    if due <= local_now:
+        due += timedelta(days=1)
+
+    if alert.frequency == 'weekly':
+        # Weekly digests also get a fixed weekday derived from the alert id
+        weekday = (uuid.UUID(str(alert.id)).int // SLOTS_PER_DAY) % 7
+        due += timedelta(days=(weekday - due.weekday()) % 7)
+
+    return due.astimezone(dt_timezone.utc)
+
+
+def digest_window_start(alert, now):
+    """Return the earliest publish time a digest for ``alert`` should include."""
+    return alert.last_sent_at or now - FIRST_DIGEST_LOOKBACK[alert.frequency]
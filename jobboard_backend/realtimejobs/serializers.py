@@ -2,6 +2,8 @@ from rest_framework import serializers  # type: ignore
 from django.contrib.auth import get_user_model  # type: ignore
 from django.contrib.auth.password_validation import validate_password  # type: ignore
 from .models import *
+from .canonical import job_url_hash
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 User = get_user_model()
 
@@ -190,10 +192,61 @@ class JobPostSerializer(serializers.HyperlinkedModelSerializer):
         fields = [
             'url', 'id', 'job_url', 'title', 'slug', 'location', 'is_worldwide',
             'category', 'job_type', 'salary', 'description', 'short_description',
-            'company', 'tags', 'created_at', 'updated_at', 'status'
+            'company', 'tags', 'created_at', 'updated_at', 'status',
+            'saves_count', 'applications_count'
         ]
         # These fields should not be editable
-        read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'slug', 'created_at', 'updated_at',
+                            'saves_count', 'applications_count']
+
+    def validate_job_url(self, value):
+        """Reject a URL that is the same posting as an existing job post."""
+        duplicates = JobPost.objects.filter(job_url_hash=job_url_hash(value))
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("A job post with this URL already exists.")
+        return value
+
+
+class JobSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact, read-only representation of a job post for lists and previews.
+    """
+    company_name = serializers.CharField(source='company.name', read_only=True)
+
+    class Meta:
+        model = JobPost
+        fields = ['id', 'title', 'slug', 'company_name', 'location',
+                  'is_worldwide', 'status', 'published_at']
+        read_only_fields = fields
+
+
+class JobPostBatchItemSerializer(serializers.ModelSerializer):
+    """
+    Job post with its related names inlined, for the batch endpoint.
+    Expects category, job type and company selected and tags prefetched.
+    """
+    category = serializers.CharField(source='category.name', read_only=True)
+    job_type = serializers.CharField(source='job_type.name', read_only=True)
+    company_name = serializers.CharField(source='company.name', read_only=True)
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+
+    class Meta:
+        model = JobPost
+        fields = ['id', 'job_url', 'title', 'slug', 'location', 'is_worldwide',
+                  'category', 'job_type', 'company_name', 'salary', 'short_description',
+                  'tags', 'status', 'created_at', 'published_at',
+                  'saves_count', 'applications_count']
+        read_only_fields = fields
+
+
+class JobPostBatchSerializer(serializers.Serializer):
+    """
+    Input of the batch endpoint: job ids or slugs, in the order wanted back.
+    """
+    jobs = serializers.ListField(
+        child=serializers.CharField(max_length=255), min_length=1, max_length=100)
 
 
 class JobInteractionSerializer(serializers.HyperlinkedModelSerializer):
@@ -218,6 +271,42 @@ class JobInteractionSerializer(serializers.HyperlinkedModelSerializer):
         read_only_fields = ['id', 'timestamp']
 
 
+class JobInteractionSummarySerializer(serializers.ModelSerializer):
+    """
+    A user's interaction with the job summary embedded, for paginated lists.
+    """
+    job = JobSummarySerializer(read_only=True)
+
+    class Meta:
+        model = JobInteraction
+        fields = ['id', 'status', 'timestamp', 'job']
+        read_only_fields = fields
+
+
+class JobInteractionItemSerializer(serializers.Serializer):
+    """
+    One (job, status) pair of a bulk interaction request.
+    """
+    job = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=JobInteraction.STATUS_CHOICES)
+
+
+class JobInteractionBulkSerializer(serializers.Serializer):
+    """
+    Input of the bulk save/apply endpoint.
+    """
+    interactions = serializers.ListField(
+        child=JobInteractionItemSerializer(), min_length=1, max_length=100)
+
+
+class JobInteractionStatusSerializer(serializers.Serializer):
+    """
+    Input of the interaction-status lookup: the job ids shown on a page.
+    """
+    jobs = serializers.ListField(
+        child=serializers.UUIDField(), min_length=1, max_length=200)
+
+
 class JobAlertSerializer(serializers.HyperlinkedModelSerializer):
     """
     Serializer for JobAlert model.
@@ -240,11 +329,36 @@ class JobAlertSerializer(serializers.HyperlinkedModelSerializer):
         model = JobAlert
         fields = [
             'url', 'id', 'user', 'email', 'is_active', 'categories', 'job_types',
-            'location', 'created_at', 'updated_at'
+            'location', 'frequency', 'send_hour', 'timezone', 'next_send_at',
+            'last_sent_at', 'created_at', 'updated_at'
         ]
-        # Ensures ID and timestamps remain immutable
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        # Ensures ID, schedule bookkeeping and timestamps remain immutable
+        read_only_fields = ['id', 'user', 'next_send_at', 'last_sent_at',
+                            'created_at', 'updated_at']
 
+    def validate_timezone(self, value):
+        """
+        Ensure the time zone is a known IANA zone name.
+        """
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown time zone.")
+        return value
+
+
+class JobAlertPreviewSerializer(serializers.Serializer):
+    """
+    Input of the job alert preview: the filters of a (not yet saved) alert.
+    """
+    categories = serializers.ListField(
+        child=serializers.UUIDField(), required=False, default=list)
+    job_types = serializers.ListField(
+        child=serializers.UUIDField(), required=False, default=list)
+    location = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True, default=None)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=50, default=10)
 
 
 class PaymentSerializer(serializers.ModelSerializer):
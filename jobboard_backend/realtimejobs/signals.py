@@ -0,0 +1,161 @@
+from django.core.cache import cache  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete  # type: ignore
+from django.dispatch import Signal, receiver  # type: ignore
+
+from realtimejobs import alerts, listings, personalization, recommendations
+from realtimejobs.counters import record_interaction
+from realtimejobs.interactions import invalidate_user_interactions
+from realtimejobs.models import Category, Company, JobAlert, JobInteraction, JobPost, JobType, Tag
+
+# Sent after job posts go live; receivers get ``jobs``, a list of JobPost.
+jobs_published = Signal()
+
+# Sent after published job posts are taken down; same ``jobs`` argument.
+jobs_closed = Signal()
+
+
+# **************** JOB ALERT INDEX ************************
+
+@receiver(post_save, sender=JobAlert)
+def reindex_job_alert(sender, instance, **kwargs):
+    """Keep the reverse alert index in sync with the alert itself."""
+    alerts.index_alert(instance)
+
+
+@receiver(m2m_changed, sender=JobAlert.categories.through)
+@receiver(m2m_changed, sender=JobAlert.job_types.through)
+def reindex_job_alert_filters(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-index alerts whose category or job type filters changed."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        alerts.index_alert(instance)
+    elif pk_set:
+        for alert in JobAlert.objects.filter(id__in=pk_set):
+            alerts.index_alert(alert)
+
+
+# **************** JOB PUBLISHING ************************
+
+@receiver(jobs_published, sender=JobPost)
+def notify_instant_alerts(sender, jobs, **kwargs):
+    """Match newly published jobs against instant alerts."""
+    alerts.enqueue_instant_alerts(jobs)
+
+
+@receiver(jobs_published, sender=JobPost)
+@receiver(jobs_closed, sender=JobPost)
+def refresh_recommendations(sender, jobs, **kwargs):
+    """
+    Recompute the similar-jobs neighbours the changed jobs affect. A burst of
+    events (an import, an expiry run) shares one delayed refresh, which
+    finds the changed jobs itself.
+    """
+    from realtimejobs.tasks import refresh_similar_jobs
+
+    def schedule():
+        if cache.add(recommendations.REFRESH_SCHEDULED_KEY, 1, recommendations.REFRESH_DELAY * 10):
+            refresh_similar_jobs.apply_async(kwargs={'job_ids': []}, countdown=recommendations.REFRESH_DELAY)
+    transaction.on_commit(schedule)
+
+
+@receiver(jobs_published, sender=JobPost)
+@receiver(jobs_closed, sender=JobPost)
+def refresh_static_feeds(sender, jobs, **kwargs):
+    """Rewrite the sitemap shards and feeds the changed jobs appear in."""
+    from realtimejobs.tasks import update_static_feeds
+
+    job_ids = [str(job.id) for job in jobs]
+    transaction.on_commit(lambda: update_static_feeds.delay(job_ids))
+
+
+@receiver(jobs_published, sender=JobPost)
+@receiver(jobs_closed, sender=JobPost)
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def invalidate_facet_index(sender, **kwargs):
+    """Any job write may change the published set the facet index covers."""
+    transaction.on_commit(alerts.invalidate_published_facet_index)
+
+
+# **************** JOB LISTINGS ************************
+
+@receiver(post_save, sender=JobPost)
+def sync_job_listing(sender, instance, **kwargs):
+    """Rewrite (or drop, if not published) the job's listing row."""
+    listings.sync_jobs([instance.id])
+
+
+@receiver(jobs_published, sender=JobPost)
+@receiver(jobs_closed, sender=JobPost)
+def sync_job_listings(sender, jobs, **kwargs):
+    """Bulk status changes bypass post_save."""
+    listings.sync_jobs([job.id for job in jobs])
+
+
+@receiver(m2m_changed, sender=JobPost.tags.through)
+def sync_job_listing_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-sync the tag names of jobs whose tags changed, from either side."""
+    if action == 'pre_clear' and reverse:
+        # The cleared jobs are unknown after the fact
+        instance._listing_job_ids = list(instance.job_posts.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        listings.sync_jobs([instance.id])
+    elif action == 'post_clear':
+        listings.sync_jobs(getattr(instance, '_listing_job_ids', []))
+    elif pk_set:
+        listings.sync_jobs(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=JobType)
+@receiver(post_save, sender=Company)
+def rename_job_listings(sender, instance, created, **kwargs):
+    if not created:
+        listings.rename(instance)
+
+
+@receiver(post_save, sender=Tag)
+def retag_job_listings(sender, instance, created, **kwargs):
+    """A renamed tag changes the tag list of every published job carrying it."""
+    if not created:
+        listings.sync_jobs(instance.job_posts.filter(status='published').values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_jobs(sender, instance, **kwargs):
+    # Deleting a tag removes its job links without sending m2m_changed
+    instance._listing_job_ids = list(instance.job_posts.filter(status='published').values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def untag_job_listings(sender, instance, **kwargs):
+    listings.sync_jobs(getattr(instance, '_listing_job_ids', []))
+
+
+# **************** JOB INTERACTIONS ************************
+
+@receiver(post_save, sender=JobInteraction)
+@receiver(post_delete, sender=JobInteraction)
+def invalidate_interaction_flags(sender, instance, **kwargs):
+    """Drop the user's cached interaction flags once the change is committed."""
+    transaction.on_commit(lambda: invalidate_user_interactions(instance.user_id))
+
+
+@receiver(post_save, sender=JobInteraction)
+def count_created_interaction(sender, instance, created, **kwargs):
+    """Buffer the job's saved/applied counter increment (ORM writes only)."""
+    if created:
+        transaction.on_commit(lambda: record_interaction(instance.job_id, instance.status))
+        personalization.record_interaction(instance.user_id, instance.job_id, instance.status)
+
+
+@receiver(post_delete, sender=JobInteraction)
+def count_deleted_interaction(sender, instance, **kwargs):
+    transaction.on_commit(lambda: record_interaction(instance.job_id, instance.status, -1))
+    personalization.record_interaction(instance.user_id, instance.job_id, instance.status, -1)
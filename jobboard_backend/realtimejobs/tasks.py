@@ -1,121 +1,359 @@
-from realtimejobs.models import JobAlert, JobPost, Payment
-from realtimejobs.queries.job_alert_queries import JobAlertQueries
+from realtimejobs.models import EmailOutbox, JobAlert, JobPost, Payment
+from realtimejobs.payments import (AsyncChapaClient, PaymentGatewayError, build_initialize_payload,
+                                   confirm_payments, decline_payments, get_chapa_client,
+                                   is_payment_successful)
 from celery import shared_task  # type: ignore
-from django.core.mail import send_mail, send_mass_mail  # type: ignore
 from django.conf import settings  # type: ignore
-from collections import defaultdict
-from django.db.models import Q  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.core.mail import EmailMessage, get_connection  # type: ignore
+from django.db import transaction  # type: ignore
+from django.db.models import F  # type: ignore
+from realtimejobs.alerts import FacetIndex
+from realtimejobs.emails import job_alert_email, queue_emails
+from realtimejobs.scheduling import compute_next_send_at, digest_window_start
+from realtimejobs.trending import compute_trending
+from realtimejobs import archival, feeds, personalization, recommendations
+from realtimejobs import metrics
+from datetime import timedelta
 from django.utils import timezone  # type: ignore
+import asyncio
+import uuid
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def send_subscription_email(job_alert_id):
-    """Sends a confirmation email when a user subscribes to job alerts."""
-    job_alert = JobAlert.objects.get(id=job_alert_id)
-
-    # unsubscribe_url = f"https://yourwebsite.com{reverse('unsubscribe', args=[job_alert.id])}"
-    subject = "You're Subscribed to RealtimeJobs Alerts!"
-    message = f"""
-    Hi {job_alert.user.full_name},
+# Delivery attempts before an outbox email is given up on
+OUTBOX_MAX_ATTEMPTS = 5
 
-    You have successfully subscribed to RealtimeJob job alerts. We will send you job updates based on your preferences.
+# Serializes static feed updates (seconds the lock survives a crashed worker)
+FEEDS_LOCK_KEY = "feeds:update-lock"
+FEEDS_LOCK_TTL = 10 * 60
 
-    If you ever want to unsubscribe, click the link below:
-    # 
-
-    Best,
-    Realtimejobs Board Team
-    """
-
-    send_mail(subject, message, settings.EMAIL_HOST_USER, [job_alert.email])
+# Serializes recommendation refreshes: the cached feature index is read-modify-write
+RECOMMENDATIONS_LOCK_KEY = "recommendations:refresh-lock"
+RECOMMENDATIONS_LOCK_TTL = 30 * 60
 
 
 @shared_task
-def send_periodic_job_alerts():
-    """Efficiently fetch job alerts and send batch emails to thousands of users."""
-
+def send_instant_job_alerts(job_id, alert_ids):
+    """Queues a newly published job for the instant alerts it matched."""
+    job = JobPost.objects.get(id=job_id)
     alerts = JobAlert.objects.filter(
-        is_active=True).prefetch_related('categories', 'job_types')
-    print(f"Found {alerts.count()} active job alerts.")
+        id__in=alert_ids, is_active=True).select_related('user')
+
+    with transaction.atomic():
+        queue_emails(
+            job_alert_email(alert, [job], dedup_key=f"alert:{alert.id}:job:{job.id}")
+            for alert in alerts
+        )
+
+
+def _schedule_unscheduled_alerts(now, batch_size):
+    """Give the daily/weekly alerts saved before due-time scheduling their first slot."""
+    scheduled = 0
+    while True:
+        alerts = list(JobAlert.objects.filter(
+            frequency__in=[JobAlert.FREQUENCY_DAILY, JobAlert.FREQUENCY_WEEKLY], next_send_at=None,
+        ).only('id', 'frequency', 'send_hour', 'timezone')[:batch_size])
+        if not alerts:
+            return scheduled
+        for alert in alerts:
+            alert.next_send_at = compute_next_send_at(alert, now)
+        JobAlert.objects.bulk_update(alerts, ['next_send_at'])
+        scheduled += len(alerts)
 
-    # Fetch all job posts once, reducing repetitive queries
-    all_jobs = JobPost.objects.all().order_by(
-        '-created_at')[:100]  # Fetch 100 latest jobs in bulk
 
-    # Categorize jobs based on category, job type, and location
-    categorized_jobs = defaultdict(list)
+@shared_task
+def send_periodic_job_alerts(batch_size=500):
+    """Queues digests for the daily/weekly alerts whose scheduled slot is due."""
+    now = timezone.now()
+    started = time.perf_counter()
+    processed = queued = 0
+
+    scheduled = _schedule_unscheduled_alerts(now, batch_size)
+    if scheduled:
+        logger.info("Scheduled the first digest of %d existing alerts", scheduled)
+
+    while True:
+        with metrics.stage("alerts.digest.load_alerts_seconds"):
+            due_alerts = list(
+                JobAlert.objects.filter(
+                    is_active=True,
+                    frequency__in=[JobAlert.FREQUENCY_DAILY, JobAlert.FREQUENCY_WEEKLY],
+                    next_send_at__lte=now,
+                ).select_related('user').prefetch_related('categories', 'job_types')
+                .order_by('next_send_at')[:batch_size]
+            )
+        if not due_alerts:
+            break
+
+        # One query for every job any alert of this batch may need
+        with metrics.stage("alerts.digest.load_jobs_seconds"):
+            window_start = min(digest_window_start(alert, now) for alert in due_alerts)
+            recent_jobs = JobPost.objects.filter(
+                status='published', published_at__gt=window_start
+            ).order_by('-published_at')[:500]
+            index = FacetIndex(recent_jobs)
+
+        emails = []
+        matches = 0
+        with metrics.stage("alerts.digest.match_seconds"):
+            for alert in due_alerts:
+                cutoff = digest_window_start(alert, now)
+                jobs = [
+                    job for job in index.iter_jobs(index.match_alert(alert))
+                    if job.published_at > cutoff
+                ]
+                matches += len(jobs)
+
+                # If no matching jobs, fall back to the latest ones
+                if not jobs:
+                    jobs = [job for job in index.jobs[:5] if job.published_at > cutoff]
+
+                if jobs:
+                    # The due slot identifies the digest, so a re-run never mails twice
+                    dedup_key = f"digest:{alert.id}:{alert.next_send_at.isoformat()}"
+                    emails.append(job_alert_email(alert, jobs, dedup_key=dedup_key))
+
+                alert.last_sent_at = now
+                alert.next_send_at = compute_next_send_at(alert, now)
+
+        # Queue the digests together with the schedule update
+        with metrics.stage("alerts.digest.queue_seconds"), transaction.atomic():
+            queued += queue_emails(emails)
+            JobAlert.objects.bulk_update(due_alerts, ['last_sent_at', 'next_send_at'])
+
+        processed += len(due_alerts)
+        metrics.incr("alerts.digest.processed", len(due_alerts))
+        metrics.incr("alerts.digest.matches", matches)
+
+    elapsed = time.perf_counter() - started
+    if processed:
+        metrics.gauge("alerts.digest.alerts_per_second", round(processed / elapsed, 2))
+    logger.info("Job alert run finished: %d due alerts, %d digests queued in %.2fs",
+                processed, queued, elapsed)
 
-    for job in all_jobs:
-        categorized_jobs[(job.category_id, job.job_type_id,
-                          job.location)].append(job)
-        if job.is_worldwide:
-            categorized_jobs[(job.category_id, job.job_type_id, None)].append(
-                job)  # Handle worldwide jobs
 
-    email_messages = []
+@shared_task
+def dispatch_email_outbox(batch_size=100, max_batches=20):
+    """
+    Delivers pending outbox emails in batches over a single SMTP connection.
 
-    for alert in alerts:
-        print(f"Processing alert for: {alert.email}")
+    Rows are locked with SKIP LOCKED, so concurrent dispatchers never pick
+    up the same email, and a row is only marked sent after delivery.
+    """
+    connection = get_connection()
+    delivered = 0
+
+    try:
+        connection.open()
+        for _ in range(max_batches):
+            with transaction.atomic():
+                batch = list(
+                    EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                        status=EmailOutbox.STATUS_PENDING,
+                        available_at__lte=timezone.now(),
+                    ).order_by('id')[:batch_size]
+                )
+                if not batch:
+                    break
+
+                sent_ids, failed = [], []
+                for email in batch:
+                    message = EmailMessage(email.subject, email.body, email.from_email,
+                                           [email.recipient], connection=connection)
+                    try:
+                        message.send(fail_silently=False)
+                        sent_ids.append(email.id)
+                    except Exception as exc:
+                        failed.append((email, exc))
+
+                EmailOutbox.objects.filter(id__in=sent_ids).update(
+                    status=EmailOutbox.STATUS_SENT, sent_at=timezone.now())
+                for email, exc in failed:
+                    logger.warning("Outbox email %s failed: %s", email.id, exc)
+                    _record_failure(email, exc)
+                delivered += len(sent_ids)
+                metrics.incr("emails.sent", len(sent_ids))
+                metrics.incr("emails.failed", len(failed))
+    finally:
+        connection.close()
+
+    return delivered
+
+
+def _record_failure(email, exc):
+    """Schedules a retry with exponential backoff, or gives up on the email."""
+    attempts = email.attempts + 1
+    EmailOutbox.objects.filter(id=email.id).update(
+        attempts=F('attempts') + 1,
+        last_error=str(exc)[:1000],
+        available_at=timezone.now() + timedelta(minutes=2 ** attempts),
+        status=(EmailOutbox.STATUS_FAILED if attempts >= OUTBOX_MAX_ATTEMPTS
+                else EmailOutbox.STATUS_PENDING),
+    )
 
-        user_categories = alert.categories.values_list('id', flat=True)
-        user_job_types = alert.job_types.values_list('id', flat=True)
 
-        jobs = [
-            job for (category_id, job_type_id, location), job_list in categorized_jobs.items()
-            if str(category_id) in user_categories and str(job_type_id) in user_job_types and (alert.location == location or location is None)
-        ]
+@shared_task(bind=True, max_retries=5)
+def initialize_job_payment(self, payment_id):
+    """
+    Obtains the Chapa checkout URL for a draft job post's payment.
 
-        # If no matching jobs, fetch the latest ones
-        if not jobs:
-            jobs = list(all_jobs[:5])  # Fallback to latest 5 jobs
+    The client polls the job's payment-status endpoint until the URL is
+    ready, so job post creation never waits on the gateway.
+    """
+    payment = Payment.objects.get(id=payment_id)
+    if payment.init_status != 'queued':
+        return  # Already handled by an earlier (retried) run
+
+    try:
+        data = get_chapa_client().initialize(build_initialize_payload(payment))
+    except PaymentGatewayError as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+        data = {"message": str(exc)}
+
+    checkout_url = (data.get('data') or {}).get('checkout_url')
+    if data.get('status') == 'success' and checkout_url:
+        Payment.objects.filter(id=payment.id, init_status='queued').update(
+            init_status='ready', checkout_url=checkout_url)
+    else:
+        Payment.objects.filter(id=payment.id, init_status='queued').update(
+            init_status='failed', init_error=str(data.get('message') or 'Payment initialization failed')[:255])
 
-        if jobs:
-            subject = f"🔥 RealtimeJobs New Job Alert - {timezone.now().strftime('%b %d, %Y')}"
 
-            job_list_text = "\n\n".join(
-                f"{job.title}\n{job.short_description}\nLocation: {job.location}\nLink: https://yourwebsite.com/jobs/{job.slug}"
-                for job in jobs[:5]  # Limit to 5 per user
-            )
+@shared_task
+def reconcile_pending_payments(batch_size=100, concurrency=8, max_batches=10):
+    """
+    Verifies stale pending payments with the gateway.
 
-            message = f"""Hello {alert.user.full_name},
+    Each batch is verified concurrently with at most ``concurrency``
+    requests in flight, then paid transactions are confirmed and expired
+    unpaid ones declined with one bulk update each.
+    """
+    now = timezone.now()
+    stale_before = now - settings.PAYMENT_RECONCILE_AFTER
+    expire_before = now - settings.PAYMENT_PENDING_EXPIRY
+    client = AsyncChapaClient()
+    last_id = 0
+    confirmed = declined = 0
+
+    for _ in range(max_batches):
+        batch = list(
+            Payment.objects.filter(
+                payment_status='pending', timestamp__lt=stale_before, id__gt=last_id
+            ).order_by('id').values_list('id', 'tx_ref', 'timestamp')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        with metrics.stage("payments.reconcile.verify_seconds"):
+            results = asyncio.run(client.verify_many(
+                [tx_ref for _, tx_ref, _ in batch], concurrency=concurrency))
+
+        paid, expired, errors = [], [], 0
+        for _, tx_ref, created in batch:
+            result = results[tx_ref]
+            if isinstance(result, PaymentGatewayError):
+                errors += 1  # Left pending; retried on the next run
+            elif is_payment_successful(result):
+                paid.append(tx_ref)
+            elif created < expire_before:
+                expired.append(tx_ref)
+
+        confirmed += len(confirm_payments(paid))
+        declined += decline_payments(expired)
+        metrics.incr("payments.reconcile.gateway_errors", errors)
+
+        if errors == len(batch):
+            break  # Gateway is down; don't burn through the remaining batches
+
+    logger.info("Payment reconciliation finished: %d confirmed, %d declined", confirmed, declined)
+    return confirmed, declined
 
-Here are the latest job postings for you:
-{job_list_text}
 
-View more jobs here: https://yourwebsite.com/jobs
+@shared_task
+def compute_trending_jobs():
+    """Rebuilds the precomputed trending jobs ranking."""
+    with metrics.stage("trending.compute_seconds"):
+        ranked = compute_trending()
+    logger.info("Trending ranking rebuilt with %d jobs", ranked)
+    return ranked
 
-To unsubscribe, click here: https://yourwebsite.com/unsubscribe/{alert.id}
 
-Best,
-RealtimeJobs Team
-            """
+@shared_task(bind=True, max_retries=10)
+def refresh_similar_jobs(self, job_ids=None):
+    """
+    Updates the similar-jobs recommendations.
+    With ``job_ids`` (possibly empty) the refresh is incremental: the index
+    catches up with every publish, close and edit since the last run, and
+    only the neighbourhoods those jobs touch are recomputed. Without, every
+    published job is rebuilt. One run at a time.
+    """
+    if not cache.add(RECOMMENDATIONS_LOCK_KEY, 1, RECOMMENDATIONS_LOCK_TTL):
+        raise self.retry(countdown=recommendations.REFRESH_DELAY)
+    try:
+        with metrics.stage("recommendations.refresh_seconds"):
+            if job_ids is None:
+                stored = recommendations.rebuild_similar_jobs()
+            else:
+                # Events from now on schedule a new run; this one already sees them
+                cache.delete(recommendations.REFRESH_SCHEDULED_KEY)
+                stored = recommendations.refresh_similar_jobs(
+                    [uuid.UUID(str(job_id)) for job_id in job_ids])
+    finally:
+        cache.delete(RECOMMENDATIONS_LOCK_KEY)
+    logger.info("Similar jobs refreshed: %d neighbour rows stored", stored)
+    return stored
 
-            email_messages.append(
-                (subject, message, settings.EMAIL_HOST_USER, [alert.email]))
 
-    if email_messages:
-        send_mass_mail(email_messages, fail_silently=False)
-        print(f"✅ Sent {len(email_messages)} job alert emails successfully.")
+@shared_task
+def update_preference_profile(user_id, job_id, status, delta=1):
+    """Folds a saved/applied change into the user's feed preference profile."""
+    personalization.apply_interaction(user_id, uuid.UUID(job_id), status, delta)
 
-    print("📬 Job alert task completed.")
 
+@shared_task(bind=True, max_retries=10)
+def update_static_feeds(self, job_ids=None):
+    """
+    Writes publish/close changes of ``job_ids`` to the static sitemaps and
+    feeds; without ``job_ids`` everything is regenerated.
+    One run at a time: the shard manifest is read-modify-write.
+    """
+    if not cache.add(FEEDS_LOCK_KEY, 1, FEEDS_LOCK_TTL):
+        raise self.retry(countdown=5 + self.request.retries * 5)
+    try:
+        with metrics.stage("feeds.update_seconds"):
+            if job_ids is None:
+                shards, feed_count = feeds.build_all()
+                logger.info("Static feeds rebuilt: %d sitemap shards, %d feeds", shards, feed_count)
+            else:
+                feeds.update_for_jobs([uuid.UUID(str(job_id)) for job_id in job_ids])
+    finally:
+        cache.delete(FEEDS_LOCK_KEY)
 
-def send_payment_success_email(email, job_title):
-    subject = "Payment Successful -Your Job Post has been Published"
-    message = f"Dear User,\n\nYour payment has been successfully processed, and your job post '{job_title}' is now live on RealtimeJobs.\n\nThank you for using our platform.\n\nBest regards,\nRealtimeJobs Team"
 
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        fail_silently=False,
-    )
+@shared_task
+def expire_old_jobs(batch_size=1000, max_batches=50):
+    """Closes published jobs past JOB_EXPIRY_DAYS in chunked UPDATEs."""
+    with metrics.stage("jobs.expire_seconds"):
+        closed = archival.expire_jobs(batch_size, max_batches)
+    metrics.incr("jobs.expired", closed)
+    logger.info("Expired %d job posts", closed)
+    return closed
 
 
 @shared_task
-def process_successful_payment(tx_ref):
-    payment = Payment.objects.get(tx_ref=tx_ref)
-    if payment.payment_status == 'success':
-        job_post = payment.job_post
-        send_payment_success_email(payment.email, job_post.title)
+def archive_closed_jobs(batch_size=500, max_batches=20):
+    """
+    Moves jobs closed for more than JOB_ARCHIVE_AFTER_DAYS, and their
+    interactions, into the archive tables. Bounded per run; a backlog is
+    worked off over several runs.
+    """
+    with metrics.stage("jobs.archive_seconds"):
+        archived = archival.archive_jobs(batch_size, max_batches)
+    metrics.incr("jobs.archived", archived)
+    logger.info("Archived %d job posts", archived)
+    return archived
@@ -1,3 +1,579 @@
-from django.test import TestCase #type: ignore
+import hashlib
+import hmac
+import io
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.contrib.auth import get_user_model  # type: ignore
+from django.core.cache import cache  # type: ignore
+from django.core.management import call_command  # type: ignore
+from django.db import IntegrityError, OperationalError  # type: ignore
+from django.http import JsonResponse  # type: ignore
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings #type: ignore
+from rest_framework.test import APIClient  # type: ignore
+from rest_framework_simplejwt.tokens import AccessToken  # type: ignore
+
+from realtimejobs.canonical import canonicalize_job_url, job_url_hash
+from realtimejobs.counters import AggregationBuffer
+from realtimejobs.exports import accepts_gzip
+from realtimejobs.fields import BinaryUUIDField, uuid7, uuid7_time
+from realtimejobs.importers import JobImporter, iter_rows
+from realtimejobs.middleware import IdempotencyMiddleware
+from realtimejobs.payments import verify_webhook_signature
+from realtimejobs.scheduling import compute_next_send_at
+from realtimejobs.models import Category, Company, JobInteraction, JobPost, JobType, Payment, Tag
+
+
+class CanonicalJobUrlTests(SimpleTestCase):
+    CASES = [
+        # (url, canonical form)
+        ('https://example.com/jobs/1', 'https://example.com/jobs/1'),
+        ('http://example.com/jobs/1', 'https://example.com/jobs/1'),
+        ('HTTPS://Example.COM/jobs/1', 'https://example.com/jobs/1'),
+        ('https://www.example.com/jobs/1', 'https://example.com/jobs/1'),
+        ('https://example.com:443/jobs/1', 'https://example.com/jobs/1'),
+        ('http://example.com:80/jobs/1', 'https://example.com/jobs/1'),
+        ('https://example.com:8443/jobs/1', 'https://example.com:8443/jobs/1'),
+        ('https://example.com/jobs/1/', 'https://example.com/jobs/1'),
+        ('https://example.com//jobs///1', 'https://example.com/jobs/1'),
+        ('https://example.com', 'https://example.com/'),
+        ('https://example.com/jobs/1#apply', 'https://example.com/jobs/1'),
+        ('https://example.com/jobs/1?utm_source=feed&utm_medium=x', 'https://example.com/jobs/1'),
+        ('https://example.com/jobs/1?gclid=abc&ref=twitter', 'https://example.com/jobs/1'),
+        ('https://example.com/jobs?b=2&a=1', 'https://example.com/jobs?a=1&b=2'),
+        ('https://example.com/jobs?id=7&utm_campaign=z', 'https://example.com/jobs?id=7'),
+        ('https://example.com/%7Ejobs/1', 'https://example.com/~jobs/1'),
+        ('https://example.com/~jobs/1', 'https://example.com/~jobs/1'),
+        ('https://example.com/Jobs/1', 'https://example.com/Jobs/1'),
+        ('  https://example.com/jobs/1  ', 'https://example.com/jobs/1'),
+    ]
+
+    def test_canonical_forms(self):
+        for url, expected in self.CASES:
+            with self.subTest(url=url):
+                self.assertEqual(canonicalize_job_url(url), expected)
+
+    def test_hash_is_shared_by_equivalent_urls(self):
+        self.assertEqual(job_url_hash('http://www.example.com/jobs/1/?utm_source=x'),
+                         job_url_hash('https://example.com/jobs/1'))
+        self.assertNotEqual(job_url_hash('https://example.com/jobs/1'),
+                            job_url_hash('https://example.com/jobs/2'))
+        self.assertEqual(len(job_url_hash('https://example.com/jobs/1')), 64)
+
+
+class DedupeJobsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Engineering', slug='engineering')
+        self.job_type = JobType.objects.create(name='Full-time')
+        self.company = Company.objects.create(name='Acme', description='', contact_name='Acme',
+                                              contact_email='jobs@acme.com')
+        users = get_user_model().objects
+        self.alice = users.create_user(email='alice@example.com', password='secret', full_name='Alice')
+        self.bob = users.create_user(email='bob@example.com', password='secret', full_name='Bob')
+
+    def make_job(self, slug, job_url, status='published'):
+        job = JobPost.objects.create(
+            title=slug, slug=slug, job_url=job_url, category=self.category, job_type=self.job_type,
+            company=self.company, description='d', short_description='s', status=status)
+        # Jobs stored before job_url_hash existed: save() would reject the duplicate
+        JobPost.objects.filter(id=job.id).update(job_url_hash=None)
+        return job
+
+    def test_merges_duplicates_into_the_published_job(self):
+        keeper = self.make_job('keeper', 'https://acme.com/jobs/1')
+        duplicate = self.make_job('duplicate', 'http://www.acme.com/jobs/1/?utm_source=feed', status='draft')
+        other = self.make_job('other', 'https://acme.com/jobs/2')
+
+        python, go = Tag.objects.create(name='Python'), Tag.objects.create(name='Go')
+        keeper.tags.add(python)
+        duplicate.tags.add(python, go)
+        JobInteraction.objects.create(user=self.alice, job=keeper, status='saved')
+        # Conflicts with Alice's interaction on the kept job under unique_user_job_status
+        JobInteraction.objects.create(user=self.alice, job=duplicate, status='saved')
+        JobInteraction.objects.create(user=self.alice, job=duplicate, status='applied')
+        JobInteraction.objects.create(user=self.bob, job=duplicate, status='saved')
+        Payment.objects.create(job_post=duplicate, email='jobs@acme.com', tx_ref='tx-1')
+
+        call_command('dedupe_jobs', stdout=io.StringIO())
+
+        self.assertFalse(JobPost.objects.filter(id=duplicate.id).exists())
+        self.assertEqual(set(JobPost.objects.values_list('id', flat=True)), {keeper.id, other.id})
+        self.assertFalse(JobPost.objects.filter(job_url_hash=None).exists())
+
+        keeper.refresh_from_db()
+        self.assertEqual(sorted(keeper.tags.values_list('name', flat=True)), ['Go', 'Python'])
+        self.assertEqual(sorted(JobInteraction.objects.filter(job=keeper).values_list('user__email', 'status')), [
+            ('alice@example.com', 'applied'), ('alice@example.com', 'saved'), ('bob@example.com', 'saved')])
+        self.assertEqual((keeper.saves_count, keeper.applications_count), (2, 1))
+        self.assertEqual(list(Payment.objects.values_list('job_post_id', flat=True)), [keeper.id])
+
+    def test_dry_run_changes_nothing(self):
+        self.make_job('first', 'https://acme.com/jobs/1')
+        self.make_job('second', 'https://acme.com/jobs/1/')
+
+        call_command('dedupe_jobs', '--dry-run', stdout=io.StringIO())
+
+        self.assertEqual(JobPost.objects.count(), 2)
+        self.assertEqual(JobPost.objects.filter(job_url_hash=None).count(), 2)
+
+
+class Uuid7Tests(SimpleTestCase):
+    def test_version_and_variant(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_increasing_and_unique(self):
+        values = [uuid7() for _ in range(10000)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_embeds_the_creation_time(self):
+        before = time.time()
+        value = uuid7()
+        self.assertAlmostEqual(uuid7_time(value), before, delta=1)
+
+
+class BinaryUUIDFieldTests(SimpleTestCase):
+    mysql = SimpleNamespace(vendor='mysql', data_types={'UUIDField': 'char(32)'},
+                            features=SimpleNamespace(has_native_uuid_field=False))
+
+    def setUp(self):
+        self.field = BinaryUUIDField()
+        self.value = uuid7()
+
+    @override_settings(BINARY_UUID_STORAGE=True)
+    def test_binary_round_trip(self):
+        self.assertEqual(self.field.db_type(self.mysql), 'binary(16)')
+        stored = self.field.get_db_prep_value(self.value, self.mysql)
+        self.assertEqual(stored, self.value.bytes)
+        self.assertEqual(self.field.get_db_prep_value(str(self.value), self.mysql), self.value.bytes)
+        self.assertIsNone(self.field.get_db_prep_value(None, self.mysql))
+        self.assertEqual(self.field.from_db_value(stored, None, self.mysql), self.value)
+        self.assertEqual(self.field.from_db_value(bytearray(stored), None, self.mysql), self.value)
+
+    @override_settings(BINARY_UUID_STORAGE=False)
+    def test_hex_storage_until_converted(self):
+        self.assertEqual(self.field.db_type(self.mysql), 'char(32)')
+        stored = self.field.get_db_prep_value(self.value, self.mysql)
+        self.assertEqual(stored, self.value.hex)
+        # Rows read before and after the column conversion both decode
+        self.assertEqual(self.field.from_db_value(stored, None, self.mysql), self.value)
+        self.assertEqual(self.field.from_db_value(self.value.bytes, None, self.mysql), self.value)
+
+    @override_settings(BINARY_UUID_STORAGE=True)
+    def test_other_databases_keep_uuid_storage(self):
+        sqlite = SimpleNamespace(**dict(vars(self.mysql), vendor='sqlite'))
+        self.assertEqual(self.field.db_type(sqlite), 'char(32)')
+        self.assertEqual(self.field.get_db_prep_value(self.value, sqlite), self.value.hex)
+
+
+class AggregationBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.written = []
+        self.fail_with = None
+        self.bad_keys = set()
+
+    def write(self, pending):
+        if self.fail_with is not None:
+            raise self.fail_with
+        if self.bad_keys & set(pending):
+            raise IntegrityError("Cannot add or update a child row")
+        self.written.append({key: dict(deltas) for key, deltas in pending.items()})
+
+    def buffer(self, **kwargs):
+        kwargs.setdefault('flush_interval', 60)
+        return AggregationBuffer('test.counters', self.write, **kwargs)
+
+    def test_flushes_at_flush_size(self):
+        buffer = self.buffer(flush_size=2)
+        buffer.add('a', 'saves_count')
+        buffer.add('a', 'saves_count')
+        self.assertEqual(self.written, [])
+        buffer.add('b', 'saves_count', -1)
+        self.assertEqual(self.written, [{'a': {'saves_count': 2}, 'b': {'saves_count': -1}}])
+
+    def test_transient_error_keeps_the_deltas(self):
+        buffer = self.buffer()
+        buffer.add('a', 'saves_count')
+        buffer.add('b', 'applications_count')
+        self.fail_with = OperationalError(2003, "Can't connect to MySQL server")
+        with self.assertLogs('realtimejobs.counters', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+
+        buffer.add('a', 'saves_count')
+        self.fail_with = None
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(self.written, [{'a': {'saves_count': 2}, 'b': {'applications_count': 1}}])
+
+    def test_permanent_error_discards_only_the_bad_keys(self):
+        buffer = self.buffer()
+        for key in ('a', 'gone', 'b'):
+            buffer.add(key, 'saves_count')
+        self.bad_keys = {'gone'}
+        with self.assertLogs('realtimejobs.counters', 'WARNING'):
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(self.written, [{'a': {'saves_count': 1}}, {'b': {'saves_count': 1}}])
+
+        # The discarded key is not retried
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(self.written), 2)
+
+    def test_timer_flushes_a_lone_delta(self):
+        flushed = threading.Event()
+
+        def write(pending):
+            self.write(pending)
+            flushed.set()
+
+        buffer = AggregationBuffer('test.counters', write, flush_interval=0.05)
+        buffer.add('a', 'saves_count')
+        self.assertTrue(flushed.wait(5))
+        self.assertEqual(self.written, [{'a': {'saves_count': 1}}])
+
+
+class JobImporterTests(TestCase):
+    def setUp(self):
+        Category.objects.create(name='Engineering', slug='engineering')
+        JobType.objects.create(name='Full-time')
+        self.company = Company.objects.create(name='Acme', description='', contact_name='Acme',
+                                              contact_email='jobs@acme.com')
+
+    def row(self, title, job_url, **fields):
+        return dict({'title': title, 'job_url': job_url, 'category': 'Engineering', 'job_type': 'Full-time',
+                     'company': 'Acme', 'description': '<p>Build things</p>'}, **fields)
+
+    def run_import(self, rows, importer=None):
+        importer = importer or JobImporter(notify=False)
+        return importer.run(enumerate(rows, start=1))
+
+    def test_imports_rows_with_tags_and_new_companies(self):
+        summary = self.run_import([
+            self.row('Backend Engineer', 'https://acme.com/jobs/1', tags=['Python', 'Django'], is_worldwide='yes'),
+            self.row('Designer', 'https://globex.com/jobs/1', company='Globex', company_email='jobs@globex.com',
+                     tags='Figma, Python'),
+        ])
+
+        self.assertEqual((summary['created'], summary['duplicates'], summary['failed']), (2, 0, 0))
+        backend = JobPost.objects.get(slug='backend-engineer')
+        self.assertEqual(backend.status, 'published')
+        self.assertIsNotNone(backend.published_at)
+        self.assertTrue(backend.is_worldwide)
+        self.assertEqual(backend.short_description, 'Build things')
+        self.assertEqual(sorted(backend.tags.values_list('name', flat=True)), ['Django', 'Python'])
+        designer = JobPost.objects.get(slug='designer')
+        self.assertEqual(designer.company.contact_email, 'jobs@globex.com')
+        self.assertEqual(Tag.objects.filter(name='Python').count(), 1)
+
+    def test_allocates_unique_slugs(self):
+        JobPost.objects.create(title='Engineer', slug='engineer', job_url='https://acme.com/jobs/0',
+                               category=Category.objects.get(), job_type=JobType.objects.get(),
+                               company=self.company, description='d', short_description='s')
+        self.run_import([self.row('Engineer', f'https://acme.com/jobs/{n}') for n in range(1, 4)])
+
+        self.assertEqual(sorted(JobPost.objects.values_list('slug', flat=True)),
+                         ['engineer', 'engineer-2', 'engineer-3', 'engineer-4'])
+
+    def test_counts_duplicate_urls(self):
+        JobPost.objects.create(title='Existing', job_url='https://acme.com/jobs/1',
+                               category=Category.objects.get(), job_type=JobType.objects.get(),
+                               company=self.company, description='d', short_description='s')
+        summary = self.run_import([
+            self.row('Same as existing', 'http://www.acme.com/jobs/1/?utm_source=feed'),
+            self.row('New', 'https://acme.com/jobs/2'),
+            self.row('Same as previous row', 'https://acme.com/jobs/2#apply'),
+        ])
+
+        self.assertEqual((summary['created'], summary['duplicates'], summary['failed']), (1, 2, 0))
+
+    def test_reports_bad_rows_by_line(self):
+        rows = iter_rows(io.StringIO(
+            '{"title": "Ok", "job_url": "https://acme.com/jobs/1", "category": "Engineering", '
+            '"job_type": "Full-time", "company": "Acme", "description": "d"}\n'
+            'not json\n'
+            '{"title": "No URL", "category": "Engineering", "job_type": "Full-time", "company": "Acme", '
+            '"description": "d"}\n'
+            '{"title": "Unknown names", "job_url": "https://x.com/1", "category": "Marketing", '
+            '"job_type": "Full-time", "company": "Initech", "description": "d"}\n'
+        ), 'jsonl')
+        summary = JobImporter(notify=False).run(rows)
+
+        self.assertEqual((summary['created'], summary['failed']), (1, 3))
+        errors = {error['line']: error['errors'] for error in summary['errors']}
+        self.assertIn('row', errors[2])
+        self.assertEqual(set(errors[3]), {'job_url'})
+        self.assertEqual(set(errors[4]), {'category', 'company'})
+
+    def test_counts_urls_posted_during_the_import_as_duplicates(self):
+        importer = JobImporter(notify=False)
+        # Posted after the importer loaded the known URLs and slugs
+        JobPost.objects.create(title='Engineer', slug='engineer', job_url='https://acme.com/jobs/1',
+                               category=Category.objects.get(), job_type=JobType.objects.get(),
+                               company=self.company, description='d', short_description='s')
+        summary = self.run_import([
+            self.row('Engineer', 'https://acme.com/jobs/1'),
+            self.row('Engineer', 'https://acme.com/jobs/2'),
+        ], importer)
+
+        self.assertEqual((summary['created'], summary['duplicates'], summary['failed']), (1, 1, 0))
+        self.assertEqual(sorted(JobPost.objects.values_list('slug', flat=True)), ['engineer', 'engineer-2'])
+
+    def test_reports_a_chunk_that_still_conflicts_as_failed(self):
+        importer = JobImporter(notify=False, chunk_size=1)
+        # Takes the email after the importer loaded the known companies
+        Company.objects.create(name='Other', description='', contact_name='Other', contact_email='jobs@globex.com')
+        summary = self.run_import([
+            self.row('Designer', 'https://globex.com/jobs/1', company='Globex', company_email='jobs@globex.com'),
+            self.row('Engineer', 'https://acme.com/jobs/1'),
+        ], importer)
+
+        self.assertEqual((summary['created'], summary['duplicates'], summary['failed']), (1, 0, 1))
+        self.assertEqual(summary['errors'][0]['line'], 1)
+        self.assertEqual(list(JobPost.objects.values_list('slug', flat=True)), ['engineer'])
+
+
+class AcceptsGzipTests(SimpleTestCase):
+    CASES = [
+        # (Accept-Encoding, gzip allowed)
+        (None, False),
+        ('', False),
+        ('gzip', True),
+        ('GZIP', True),
+        ('x-gzip', True),
+        ('deflate, gzip;q=0.8', True),
+        ('deflate, br', False),
+        ('gzip;q=0', False),
+        ('gzip; q=0.0, deflate', False),
+        ('gzip;q=invalid', False),
+        ('*', True),
+        ('*;q=0', False),
+        ('*, gzip;q=0', False),
+        ('gzip;q=0.5, *;q=0', True),
+    ]
+
+    def test_q_values(self):
+        for header, expected in self.CASES:
+            with self.subTest(header=header):
+                self.assertIs(accepts_gzip(header), expected)
+
+
+class IdempotencyMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+        self.middleware = IdempotencyMiddleware(self.view)
+        self.user = get_user_model().objects.create_user(
+            email='alice@example.com', password='secret', full_name='Alice')
+
+    def view(self, request):
+        self.calls += 1
+        return JsonResponse({"call": self.calls}, status=201)
+
+    def post(self, body='{"title": "Engineer"}', key='key-1', token=None, path='/jobposts/'):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key}
+        if token is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return self.middleware(self.factory.post(path, body, content_type='application/json', **headers))
+
+    def test_refreshed_token_keeps_the_scope(self):
+        first = self.post(token=AccessToken.for_user(self.user))
+        retried = self.post(token=AccessToken.for_user(self.user))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retried.content, first.content)
+        self.assertEqual(retried['Idempotent-Replayed'], 'true')
+
+    def test_users_do_not_share_keys(self):
+        other = get_user_model().objects.create_user(email='bob@example.com', password='secret', full_name='Bob')
+        self.post(token=AccessToken.for_user(self.user))
+        self.post(token=AccessToken.for_user(other))
+        self.post()
+
+        self.assertEqual(self.calls, 3)
+
+    def test_replays_the_first_response(self):
+        first = self.post()
+        retried = self.post()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((retried.status_code, retried.content), (201, first.content))
+        self.assertEqual(retried['Idempotent-Replayed'], 'true')
+
+    def test_rejects_a_reused_key_with_a_different_body(self):
+        self.post()
+        response = self.post(body='{"title": "Designer"}')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_keys_are_scoped_to_the_path(self):
+        self.post()
+        self.post(path='/payments/')
+
+        self.assertEqual(self.calls, 2)
+
+    def test_conflicts_while_the_first_request_is_in_flight(self):
+        self.middleware.wait_timeout = 0
+        duplicates = []
+
+        def view(request):
+            # The retry arrives before the first attempt has finished
+            duplicates.append(self.middleware(self.factory.post(
+                '/jobposts/', '{"title": "Engineer"}', content_type='application/json',
+                HTTP_IDEMPOTENCY_KEY='key-1')))
+            return self.view(request)
+
+        self.middleware.get_response = view
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(self.calls, 1)
+
+        # Conflicts are not stored: a later retry replays the first attempt
+        self.middleware.get_response = self.view
+        self.assertEqual(self.post()['Idempotent-Replayed'], 'true')
+
+    def test_ignores_requests_without_a_key_and_rejects_long_keys(self):
+        self.middleware(self.factory.post('/jobposts/', '{}', content_type='application/json'))
+        self.middleware(self.factory.post('/jobposts/', '{}', content_type='application/json'))
+        self.assertEqual(self.calls, 2)
+
+        self.assertEqual(self.post(key='k' * 256).status_code, 400)
+        self.assertEqual(self.calls, 2)
+
+    def test_server_errors_are_not_stored(self):
+        self.middleware.get_response = lambda request: JsonResponse({}, status=503)
+        self.post()
+        self.middleware.get_response = self.view
+
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.calls, 1)
+
+
+@override_settings(CHAPA_WEBHOOK_SECRET='webhook-secret')
+class ChapaWebhookTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name='Acme', description='', contact_name='Acme',
+                                         contact_email='jobs@acme.com')
+        self.job = JobPost.objects.create(
+            title='Engineer', job_url='https://acme.com/jobs/1', company=company, description='d',
+            short_description='s', category=Category.objects.create(name='Engineering', slug='engineering'),
+            job_type=JobType.objects.create(name='Full-time'))
+        self.payment = Payment.objects.create(job_post=self.job, email='jobs@acme.com', tx_ref='tx-1')
+
+    def sign(self, body, secret='webhook-secret'):
+        return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+    def deliver(self, event, signature=None):
+        body = json.dumps(event).encode()
+        headers = {} if signature is False else {'HTTP_X_CHAPA_SIGNATURE': signature or self.sign(body)}
+        return APIClient().post('/webhooks/chapa/', body, content_type='application/json', **headers)
+
+    def test_signature_check(self):
+        body = b'{"tx_ref": "tx-1", "status": "success"}'
+        self.assertTrue(verify_webhook_signature(body, self.sign(body)))
+        self.assertFalse(verify_webhook_signature(body + b' ', self.sign(body)))
+        self.assertFalse(verify_webhook_signature(body, self.sign(body, secret='other-secret')))
+        self.assertFalse(verify_webhook_signature(body, ''))
+        self.assertFalse(verify_webhook_signature(body, None))
+        with override_settings(CHAPA_WEBHOOK_SECRET=None):
+            self.assertFalse(verify_webhook_signature(body, self.sign(body)))
+
+    def test_signed_success_publishes_the_job_once(self):
+        for _ in range(2):  # Redelivered events change nothing
+            response = self.deliver({'tx_ref': 'tx-1', 'status': 'success'})
+            self.assertEqual(response.status_code, 200)
+
+        self.payment.refresh_from_db()
+        self.job.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, 'success')
+        self.assertEqual(self.job.status, 'published')
+        self.assertIsNotNone(self.job.published_at)
+
+    def test_signed_failure_declines_the_payment(self):
+        self.assertEqual(self.deliver({'tx_ref': 'tx-1', 'status': 'failed'}).status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, 'declined')
+
+    def test_rejects_unsigned_and_forged_events(self):
+        event = {'tx_ref': 'tx-1', 'status': 'success'}
+        self.assertEqual(self.deliver(event, signature=False).status_code, 403)
+        self.assertEqual(self.deliver(event, signature=self.sign(b'{}')).status_code, 403)
+        self.assertEqual(self.deliver(event, signature='0' * 64).status_code, 403)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.payment_status, 'pending')
+        self.assertEqual(JobPost.objects.get().status, 'draft')
+
+    def test_acknowledges_unknown_transactions_and_rejects_missing_refs(self):
+        self.assertEqual(self.deliver({'tx_ref': 'tx-unknown', 'status': 'success'}).status_code, 200)
+        self.assertEqual(self.deliver({'status': 'success'}).status_code, 400)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class ComputeNextSendAtTests(SimpleTestCase):
+    def alert(self, frequency='daily', send_hour=9, tz='UTC', spread=0):
+        # spread 0 puts the slot at the top of the hour, and weekly alerts on Monday
+        return SimpleNamespace(id=uuid.UUID(int=spread), frequency=frequency, send_hour=send_hour, timezone=tz)
+
+    def test_next_slot_is_strictly_after(self):
+        alert = self.alert()
+        self.assertEqual(compute_next_send_at(alert, utc(2026, 1, 15, 8, 59)), utc(2026, 1, 15, 9))
+        self.assertEqual(compute_next_send_at(alert, utc(2026, 1, 15, 9)), utc(2026, 1, 16, 9))
+
+    def test_spreads_alerts_inside_the_hour(self):
+        self.assertEqual(compute_next_send_at(self.alert(spread=3), utc(2026, 1, 15, 8)), utc(2026, 1, 15, 9, 45))
+        self.assertEqual(compute_next_send_at(self.alert(send_hour=None, spread=5), utc(2026, 1, 15)),
+                         utc(2026, 1, 15, 1, 15))
+
+    def test_local_send_hour(self):
+        cases = [
+            # (time zone, now, due)
+            ('Europe/Berlin', utc(2026, 1, 15, 6), utc(2026, 1, 15, 8)),  # UTC+1
+            ('Europe/Berlin', utc(2026, 7, 15, 6), utc(2026, 7, 15, 7)),  # UTC+2
+            ('America/New_York', utc(2026, 1, 15, 6), utc(2026, 1, 15, 14)),  # UTC-5
+            ('Asia/Tokyo', utc(2026, 1, 15, 6), utc(2026, 1, 16, 0)),  # 15:00 local, so tomorrow
+            ('Asia/Kolkata', utc(2026, 1, 15, 0), utc(2026, 1, 15, 3, 30)),  # UTC+5:30
+            ('Not/AZone', utc(2026, 1, 15, 6), utc(2026, 1, 15, 9)),  # falls back to UTC
+        ]
+        for tz, now, due in cases:
+            with self.subTest(tz=tz, now=now):
+                self.assertEqual(compute_next_send_at(self.alert(tz=tz), now), due)
+
+    def test_keeps_the_local_hour_across_dst(self):
+        alert = self.alert(tz='Europe/Berlin')
+        # Clocks go forward on 2026-03-29 and back on 2026-10-25
+        due = compute_next_send_at(alert, utc(2026, 3, 27, 12))
+        slots = []
+        for _ in range(3):
+            slots.append(due)
+            due = compute_next_send_at(alert, due)
+        self.assertEqual(slots, [utc(2026, 3, 28, 8), utc(2026, 3, 29, 7), utc(2026, 3, 30, 7)])
+
+        autumn = compute_next_send_at(alert, utc(2026, 10, 24, 12))
+        self.assertEqual(autumn, utc(2026, 10, 25, 8))
+        self.assertEqual(autumn.astimezone(ZoneInfo('Europe/Berlin')).hour, 9)
+
+    def test_skipped_local_hour_is_sent_once(self):
+        # 02:00-03:00 does not exist in Berlin on 2026-03-29
+        alert = self.alert(send_hour=2, tz='Europe/Berlin')
+        due = compute_next_send_at(alert, utc(2026, 3, 28, 12))
+        self.assertEqual(due, utc(2026, 3, 29, 1))
+        self.assertEqual(compute_next_send_at(alert, due), utc(2026, 3, 30, 0))
+
+    def test_weekly_alerts_keep_their_weekday(self):
+        alert = self.alert(frequency='weekly', tz='America/New_York')
+        due = compute_next_send_at(alert, utc(2026, 3, 4, 12))  # a Wednesday
+        self.assertEqual(due, utc(2026, 3, 9, 13))  # Monday 09:00 EDT, after the DST change
+        self.assertEqual(compute_next_send_at(alert, due), utc(2026, 3, 16, 13))
+
+    def test_instant_alerts_are_not_scheduled(self):
+        self.assertIsNone(compute_next_send_at(self.alert(frequency='instant'), utc(2026, 1, 15)))
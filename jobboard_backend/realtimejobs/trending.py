@@ -0,0 +1,98 @@
+"""
+Trending jobs ranking.
+
+Every save, application and view of a published job within the window
+contributes a weighted signal that halves every ``HALF_LIFE_HOURS``. The
+scores are computed in one vectorized pass with NumPy and stored as a
+ranked list in ``TrendingJob`` (and as ``JobListing.trending_rank``), so
+serving ``sort=trending`` is an index scan by rank rather than an
+aggregation per request.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction  # type: ignore
+from django.utils import timezone  # type: ignore
+
+from realtimejobs import listings
+from realtimejobs.models import JobImpression, JobInteraction, TrendingJob
+
+WINDOW_DAYS = 7
+HALF_LIFE_HOURS = 24
+TRENDING_SIZE = 500
+
+# Weight of a single signal of each kind
+WEIGHTS = {
+    'applied': 3.0,
+    'saved': 1.0,
+    'detail_views': 0.2,
+    'list_views': 0.02,
+}
+
+
+def score_signals(job_keys, ages_hours, weights, half_life_hours=HALF_LIFE_HOURS):
+    """
+    Sum exponentially decayed signal weights per job.
+
+    :param job_keys: Array with the job of each signal.
+    :param ages_hours: Array with the age of each signal in hours.
+    :param weights: Array with the weight of each signal.
+    :return: (unique job keys, scores), aligned.
+    """
+    jobs, inverse = np.unique(job_keys, return_inverse=True)
+    decay = np.exp2(-np.asarray(ages_hours, dtype=np.float64) / half_life_hours)
+    scores = np.bincount(inverse, weights=np.asarray(weights, dtype=np.float64) * decay,
+                         minlength=len(jobs))
+    return jobs, scores
+
+
+def _load_signals(now):
+    """Collect (job hex, age in hours, weight) arrays for the window."""
+    since = now - timedelta(days=WINDOW_DAYS)
+    keys, times, weights = [], [], []
+
+    interactions = JobInteraction.objects.filter(
+        timestamp__gte=since, job__status='published'
+    ).values_list('job_id', 'status', 'timestamp').iterator(chunk_size=5000)
+    for job_id, status, timestamp in interactions:
+        keys.append(job_id.hex)
+        times.append(timestamp.timestamp())
+        weights.append(WEIGHTS[status])
+
+    impressions = JobImpression.objects.filter(
+        bucket__gte=since, job__status='published'
+    ).values_list('job_id', 'bucket', 'detail_views', 'list_views').iterator(chunk_size=5000)
+    for job_id, bucket, detail_views, list_views in impressions:
+        # Middle of the hour approximates when the bucket's views happened
+        timestamp = bucket.timestamp() + 1800
+        keys.extend((job_id.hex, job_id.hex))
+        times.extend((timestamp, timestamp))
+        weights.extend((detail_views * WEIGHTS['detail_views'], list_views * WEIGHTS['list_views']))
+
+    ages = (now.timestamp() - np.array(times, dtype=np.float64)) / 3600
+    return np.array(keys), np.clip(ages, 0, None), np.array(weights, dtype=np.float64)
+
+
+def compute_trending(now=None, size=TRENDING_SIZE):
+    """
+    Recompute the trending ranking and replace the stored one.
+
+    :return: Number of ranked jobs.
+    """
+    now = now or timezone.now()
+    keys, ages, weights = _load_signals(now)
+    if len(keys):
+        jobs, scores = score_signals(keys, ages, weights)
+        top = np.argsort(-scores, kind='stable')[:size]
+    else:
+        jobs, scores, top = np.array([]), np.array([]), []
+
+    rows = [
+        TrendingJob(job_id=jobs[i], score=float(scores[i]), rank=rank, computed_at=now)
+        for rank, i in enumerate(top, start=1)
+    ]
+    with transaction.atomic():
+        TrendingJob.objects.all().delete()
+        TrendingJob.objects.bulk_create(rows)
+        listings.set_trending_ranks({row.job_id: row.rank for row in rows})
+    return len(rows)
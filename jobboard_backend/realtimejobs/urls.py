@@ -1,5 +1,5 @@
 from rest_framework.routers import DefaultRouter  # type: ignore
-from django.urls import path, include  # type: ignore
+from django.urls import path, include, re_path  # type: ignore
 from realtimejobs import views
 
 
@@ -27,5 +27,9 @@ urlpatterns = [
     path('auth/user/', views.get_current_user, name='auth-user'),
     path('profile/change-password/', views.UserViewSet.as_view({'patch': 'change_password'}), name='change-password'),
     path('verify_payment/', views.PaymentVerificationView.as_view(), name='verify_payment'),
+    path('webhooks/chapa/', views.ChapaWebhookView.as_view(), name='chapa-webhook'),
     path('unsubscribe/<uuid:alert_id>/', views.unsubscribe, name='unsubscribe'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+    re_path(r'^(?P<path>sitemap\.xml|sitemaps/jobs-\d+\.xml|feeds/(?:category|tag)/[-\w]+\.(?:rss|atom))$',
+            views.static_feed, name='static-feed'),
 ]
@@ -1,33 +1,51 @@
-from django.shortcuts import get_object_or_404, redirect, render  # type: ignore
+import json
+import os
+import uuid
+from datetime import timezone as dt_timezone
+
+import pymysql  # type: ignore
 from django.conf import settings  # type: ignore
-from rest_framework import permissions  # type: ignore
-from rest_framework import renderers  # type: ignore
-from rest_framework import viewsets  # type: ignore
-from rest_framework.permissions import IsAuthenticated  # type: ignore
-from rest_framework import viewsets, status, generics  # type: ignore
-from rest_framework.response import Response  # type: ignore
-from rest_framework.permissions import AllowAny  # type: ignore
-from rest_framework.decorators import action  # type: ignore
+from django.contrib.auth import get_user_model  # type: ignore
+from django.db import IntegrityError, transaction  # type: ignore
+from django.db.models import Q  # type: ignore
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse  # type: ignore
+from django.shortcuts import get_object_or_404  # type: ignore
+from django.utils import timezone  # type: ignore
+from django.utils.dateparse import parse_datetime  # type: ignore
+from django.utils.http import http_date  # type: ignore
 from django.utils.text import slugify  # type: ignore
-from django.http import HttpResponse  # type: ignore
 from django.views.decorators.csrf import csrf_exempt  # type: ignore
-from rest_framework.views import APIView  # type: ignore
-from rest_framework.decorators import api_view, permission_classes  # type: ignore
-import requests
-import uuid
-from .models import JobPost, Payment
-from realtimejobs.queries.jobpost_queries import JobPostQueries  # type: ignore
+from django.views.decorators.http import require_GET  # type: ignore
+from django.views.static import was_modified_since  # type: ignore
 from drf_yasg import openapi  # type: ignore
 from drf_yasg.utils import swagger_auto_schema  # type: ignore
-
+from rest_framework import permissions, status, viewsets  # type: ignore
+from rest_framework.decorators import action, api_view, permission_classes  # type: ignore
+from rest_framework.parsers import MultiPartParser  # type: ignore
+from rest_framework.permissions import AllowAny, IsAuthenticated  # type: ignore
+from rest_framework.response import Response  # type: ignore
+from rest_framework.reverse import reverse  # type: ignore
+from rest_framework.views import APIView  # type: ignore
 
 # Import raw SQL queries
 from realtimejobs.queries.jobinteraction_queries import JobInteractionQueries
-from .models import JobPost, Category, User, JobType, Tag, Company, JobInteraction
-from .serializers import *
-from django.contrib.auth import get_user_model  # type: ignore
+from realtimejobs.queries.jobpost_queries import JobPostQueries  # type: ignore
+from . import alerts, metrics, personalization
+from .canonical import job_url_hash
+from .counters import record_interaction
+from .emails import queue_emails, subscription_email
+from .exports import FORMATS as EXPORT_FORMATS, accepts_gzip, export_stream
+from .impressions import record_detail_view, record_list_impressions
+from .importers import FORMATS, ImportFormatError, JobImporter, iter_rows
+from .interactions import interaction_flags, invalidate_user_interactions
+from .models import Category, Company, JobInteraction, JobPost, JobType, Payment, SimilarJob, Tag, User
+from .pagination import InteractionCursorPagination
+from .payments import (PaymentGatewayError, confirm_payments, decline_payments, get_chapa_client,
+                       is_payment_successful, verify_webhook_signature)
 from .permissions import IsAdminOrReadOnly, IsAdminOrReadCreateOnly, IsAdminOnly
-from .tasks import send_subscription_email, send_payment_success_email
+from .serializers import *
+from .signals import jobs_closed, jobs_published
+from .tasks import initialize_job_payment
 
 
 # **************** USER  VIEWS ************************
@@ -280,44 +298,100 @@ class JobInteractionViewSet(viewsets.ModelViewSet):
         job_id = request.data.get("job")
         job_status = request.data.get("status")
 
-        # Validate job existence
-        job = get_object_or_404(JobPost, id=job_id)
-
         # Ensure valid job status
         if job_status not in ['saved', 'applied']:
             return Response({"error": "Invalid status. Must be 'saved' or 'applied'."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if the interaction already exists
-        existing_interaction = JobInteraction.objects.filter(
-            user=user, job=job, status=job_status).first()
+        # One atomic upsert: no existence check, no race on the unique constraint
+        try:
+            created = JobInteractionQueries().save_or_update_interaction(user.id, job_id, job_status)
+        except (ValueError, pymysql.err.IntegrityError):
+            # Malformed id, or the job foreign key does not exist
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        if existing_interaction:
+        if not created:
             return Response({"message": f"You have already {job_status} this job."}, status=status.HTTP_200_OK)
 
-        # Create job interaction if it doesn't exist
-        JobInteraction.objects.create(user=user, job=job, status=job_status)
+        # The raw upsert bypasses model signals, so update derived state here
+        invalidate_user_interactions(user.id)
+        record_interaction(job_id, job_status)
+        personalization.record_interaction(user.id, job_id, job_status)
 
         return Response({"message": f"Job {job_status} successfully!"}, status=status.HTTP_201_CREATED)
 
+    @swagger_auto_schema(
+        request_body=JobInteractionBulkSerializer,
+        responses={201: "Some interactions were created",
+                   200: "All interactions already existed or jobs were not found"},
+    )
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Save or apply to many jobs in one request.
+        Body: {"interactions": [{"job": "<uuid>", "status": "saved"}, ...]}
+        """
+        serializer = JobInteractionBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        created, existing, not_found = JobInteractionQueries().bulk_save_interactions(
+            request.user.id,
+            [(item['job'], item['status']) for item in serializer.validated_data['interactions']],
+        )
+
+        if created:
+            invalidate_user_interactions(request.user.id)
+            for job_id, job_status in created:
+                record_interaction(job_id, job_status)
+                personalization.record_interaction(request.user.id, job_id, job_status)
+
+        def as_list(pairs):
+            return [{"job": job_id, "status": job_status} for job_id, job_status in pairs]
+
+        return Response({
+            "created": as_list(created),
+            "existing": as_list(existing),
+            "not_found": as_list(not_found),
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        request_body=JobInteractionStatusSerializer,
+        responses={200: "Interaction flags keyed by job id"},
+    )
+    @action(detail=False, methods=['post'], url_path='status')
+    def interaction_status(self, request):
+        """
+        Saved/applied flags of the current user for a page of jobs.
+        Body: {"jobs": ["<uuid>", ...]} (up to 200 ids)
+        """
+        serializer = JobInteractionStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        flags = interaction_flags(request.user.id, serializer.validated_data['jobs'])
+        return Response({"interactions": flags}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def saved_jobs(self, request):
         """
-        Fetch jobs saved by the logged-in user.
+        Fetch jobs saved by the logged-in user, newest first (cursor paginated).
         """
-        saved_jobs = JobInteraction.objects.filter(
-            user=request.user, status='saved').select_related('job')
-        serializer = JobInteractionSerializer(saved_jobs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._interactions_page(request, 'saved')
 
     @action(detail=False, methods=['get'])
     def applied_jobs(self, request):
         """
-        Fetch jobs applied by the logged-in user.
+        Fetch jobs applied by the logged-in user, newest first (cursor paginated).
         """
-        applied_jobs = JobInteraction.objects.filter(
-            user=request.user, status='applied').select_related('job')
-        serializer = JobInteractionSerializer(applied_jobs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._interactions_page(request, 'applied')
+
+    def _interactions_page(self, request, job_status):
+        """One joined query per page: interaction + job + company."""
+        interactions = JobInteraction.objects.filter(
+            user=request.user, status=job_status).select_related('job__company')
+
+        paginator = InteractionCursorPagination()
+        page = paginator.paginate_queryset(interactions, request, view=self)
+        serializer = JobInteractionSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['delete'])
     def remove_interaction(self, request, pk=None):
@@ -357,10 +431,39 @@ class JobAlertViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         """Assign the authenticated user to the job alert."""
-        job_alert = serializer.save(user=self.request.user, is_active=True)
+        with transaction.atomic():
+            job_alert = serializer.save(user=self.request.user, is_active=True)
+
+            # Confirmation email goes through the outbox, delivered after commit
+            queue_emails([subscription_email(job_alert)])
+
+    def perform_update(self, serializer):
+        """Reschedule the next digest, since frequency or send time may change."""
+        serializer.save(next_send_at=None)
+
+    @swagger_auto_schema(request_body=JobAlertPreviewSerializer)
+    @action(detail=False, methods=['post'])
+    def preview(self, request):
+        """
+        Preview an alert before saving it: how many published jobs match
+        its filters right now, plus the newest matching jobs.
+        """
+        serializer = JobAlertPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        # Same bitmap matching the digest scheduler uses, over all published jobs
+        index = alerts.published_facet_index()
+        matches = index.match(filters['categories'], filters['job_types'], filters['location'])
+        job_ids = [job.id for job in index.iter_jobs(matches, limit=filters['limit'])]
 
-        # Celery task to send confirmation email
-        send_subscription_email.delay(job_alert.id)
+        jobs_by_id = JobPost.objects.select_related('company').in_bulk(job_ids)
+        jobs = [jobs_by_id[job_id] for job_id in job_ids if job_id in jobs_by_id]
+
+        return Response({
+            "count": matches.bit_count(),
+            "jobs": JobSummarySerializer(jobs, many=True).data,
+        }, status=status.HTTP_200_OK)
 
 
 @csrf_exempt
@@ -387,67 +490,232 @@ class JobpostViewSet(viewsets.ModelViewSet):
     serializer_class = JobPostSerializer
     permission_classes = [IsAdminOrReadCreateOnly]
 
+    def retrieve(self, request, *args, **kwargs):
+        """Returns a job post and counts a detail view for it."""
+        response = super().retrieve(request, *args, **kwargs)
+        record_detail_view(response.data['id'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """Lists job posts and counts a listing impression for each one returned."""
+        response = super().list(request, *args, **kwargs)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        record_list_impressions(job['id'] for job in results)
+        return response
+
+    def perform_update(self, serializer):
+        was_published = serializer.instance.status == 'published'
+        job_post = serializer.save()
+        if was_published and job_post.status != 'published':
+            jobs_closed.send(sender=JobPost, jobs=[job_post])
+        elif not was_published and job_post.status == 'published':
+            # Published by an admin rather than by a payment
+            jobs_published.send(sender=JobPost, jobs=[job_post])
+
+    @swagger_auto_schema(
+        request_body=JobPostBatchSerializer,
+        responses={200: "Job posts in request order, plus the ids/slugs not found"},
+    )
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    def batch(self, request):
+        """
+        Fetch many job posts at once by id or slug.
+        Body: {"jobs": ["<uuid or slug>", ...]} (up to 100)
+        """
+        serializer = JobPostBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        keys = list(dict.fromkeys(serializer.validated_data['jobs']))
+
+        ids, slugs = [], []
+        for key in keys:
+            try:
+                ids.append(uuid.UUID(key))
+            except ValueError:
+                slugs.append(key)
+
+        jobs = self.get_queryset().filter(
+            Q(id__in=ids) | Q(slug__in=slugs)
+        ).select_related('category', 'job_type', 'company').prefetch_related('tags')
+        by_key = {}
+        for job in jobs:
+            by_key[str(job.id)] = by_key[job.id.hex] = by_key[job.slug] = job
+
+        found, not_found = [], []
+        for key in keys:
+            job = by_key.get(key) or by_key.get(key.lower())
+            if job is None:
+                not_found.append(key)
+            else:
+                found.append(job)
+
+        return Response({
+            "results": JobPostBatchItemSerializer(found, many=True).data,
+            "not_found": not_found,
+        }, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter('format', openapi.IN_FORM, type=openapi.TYPE_STRING, enum=FORMATS,
+                              description="Defaults to the file extension"),
+            openapi.Parameter('notify', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN,
+                              description="Send instant alerts for the imported jobs (default true)"),
+        ],
+        responses={200: "Import summary with per-row errors"},
+    )
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsAuthenticated, IsAdminOnly],
+            parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Bulk import published job posts from a partner feed (CSV or JSONL upload).
+        Rows that fail validation are skipped and reported with their line number.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the feed as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        notify = str(request.data.get('notify', 'true')).lower() not in ('0', 'false', 'no')
+
+        try:
+            rows = iter_rows(upload.file, fmt)
+            summary = JobImporter(notify=notify).run(rows)
+        except ImportFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({"error": "The file must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[*EXPORT_FORMATS],
+                              description="Defaults to ndjson"),
+            openapi.Parameter('updated_since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="ISO 8601 timestamp; only jobs changed since then, closed ones included"),
+        ],
+        responses={200: "Streamed NDJSON or CSV, gzipped when the client accepts it"},
+    )
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def export(self, request):
+        """
+        Stream all published job posts (or the changes since updated_since) as
+        NDJSON or CSV, ordered by updated_at. Example: ?output=csv&updated_since=2025-01-01T00:00:00Z
+        """
+        fmt = request.GET.get('output', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return Response({"error": "Invalid output. Must be 'ndjson' or 'csv'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        updated_since = request.GET.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_datetime(updated_since)
+            except ValueError:
+                updated_since = None
+            if updated_since is None:
+                return Response({"error": "Invalid updated_since. Use an ISO 8601 timestamp."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since, dt_timezone.utc)
+
+        use_gzip = accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING'))
+        response = StreamingHttpResponse(
+            export_stream(fmt, updated_since or None, gzip=use_gzip),
+            content_type=f"{EXPORT_FORMATS[fmt]}; charset=utf-8")
+        response['Content-Disposition'] = f'attachment; filename="jobs.{fmt}"'
+        response['Vary'] = 'Accept-Encoding'
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        metrics.incr(f"exports.{fmt}")
+        return response
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def similar(self, request, pk=None):
+        """
+        Published jobs similar to this one, from the precomputed neighbours.
+        """
+        entries = SimilarJob.objects.filter(
+            job_id=pk, similar__status='published'
+        ).select_related('similar__company').order_by('rank')
+        serializer = JobSummarySerializer([entry.similar for entry in entries], many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     def create(self, request, *args, **kwargs):
-        """Handles job creation and payment initiation."""
+        """
+        Saves the job as a draft and queues its payment initialization.
+
+        Responds with 202 right away; the client polls the payment-status
+        endpoint for the checkout URL. Resubmitting with the same
+        Idempotency-Key header returns the original draft instead of
+        creating another one.
+        """
+        idempotency_key = request.headers.get('Idempotency-Key') or None
+        if idempotency_key and len(idempotency_key) > Payment._meta.get_field('idempotency_key').max_length:
+            return Response({"error": "Idempotency-Key is too long"}, status=status.HTTP_400_BAD_REQUEST)
+        if idempotency_key:
+            existing = Payment.objects.filter(idempotency_key=idempotency_key).first()
+            if existing:
+                return self._payment_accepted(existing)
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Generate a unique transaction reference
-        tx_ref = uuid.uuid4().hex
-
-        # Save the JobPost using the serializer
-        job_post = serializer.save(status='draft')
-
-        company = job_post.company
-
-        # Payment data to be sent to Chapa
-        payload = {
-            "amount": "20.00",  # Static fee for posting a job
-            "currency": "USD",
-            "email": company.contact_email,  # Assuming user email exists
-            "tx_ref": tx_ref,
-            "callback_url": settings.CHAPA_CALLBACK_URL,  # User is redirected after payment
-            "customization": {
-                "title": "Job Post Payment",
-                "description": "Get your job posted on RealtimeJobs"
-            }
-        }
-
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {settings.CHAPA_SECRET_KEY}'
-        }
-
-        # Send request to Chapa API
-        response = requests.post(
-            "https://api.chapa.co/v1/transaction/initialize", json=payload, headers=headers)
-        data = response.json()
-
-        # Check if payment initialization was successful
-        if data.get('status') == 'success':
-            checkout_url = data.get('data', {}).get('checkout_url')
-            if not checkout_url:
-                return Response({'error': 'Payment initialization failed'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Save the JobPost using the serializer
-            job_post = serializer.save(status='draft')
-
-            # Save payment details
-            payment = Payment.objects.create(
-                job_post=job_post,
-                amount=payload['amount'],
-                currency=payload['currency'],
-                email=payload['email'],
-                tx_ref=payload['tx_ref'],
-                payment_status='pending'
-            )
-            payment.save()
-
-            # Return the checkout URL to redirect the user
-            return Response({"checkout_url": checkout_url}, status=status.HTTP_201_CREATED)
+        try:
+            with transaction.atomic():
+                # Save the JobPost using the serializer
+                job_post = serializer.save(status='draft')
+
+                # Payment details; the gateway is called by a Celery task
+                payment = Payment.objects.create(
+                    job_post=job_post,
+                    amount="20.00",  # Static fee for posting a job
+                    currency="USD",
+                    email=job_post.company.contact_email,
+                    tx_ref=uuid.uuid4().hex,  # Unique transaction reference
+                    payment_status='pending',
+                    idempotency_key=idempotency_key,
+                )
+                transaction.on_commit(lambda: initialize_job_payment.delay(payment.id))
+        except IntegrityError:
+            if idempotency_key:
+                # A concurrent request with the same key won the race
+                existing = Payment.objects.filter(idempotency_key=idempotency_key).first()
+                if existing:
+                    return self._payment_accepted(existing)
+            # ... or one posting the same job URL
+            if JobPost.objects.filter(job_url_hash=job_url_hash(serializer.validated_data['job_url'])).exists():
+                return Response({"job_url": ["A job post with this URL already exists."]},
+                                status=status.HTTP_400_BAD_REQUEST)
+            raise
+
+        return self._payment_accepted(payment)
+
+    def _payment_accepted(self, payment):
+        return Response({
+            "job_id": payment.job_post_id,
+            "init_status": payment.init_status,
+            "payment_status_url": reverse(
+                'jobpost-payment-status', args=[payment.job_post_id], request=self.request),
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='payment-status', permission_classes=[AllowAny])
+    def payment_status(self, request, pk=None):
+        """
+        Lightweight polling endpoint for the payment of a job post.
+        Returns the checkout URL once the background initialization is done.
+        """
+        payment = Payment.objects.filter(job_post_id=pk).order_by('-timestamp').values(
+            'init_status', 'checkout_url', 'init_error', 'payment_status', 'job_post__status').first()
+        if not payment:
+            return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        else:
-            return Response({'error': 'Payment initialization failed'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "job_id": pk,
+            "job_status": payment['job_post__status'],
+            "init_status": payment['init_status'],
+            "checkout_url": payment['checkout_url'],
+            "error": payment['init_error'] or None,
+            "payment_status": payment['payment_status'],
+        }, status=status.HTTP_200_OK)
 
 
 class PaymentVerificationView(APIView):
@@ -467,27 +735,59 @@ class PaymentVerificationView(APIView):
         except Payment.DoesNotExist:
             return Response({"error": "Payment not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        # Already confirmed by the webhook or reconciliation
+        if payment.payment_status == 'success':
+            return Response({"message": "Payment verified successfully!"}, status=status.HTTP_200_OK)
+
         # Verify payment using Chapa API
-        url = f"https://api.chapa.co/v1/transaction/verify/{tx_ref}"
-        headers = {'Authorization': f'Bearer {settings.CHAPA_SECRET_KEY}'}
-        response = requests.get(url, headers=headers)
-        verification_data = response.json()
+        try:
+            verification_data = get_chapa_client().verify(tx_ref)
+        except PaymentGatewayError:
+            return Response({"error": "Payment service unavailable, please retry later"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        if verification_data.get('status') == 'success':
-            # Update payment and job post status
-            payment.payment_status = 'success'
-            payment.save()
+        if is_payment_successful(verification_data):
+            confirm_payments([tx_ref])
+            return Response({"message": "Payment verified successfully!"}, status=status.HTTP_200_OK)
 
-            job_post = payment.job_post
-            job_post.status = 'published'
-            job_post.save()
+        return Response({"error": "Payment verification failed"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Send email notification after successful payment
-            send_payment_success_email(payment.email, job_post.title)
 
-            return Response({"message": "Payment verified successfully!"}, status=status.HTTP_200_OK)
+class ChapaWebhookView(APIView):
+    """
+    Receives Chapa payment events.
 
-        return Response({"error": "Payment verification failed"}, status=status.HTTP_400_BAD_REQUEST)
+    Events must carry a valid ``x-chapa-signature`` (HMAC-SHA256 of the body
+    with CHAPA_WEBHOOK_SECRET). Confirmation is idempotent, so redelivered
+    events are acknowledged without side effects.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        # Read the raw body before DRF parses it; the signature covers the exact bytes
+        body = request.body
+        signature = request.headers.get('x-chapa-signature') or request.headers.get('Chapa-Signature')
+        if not verify_webhook_signature(body, signature):
+            return Response({"error": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            event = json.loads(body)
+        except ValueError:
+            return Response({"error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
+
+        tx_ref = event.get('tx_ref')
+        if not tx_ref:
+            return Response({"error": "Transaction reference missing"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_payment_successful(event):
+            confirm_payments([tx_ref])
+        elif event.get('status') == 'failed':
+            decline_payments([tx_ref])
+
+        # Acknowledge every authentic event, even for unknown transactions,
+        # so the gateway stops redelivering it
+        return Response({"received": True}, status=status.HTTP_200_OK)
 
 
 class JobPostListViewSet(viewsets.ViewSet):
@@ -503,13 +803,37 @@ class JobPostListViewSet(viewsets.ViewSet):
         job_types = request.GET.getlist("job_type[]")
         page = int(request.GET.get("page", 1))
         page_size = int(request.GET.get("page_size", 15))
+        # Example: ?sort=trending (default: newest first)
+        sort = request.GET.get("sort")
+        if sort not in (None, "newest", "trending"):
+            return Response({"error": "Invalid sort. Must be 'newest' or 'trending'."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
         job_query = JobPostQueries()
         jobs = job_query.fetch_filtered_jobs(
-            categories, locations, job_types, page, page_size)
+            categories, locations, job_types, page, page_size, sort=sort)
+        record_list_impressions(job['id'] for job in jobs)
 
         return Response({"jobs": jobs, "has_next": len(jobs) == page_size})
 
+    @action(detail=False, methods=['get'], url_path='for-you', permission_classes=[IsAuthenticated])
+    def for_you(self, request):
+        """
+        Published jobs ranked for the logged-in user by their saves,
+        applications and job alerts. Example: ?page=2&page_size=15
+        """
+        page = int(request.GET.get("page", 1))
+        page_size = int(request.GET.get("page_size", 15))
+
+        ranked = personalization.feed_job_ids(request.user.id)
+        page_ids = ranked[(page - 1) * page_size:page * page_size]
+        jobs_by_id = JobPost.objects.select_related('company').in_bulk(page_ids)
+        jobs = [jobs_by_id[job_id] for job_id in page_ids if job_id in jobs_by_id]
+        record_list_impressions(job.id for job in jobs)
+
+        serializer = JobSummarySerializer(jobs, many=True)
+        return Response({"jobs": serializer.data, "has_next": page * page_size < len(ranked)})
+
 
 class PaymentViewSet(viewsets.ModelViewSet):
     """
@@ -518,3 +842,51 @@ class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated, IsAdminOnly]
+
+
+class MetricsView(APIView):
+    """
+    Exposes the collected application metrics (Admin Only).
+    Returns JSON by default, or the Prometheus text format with ?output=prometheus
+    (not ?format=, which DRF reserves for picking a renderer).
+    """
+    permission_classes = [IsAuthenticated, IsAdminOnly]
+
+    def get(self, request):
+        if request.GET.get("output") == "prometheus":
+            return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4")
+        return Response(metrics.snapshot(), status=status.HTTP_200_OK)
+
+
+# ****************SITEMAPS AND FEEDS ***********************
+
+FEED_CONTENT_TYPES = {
+    'xml': 'application/xml',
+    'rss': 'application/rss+xml',
+    'atom': 'application/atom+xml',
+}
+
+
+@require_GET
+def static_feed(request, path):
+    """
+    Serves a precomputed sitemap or RSS/Atom feed from FEEDS_ROOT
+    (written by realtimejobs.feeds), with caching headers.
+    """
+    full_path = os.path.join(settings.FEEDS_ROOT, path)
+    try:
+        stat = os.stat(full_path)
+    except FileNotFoundError:
+        raise Http404("Feed not found.")
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    if (request.headers.get('If-None-Match') == etag
+            or not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime)):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(full_path, 'rb'),
+                                content_type=f"{FEED_CONTENT_TYPES[path.rsplit('.', 1)[-1]]}; charset=utf-8")
+        response['Last-Modified'] = http_date(stat.st_mtime)
+    response['ETag'] = etag
+    response['Cache-Control'] = f"public, max-age={settings.FEEDS_CACHE_MAX_AGE}"
+    return response